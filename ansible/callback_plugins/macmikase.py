@@ -0,0 +1,209 @@
+# Callback plugin emitting structured macmikase install events.
+# Enabled via callbacks_enabled in ansible.cfg.
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+
+from ansible.plugins.callback import CallbackBase
+
+DOCUMENTATION = """
+    name: macmikase
+    type: aggregate
+    short_description: Emit macmikase install events as JSON lines
+    description:
+      - Writes one JSON object per line for playbook, phase (top-level role such
+        as homebrew or dotfiles) and task boundaries, including per-host task
+        status and duration.
+      - Live events go to the file or FIFO named by MACMIKASE_EVENTS, which
+        bin/macmikase-install follows to render progress.
+      - Every run is also appended to MACMIKASE_EVENTS_LOG (default
+        ~/.local/state/macmikase/install-events.jsonl; empty disables it),
+        which `macmikase install report` reads to rank the slowest tasks.
+        Only the last MACMIKASE_EVENTS_KEEP runs (default 50, 0 for all) are
+        kept there; older ones are dropped when a new run starts.
+    requirements:
+      - enable in configuration (callbacks_enabled)
+"""
+
+# Top-level roles included by playbook.yml, in execution order.
+PHASES = ("homebrew", "runtimes", "web", "dotfiles")
+
+# Runs kept in the history log unless MACMIKASE_EVENTS_KEEP says otherwise.
+DEFAULT_KEEP_RUNS = 50
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "macmikase"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        default_log = os.path.expanduser("~/.local/state/macmikase/install-events.jsonl")
+        self._log = os.environ.get("MACMIKASE_EVENTS_LOG", default_log)
+        self._paths = [path for path in (os.environ.get("MACMIKASE_EVENTS"), self._log) if path]
+        try:
+            self._keep_runs = int(os.environ.get("MACMIKASE_EVENTS_KEEP", DEFAULT_KEEP_RUNS))
+        except ValueError:
+            self._keep_runs = DEFAULT_KEEP_RUNS
+        self._streams = None
+        self._run_id = uuid.uuid4().hex[:12]
+        self._phase = None
+        self._phase_started = 0.0
+        self._counts = {}
+        self._task_started = 0.0
+
+    # ------------------------------------------------------------------
+    # Event output
+    # ------------------------------------------------------------------
+
+    def _trim_log(self):
+        """Drop the oldest runs so the log holds at most _keep_runs with this one."""
+        try:
+            with open(self._log) as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        starts = []
+        for i, line in enumerate(lines):
+            try:
+                if json.loads(line).get("event") == "playbook_start":
+                    starts.append(i)
+            except (ValueError, AttributeError):
+                continue  # a torn or foreign line; dropped along with its run
+        excess = len(starts) - (self._keep_runs - 1)
+        if excess <= 0:
+            return
+        directory, name = os.path.split(self._log)
+        tmp = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "w") as f:
+                f.writelines(lines[starts[excess] :] if excess < len(starts) else [])
+            os.replace(tmp, self._log)
+        except OSError as e:
+            self._display.warning(f"macmikase callback: cannot trim {self._log}: {e}")
+
+    def _open_streams(self):
+        streams = []
+        for path in self._paths:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                if path == self._log and self._keep_runs > 0:
+                    self._trim_log()
+                # Line-buffered so the installer sees each event as it happens.
+                streams.append(open(path, "a", buffering=1))  # noqa: SIM115
+            except OSError as e:
+                self._display.warning(f"macmikase callback: cannot write {path}: {e}")
+        return streams
+
+    def _emit(self, event, **fields):
+        if not self._paths:
+            return
+        if self._streams is None:
+            self._streams = self._open_streams()
+        line = json.dumps(
+            {"event": event, "run": self._run_id, "time": round(time.time(), 3), **fields}
+        )
+        for stream in self._streams:
+            stream.write(line + "\n")
+
+    def _start_phase(self, phase):
+        self._phase = phase
+        self._phase_started = time.monotonic()
+        self._counts = {"ok": 0, "changed": 0, "failed": 0, "skipped": 0, "ignored": 0}
+        self._emit(
+            "phase_start",
+            phase=phase,
+            index=PHASES.index(phase) + 1,
+            total=len(PHASES),
+        )
+
+    def _end_phase(self):
+        if self._phase is None:
+            return
+        self._emit(
+            "phase_end",
+            phase=self._phase,
+            status="failed" if self._counts["failed"] else "ok",
+            duration=round(time.monotonic() - self._phase_started, 3),
+            **self._counts,
+        )
+        self._phase = None
+
+    @staticmethod
+    def _task_phase(task):
+        name = CallbackModule._task_role(task)
+        return name if name in PHASES else None
+
+    def _task_end(self, result, status):
+        if self._phase is not None:
+            self._counts["changed" if status == "changed" else status] += 1
+        task = result._task
+        self._emit(
+            "task_end",
+            task=self._task_name(task),
+            role=self._task_role(task),
+            phase=self._phase,
+            host=result._host.get_name(),
+            status=status,
+            changed=bool(result._result.get("changed")),
+            duration=round(time.monotonic() - self._task_started, 3),
+        )
+
+    @staticmethod
+    def _task_name(task):
+        # get_name() prefixes "role : "; the role is reported separately.
+        return task.name or task.get_name()
+
+    @staticmethod
+    def _task_role(task):
+        role = getattr(task, "_role", None)
+        return role.get_name() if role is not None else None
+
+    # ------------------------------------------------------------------
+    # Ansible hooks
+    # ------------------------------------------------------------------
+
+    def v2_playbook_on_start(self, playbook):
+        self._emit("playbook_start", phases=list(PHASES))
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        phase = self._task_phase(task)
+        if phase != self._phase:
+            self._end_phase()
+            if phase is not None:
+                self._start_phase(phase)
+        self._task_started = time.monotonic()
+        self._emit(
+            "task_start", task=self._task_name(task), role=self._task_role(task), phase=phase
+        )
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.v2_playbook_on_task_start(task, False)
+
+    def v2_runner_on_ok(self, result):
+        self._task_end(result, "changed" if result._result.get("changed") else "ok")
+
+    def v2_runner_on_skipped(self, result):
+        self._task_end(result, "skipped")
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._task_end(result, "ignored" if ignore_errors else "failed")
+
+    def v2_runner_on_unreachable(self, result):
+        self._task_end(result, "failed")
+
+    def v2_playbook_on_stats(self, stats):
+        self._end_phase()
+        failures = sum(
+            stats.summarize(host)["failures"] + stats.summarize(host)["unreachable"]
+            for host in stats.processed
+        )
+        self._emit("playbook_end", status="failed" if failures else "ok")
+        for stream in self._streams or ():
+            stream.close()
+        self._streams = None
@@ -4,6 +4,27 @@
 emulate -L zsh
 setopt no_nomatch
 
+# Python-backed tools. The zipapp shim (`make zipapp`) starts them with a fixed
+# interpreter and no environment resolution; console scripts on PATH and
+# `uv run` are the fallbacks.
+MACMIKASE_PY="${MACMIKASE_PY:-$HOME/.local/bin/macmikase-py}"
+
+# True if TOOL (e.g. macmikase-cli) can run without `uv run`
+has_macmikase_tool() {
+    [[ -x "$MACMIKASE_PY" ]] || command -v "$1" >/dev/null 2>&1
+}
+
+# Run TOOL [ARGS...] through the fastest available launcher
+macmikase_tool() {
+    if [[ -x "$MACMIKASE_PY" ]]; then
+        "$MACMIKASE_PY" "$@"
+    elif command -v "$1" >/dev/null 2>&1; then
+        "$@"
+    else
+        uv run "$@"
+    fi
+}
+
 # Find themes directory using Python CLI (canonical source) with fallbacks
 find_themes_dir() {
     # 1. Environment variable override
@@ -12,20 +33,11 @@ find_themes_dir() {
         return
     fi
 
-    # 2. Use Python CLI if available (canonical implementation)
-    if command -v macmikase-themes-dir >/dev/null 2>&1; then
+    # 2-3. Use Python CLI if available (canonical implementation): the zipapp
+    # shim, the console script, or `uv run`
+    if has_macmikase_tool macmikase-themes-dir || command -v uv >/dev/null 2>&1; then
         local py_result
-        py_result=$(macmikase-themes-dir 2>/dev/null)
-        if [[ -n "$py_result" ]] && [[ -d "$py_result" ]]; then
-            echo "$py_result"
-            return
-        fi
-    fi
-
-    # 3. Try uv run if macmikase-themes-dir not in PATH
-    if command -v uv >/dev/null 2>&1; then
-        local py_result
-        py_result=$(uv run macmikase-themes-dir 2>/dev/null)
+        py_result=$(macmikase_tool macmikase-themes-dir 2>/dev/null)
         if [[ -n "$py_result" ]] && [[ -d "$py_result" ]]; then
             echo "$py_result"
             return
@@ -124,11 +136,15 @@ require_theme() {
     return 0
 }
 
-# Theme history management
+# Theme history management. With macmikase-cli, switches are recorded in its
+# state database (macmikase-cli history list); the text file is the fallback.
 HISTORY_FILE="$HOME/.config/macmikase/theme-history"
 
 save_theme_history() {
     local theme="$1"
+    if has_macmikase_tool macmikase-cli; then
+        return
+    fi
     mkdir -p "$(dirname "$HISTORY_FILE")"
 
     # Don't record if it's the same as last one
@@ -146,6 +162,10 @@ save_theme_history() {
 }
 
 get_previous_theme() {
+    if has_macmikase_tool macmikase-cli \
+        && macmikase_tool macmikase-cli history list --previous 2>/dev/null; then
+        return 0
+    fi
     if [[ ! -f "$HISTORY_FILE" ]]; then
         return 1
     fi
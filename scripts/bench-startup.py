@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+bench-startup.py - Compare start-up time of the ways shell helpers run macmikase.
+
+Runs one tool invocation repeatedly through each launcher that is available:
+
+- uv run:        `uv run <tool>` (resolves the project environment every time)
+- console script: `<tool>` from PATH (the environment's entry-point wrapper)
+- zipapp:        `dist/macmikase-py <tool>` (see scripts/build-zipapp.py)
+- python:        a bare `python -c pass` with the zipapp's interpreter, as a floor
+
+Usage:
+    uv run python scripts/bench-startup.py                     # macmikase-themes-dir, 20 runs
+    uv run python scripts/bench-startup.py -n 50 -- macmikase-cli history list -n 1
+    uv run python scripts/bench-startup.py --shim ~/.local/bin/macmikase-py --json
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def measure(argv: list[str], runs: int, warmup: int) -> list[float]:
+    times = []
+    for i in range(warmup + runs):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=REPO, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if i >= warmup:
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def shim_interpreter(shim: Path) -> str | None:
+    """The interpreter the shim execs (first word of its exec line)."""
+    for line in shim.read_text().splitlines():
+        if line.startswith("exec "):
+            return line.split()[1].strip("'")
+    return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1].strip())
+    parser.add_argument("--runs", "-n", type=int, default=20, help="Timed runs per launcher")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs first")
+    parser.add_argument("--shim", type=Path, default=REPO / "dist" / "macmikase-py")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("command", nargs="*", default=["macmikase-themes-dir"])
+    args = parser.parse_args()
+
+    tool, rest = args.command[0], args.command[1:]
+    launchers: list[tuple[str, list[str]]] = []
+    if shutil.which("uv"):
+        launchers.append(("uv run", ["uv", "run", tool, *rest]))
+    if shutil.which(tool):
+        launchers.append(("console script", [tool, *rest]))
+    if args.shim.is_file():
+        launchers.append(("zipapp", [str(args.shim), tool, *rest]))
+        python = shim_interpreter(args.shim)
+        if python:
+            launchers.append(("python", [python, "-s", "-E", "-c", "pass"]))
+    else:
+        print(f"note: {args.shim} not found; run scripts/build-zipapp.py", file=sys.stderr)
+
+    results = []
+    for name, argv in launchers:
+        times = measure(argv, args.runs, args.warmup)
+        results.append(
+            {
+                "launcher": name,
+                "median": statistics.median(times),
+                "min": min(times),
+                "max": max(times),
+                "argv": argv,
+            }
+        )
+
+    if args.json:
+        print(json.dumps({"command": args.command, "runs": args.runs, "results": results}))
+        return 0
+    print(f"{' '.join(args.command)} ({args.runs} runs each)")
+    print(f"{'launcher':<16} {'median':>9} {'min':>9} {'max':>9}")
+    for r in results:
+        print(
+            f"{r['launcher']:<16} {r['median'] * 1000:>7.1f}ms {r['min'] * 1000:>7.1f}ms "
+            f"{r['max'] * 1000:>7.1f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
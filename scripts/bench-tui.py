@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+bench-tui.py - Measure theme-tui time-to-first-paint and keystroke latency.
+
+Generates a synthetic themes directory (theme.yaml + kitty.conf per theme) and
+drives theme-tui headlessly with Textual's Pilot, once per run in a fresh
+process so imports are cold. Per run it records, from the start of the process:
+
+- import:  `import macmikase.theme_tui`
+- paint:   the first frame (Textual's Ready event)
+- preview: swatches of the first theme in the preview pane
+- listed:  every theme in the list
+
+and, for `--keys` presses of Down, the time from posting the key until the app
+has handled the new highlight (`highlight`) and until the preview pane shows
+its swatches (`preview`). Pilot's own settling sleeps are not counted.
+
+Usage:
+    uv run python scripts/bench-tui.py                   # 400 themes, 5 runs
+    uv run python scripts/bench-tui.py --themes 800 --keys 100 --json
+    uv run python scripts/bench-tui.py --previews        # also decode preview.png (Pillow)
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+STARTUP = ("import", "paint", "preview", "listed")
+
+
+def make_themes(root: Path, count: int, previews: bool) -> Path:
+    themes = root / "themes"
+    for i in range(count):
+        theme = themes / f"synthetic-{i:04d}"
+        theme.mkdir(parents=True)
+        shade = f"{i * 37 % 256:02x}"
+        (theme / "theme.yaml").write_text(
+            f"name: Synthetic {i}\nvariant: {'light' if i % 3 == 0 else 'dark'}\n"
+            f"colors:\n  accent: '#{shade}88cc'\n  background: '#1e1e{shade}'\n"
+        )
+        lines = [f"foreground #d8dee9\nbackground #1e1e{shade}\ncursor #{shade}a1c1"]
+        lines += [f"color{n} #{(n * 16 + i) % 256:02x}{shade}{n * 15:02x}" for n in range(16)]
+        (theme / "kitty.conf").write_text("\n".join(lines) + "\n")
+        if previews:
+            shutil.copy(REPO / "themes" / "nord" / "preview.png", theme / "preview.png")
+    return themes
+
+
+def child(themes: int, keys: int) -> None:
+    """One cold run; prints a JSON object of timings in seconds."""
+    import asyncio
+
+    start = time.perf_counter()
+    from macmikase import theme_tui
+
+    marks = {"import": time.perf_counter() - start}
+    last: dict[str, float] = {}
+
+    class TimedTui(theme_tui.ThemeTui):
+        def on_ready(self) -> None:
+            marks["paint"] = time.perf_counter() - start
+
+    def timed_highlight(self, *args, **kwargs):
+        # The highlight handler ends by handing the theme to the preview pane.
+        update_preview(self, *args, **kwargs)
+        last["highlight"] = time.perf_counter()
+
+    def timed_update(self, renderable="", **kwargs):
+        # Placeholder, swatches and thumbnail all go through update; count the
+        # first one that shows the theme's details.
+        update(self, renderable, **kwargs)
+        parts = getattr(renderable, "renderables", [renderable])
+        if "preview" not in last and any("Variant:" in getattr(p, "plain", "") for p in parts):
+            last["preview"] = time.perf_counter()
+
+    preview = theme_tui.ThemePreview
+    update_preview, update = preview.update_preview, preview.update
+    preview.update_preview, preview.update = timed_highlight, timed_update
+
+    async def settle(app, pilot) -> None:
+        await pilot.pause()
+        while app.workers:
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+
+    async def scenario() -> dict:
+        app = TimedTui()
+        async with app.run_test(size=(160, 50)) as pilot:
+            while app.option_list.option_count < themes:
+                await pilot.pause(0.001)
+            marks["listed"] = time.perf_counter() - start
+            await settle(app, pilot)
+            marks["preview"] = last["preview"] - start
+            highlight, preview = [], []
+            for _ in range(keys):
+                last.clear()
+                t = time.perf_counter()
+                await pilot.press("down")
+                await settle(app, pilot)
+                highlight.append(last["highlight"] - t)
+                preview.append(last["preview"] - t)
+        return {**marks, "highlight": highlight, "key_preview": preview}
+
+    print(json.dumps(asyncio.run(scenario())))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1].strip())
+    parser.add_argument("--themes", type=int, default=400, help="Synthetic themes to generate")
+    parser.add_argument("--runs", "-n", type=int, default=5, help="Cold runs")
+    parser.add_argument("--keys", type=int, default=50, help="Down presses per run")
+    parser.add_argument("--previews", action="store_true", help="Give every theme a preview.png")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.themes, args.keys)
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix="macmikase-bench-tui-") as tmp:
+        root = Path(tmp)
+        env = {
+            **os.environ,
+            "HOME": str(root),  # keep palette/thumbnail caches out of the real one
+            "THEMES_DIR": str(make_themes(root, args.themes, args.previews)),
+        }
+        argv = [sys.executable, __file__, "--child", "--themes", str(args.themes)]
+        argv += ["--keys", str(args.keys)]
+        runs = []
+        for _ in range(args.runs):
+            proc = subprocess.run(argv, env=env, capture_output=True, text=True, cwd=root)
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                return 1
+            runs.append(json.loads(proc.stdout.splitlines()[-1]))
+
+    startup = {m: statistics.median(r[m] for r in runs) for m in STARTUP}
+    keys = {
+        m: {"median": statistics.median(v), "p95": percentile(v, 0.95), "max": max(v)}
+        for m in ("highlight", "key_preview")
+        for v in [[x for r in runs for x in r[m]]]
+    }
+    if args.json:
+        print(json.dumps({"themes": args.themes, "runs": runs, "startup": startup, "keys": keys}))
+        return 0
+    print(f"theme-tui with {args.themes} themes ({args.runs} cold runs, median from start)")
+    for name, value in startup.items():
+        print(f"  {name:<10} {value * 1000:>7.1f}ms")
+    print(f"Down key ({args.keys} per run)    median      p95      max")
+    for name, stats in keys.items():
+        label = "preview" if name == "key_preview" else name
+        print(
+            f"  {label:<22} {stats['median'] * 1000:>7.1f}ms {stats['p95'] * 1000:>7.1f}ms "
+            f"{stats['max'] * 1000:>7.1f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+build-zipapp.py - Build dist/macmikase.pyz and the dist/macmikase-py shim.
+
+The archive holds every macmikase tool with precompiled bytecode and the
+pure-Python dependencies; the shim runs it with the interpreter this script
+runs under. See macmikase.bundle.
+
+Usage:
+    uv run python scripts/build-zipapp.py            # Build into dist/
+    uv run python scripts/build-zipapp.py --install  # ...and install ~/.local/bin/macmikase-py
+"""
+
+import sys
+from pathlib import Path
+
+try:
+    from macmikase.bundle import _main
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+    from macmikase.bundle import _main
+
+
+if __name__ == "__main__":
+    _main()
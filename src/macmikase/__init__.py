@@ -1,12 +1,17 @@
 """macmikase: macOS Omakase - Opinionated Mac workstation configuration."""
 
-from macmikase.config import (
-    enabled_items,
-    enabled_top_level,
-    get_value,
-    load_config,
-    package_names,
-)
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from macmikase.config import (
+        enabled_items,
+        enabled_top_level,
+        get_value,
+        load_config,
+        package_names,
+    )
 
 __all__ = [
     "enabled_items",
@@ -15,3 +20,13 @@ __all__ = [
     "load_config",
     "package_names",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # Resolved on first use so that running any tool does not import the
+    # config loader (and YAML) up front.
+    if name in __all__:
+        from macmikase import config
+
+        return getattr(config, name)
+    raise AttributeError(f"module 'macmikase' has no attribute {name!r}")
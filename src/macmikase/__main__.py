@@ -0,0 +1,37 @@
+"""Run a macmikase tool by name: ``python -m macmikase [TOOL] [ARGS...]``.
+
+This is also the entry point of the ``macmikase.pyz`` zipapp built by
+``scripts/build-zipapp.py``; its shim passes the console-script name first
+(``macmikase-py macmikase-cli theme nord``). Without a known tool name the
+arguments go to ``macmikase``. Only the module of the tool being run is
+imported.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+
+# Mirrors [project.scripts] in pyproject.toml.
+TOOLS = {
+    "macmikase": "macmikase.cli:run",
+    "theme-tui": "macmikase.theme_tui:run",
+    "macmikase-cli": "macmikase.cli:run",
+    "macmikase-config": "macmikase.config:_main",
+    "macmikase-chezmoi": "macmikase.chezmoi:_main",
+    "macmikase-validate-config": "macmikase.schema:_main",
+    "macmikase-themes-dir": "macmikase.themes:_main",
+    "macmikase-wallpaper": "macmikase.wallpapers:_main",
+}
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = list(sys.argv[1:] if argv is None else argv)
+    tool = args.pop(0) if args and args[0] in TOOLS else "macmikase"
+    module, _, func = TOOLS[tool].partition(":")
+    sys.argv = [tool, *args]  # argparse takes its prog name from here
+    raise SystemExit(getattr(importlib.import_module(module), func)())
+
+
+if __name__ == "__main__":
+    main()
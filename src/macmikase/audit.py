@@ -0,0 +1,243 @@
+"""Contrast and accessibility audit across theme palettes.
+
+Every theme's compiled palette is stacked into one ``(themes, 18, 3)`` array
+(foreground, background, ANSI 0-15) and checked in a single vectorised pass:
+
+- WCAG contrast of foreground and of each ANSI color against the background;
+- OKLab ΔE between the six chromatic ANSI colors of the same intensity, so
+  e.g. red and magenta that render as the same color are reported;
+- whether the palette is actually light or dark compared with the declared
+  ``variant`` and the legacy ``light.mode`` marker.
+
+Needs NumPy (``pip install 'macmikase[color]'``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from macmikase.colorspace import (
+    contrast_ratio,
+    hex_to_rgb,
+    pairwise_delta_e,
+    relative_luminance,
+    srgb_to_oklab,
+)
+from macmikase.palette import ANSI_NAMES, Palette, load_palette
+from macmikase.themes import list_themes, load_manifest
+
+# WCAG AA for body text; 3:1 is the AA minimum for large text and UI components.
+MIN_TEXT_CONTRAST = 4.5
+MIN_ANSI_CONTRAST = 3.0
+# OKLab distances below this are hard to tell apart at terminal glyph sizes.
+MIN_DELTA_E = 0.03
+
+_FG, _BG, _ANSI = 0, 1, 2
+_SLOTS = ("foreground", "background", *ANSI_NAMES)
+
+# Chromatic colors (red..cyan) that should be distinguishable from each other.
+_NORMAL_HUES = list(range(_ANSI + 1, _ANSI + 7))
+_BRIGHT_HUES = list(range(_ANSI + 9, _ANSI + 15))
+
+
+@dataclass
+class Issue:
+    level: str  # "error" or "warning"
+    check: str
+    message: str
+
+
+@dataclass
+class ThemeReport:
+    name: str
+    variant: str
+    light_mode: bool
+    detected: str | None
+    text_contrast: float | None
+    ansi_contrast: dict[str, float] = field(default_factory=dict)
+    min_delta_e: float | None = None
+    issues: list[Issue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> list[Issue]:
+        return [issue for issue in self.issues if issue.level == "error"]
+
+    @property
+    def warnings(self) -> list[Issue]:
+        return [issue for issue in self.issues if issue.level == "warning"]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class ThemeInput:
+    name: str
+    palette: Palette
+    variant: str = "dark"
+    light_mode: bool = False
+
+
+def _blending(detected: str | None) -> set[str]:
+    """ANSI colors on the background side, expected to have little contrast.
+
+    ANSI black is the theme's sidebar color in every theme (see theme_sync), so
+    it blends in for light themes as well.
+    """
+    return {"black", "white", "bright_white"} if detected == "light" else {"black"}
+
+
+def _float(value: float) -> float | None:
+    return None if np.isnan(value) else round(float(value), 3)
+
+
+def audit_palettes(
+    themes: list[ThemeInput],
+    *,
+    min_text_contrast: float = MIN_TEXT_CONTRAST,
+    min_ansi_contrast: float = MIN_ANSI_CONTRAST,
+    min_delta_e: float = MIN_DELTA_E,
+) -> list[ThemeReport]:
+    """Audit palettes; all numeric work is done on the stacked arrays at once."""
+    if not themes:
+        return []
+    rgb = np.stack(
+        [hex_to_rgb([t.palette.foreground, t.palette.background, *t.palette.ansi]) for t in themes]
+    )
+    lum = relative_luminance(rgb)
+    contrast = contrast_ratio(lum, lum[:, _BG : _BG + 1])
+    delta_e = pairwise_delta_e(srgb_to_oklab(rgb))
+    detected_light = lum[:, _BG] > lum[:, _FG]
+
+    # Hue collisions: pairs within the normal and within the bright group only;
+    # normal/bright duplicates are a common, deliberate choice.
+    pair_mask = np.zeros((len(_SLOTS), len(_SLOTS)), dtype=bool)
+    for group in (_NORMAL_HUES, _BRIGHT_HUES):
+        pair_mask[np.ix_(group, group)] = True
+    pair_mask &= np.triu(np.ones_like(pair_mask), k=1)
+    hue_delta_e = np.where(pair_mask, delta_e, np.nan)
+    with np.errstate(all="ignore"):
+        nearest = np.fmin.reduce(hue_delta_e.reshape(len(themes), -1), axis=1)
+    collisions = np.argwhere(pair_mask & (delta_e < min_delta_e))
+
+    reports = []
+    for i, theme in enumerate(themes):
+        has_base = not np.isnan(lum[i, _FG]) and not np.isnan(lum[i, _BG])
+        report = ThemeReport(
+            name=theme.name,
+            variant=theme.variant,
+            light_mode=theme.light_mode,
+            detected=("light" if detected_light[i] else "dark") if has_base else None,
+            text_contrast=_float(contrast[i, _FG]),
+            ansi_contrast={
+                name: _float(contrast[i, _ANSI + n])
+                for n, name in enumerate(ANSI_NAMES)
+                if not np.isnan(contrast[i, _ANSI + n])
+            },
+            min_delta_e=_float(nearest[i]),
+        )
+        reports.append(report)
+        if not has_base:
+            report.issues.append(Issue("error", "palette", "no foreground/background colors"))
+            continue
+
+        if contrast[i, _FG] < min_text_contrast:
+            report.issues.append(
+                Issue(
+                    "error",
+                    "contrast",
+                    f"foreground/background {contrast[i, _FG]:.2f}:1 < {min_text_contrast}:1",
+                )
+            )
+        skipped = _blending(report.detected)
+        for name, ratio in report.ansi_contrast.items():
+            if name not in skipped and ratio < min_ansi_contrast:
+                report.issues.append(
+                    Issue(
+                        "warning",
+                        "contrast",
+                        f"{name} on background {ratio:.2f}:1 < {min_ansi_contrast}:1",
+                    )
+                )
+
+        if theme.variant != report.detected:
+            report.issues.append(
+                Issue(
+                    "error",
+                    "variant",
+                    f"variant is '{theme.variant}' but the palette is {report.detected}",
+                )
+            )
+        if theme.light_mode != (theme.variant == "light"):
+            marker = "present" if theme.light_mode else "missing"
+            report.issues.append(
+                Issue(
+                    "error",
+                    "variant",
+                    f"light.mode is {marker} but variant is '{theme.variant}'",
+                )
+            )
+
+    for i, a, b in collisions:
+        reports[i].issues.append(
+            Issue(
+                "warning",
+                "delta-e",
+                f"{_SLOTS[a]} and {_SLOTS[b]} are nearly identical (ΔE {delta_e[i, a, b]:.3f})",
+            )
+        )
+    return reports
+
+
+def load_inputs(themes_dir: Path, names: list[str] | None = None) -> list[ThemeInput]:
+    """Collect palettes and declared variants for themes under ``themes_dir``.
+
+    Directories starting with ``_`` (e.g. ``_base``) are templates and skipped.
+    """
+    inputs = []
+    for name in names or list_themes(themes_dir):
+        if name.startswith("_"):
+            continue
+        path = themes_dir / name
+        if not path.is_dir():
+            raise FileNotFoundError(f"Theme '{name}' not found in {themes_dir}")
+        inputs.append(
+            ThemeInput(
+                name=name,
+                palette=load_palette(path),
+                variant=load_manifest(path).variant,
+                light_mode=(path / "light.mode").exists(),
+            )
+        )
+    return inputs
+
+
+def format_table(reports: list[ThemeReport]) -> str:
+    def num(value: float | None, fmt: str) -> str:
+        return "-" if value is None else format(value, fmt)
+
+    header = f"{'THEME':<20} {'VARIANT':<8} {'FG/BG':>6} {'MIN ANSI':>16} {'MIN ΔE':>7} ISSUES"
+    lines = [header]
+    for report in reports:
+        checked = {
+            name: ratio
+            for name, ratio in report.ansi_contrast.items()
+            if name not in _blending(report.detected)
+        }
+        if checked:
+            worst = min(checked, key=checked.__getitem__)
+            ansi = f"{checked[worst]:.2f} {worst}"
+        else:
+            ansi = "-"
+        status = f"{len(report.errors)}E {len(report.warnings)}W" if report.issues else "ok"
+        lines.append(
+            f"{report.name:<20} {report.variant:<8} {num(report.text_contrast, '.2f'):>6} "
+            f"{ansi:>16} {num(report.min_delta_e, '.3f'):>7} {status}"
+        )
+    for report in reports:
+        for issue in report.issues:
+            lines.append(f"{issue.level.upper():<7} {report.name}: {issue.message}")
+    return "\n".join(lines)
@@ -0,0 +1,238 @@
+"""Build ``macmikase.pyz``, a zipapp of every macmikase tool, and its shim.
+
+``uv run macmikase-...`` re-resolves the project environment on every call,
+which dominates the start-up time of the shell helpers. ``build_zipapp``
+instead packs ``src/macmikase`` and the pure-Python dependencies installed in
+the building interpreter's environment into one archive, with bytecode
+compiled ahead of time (unchecked-hash ``.pyc`` files next to the sources,
+which ``zipimport`` loads without comparing timestamps). Distributions with
+compiled extensions (``pydantic-core``, PyYAML's ``_yaml``), and anything
+depending on them, cannot be imported from a zip and stay in that
+environment.
+
+``write_shim`` writes ``macmikase-py``, a small ``sh`` script that execs the
+same interpreter on the archive; ``bin/macmikase-lib.sh`` prefers it, so a
+helper runs as ``macmikase-py macmikase-cli ...`` with no environment lookup.
+Until the archive is rebuilt after a source update (``make zipapp``), the shim
+falls back to the installed package: the archive's mtime is the time its
+sources were copied, and any ``*.py`` under ``src/macmikase`` newer than that
+sends the shim to the environment instead.
+"""
+
+from __future__ import annotations
+
+import compileall
+import os
+import re
+import shlex
+import shutil
+import sys
+import tempfile
+import time
+import zipapp
+from dataclasses import dataclass, field
+from importlib import metadata
+from pathlib import Path
+from py_compile import PycInvalidationMode
+
+# Use tomllib (standard library in 3.11+) or tomli for older versions
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
+
+PACKAGE = "macmikase"
+EXTENSION_SUFFIXES = (".so", ".pyd", ".dylib")
+
+_REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+@dataclass
+class BuildResult:
+    output: Path
+    vendored: list[str] = field(default_factory=list)  # "name version", packed into the archive
+    external: list[str] = field(default_factory=list)  # left to the interpreter's environment
+    size: int = 0
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _names(requirements: list[str]) -> list[str]:
+    """Normalised names of the requirements that do not depend on an extra."""
+    names = []
+    for req in requirements:
+        if "extra" in req.partition(";")[2]:
+            continue
+        match = _REQUIREMENT_NAME.match(req)
+        if match:
+            names.append(_normalize(match.group(1)))
+    return names
+
+
+def _requires(dist: metadata.Distribution) -> list[str]:
+    return _names(dist.requires or [])
+
+
+def _distribution(name: str) -> metadata.Distribution | None:
+    try:
+        return metadata.distribution(name)
+    except metadata.PackageNotFoundError:
+        return None  # e.g. a backport for an older Python
+
+
+def _has_extensions(dist: metadata.Distribution) -> bool:
+    return any(str(f).endswith(EXTENSION_SUFFIXES) for f in dist.files or [])
+
+
+def dependency_closure(requirements: list[str]) -> dict[str, metadata.Distribution]:
+    """Installed distributions reachable from ``requirements``, by normalised name."""
+    found: dict[str, metadata.Distribution] = {}
+    pending = _names(requirements)
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        dist = _distribution(name)
+        if dist is None:
+            continue
+        found[name] = dist
+        pending += _requires(dist)
+    return found
+
+
+def split_vendorable(
+    dists: dict[str, metadata.Distribution],
+) -> tuple[list[metadata.Distribution], list[metadata.Distribution]]:
+    """(pure-Python, external): a distribution is external if it or a dependency is compiled."""
+    external = {name for name, dist in dists.items() if _has_extensions(dist)}
+    changed = True
+    while changed:
+        changed = False
+        for name, dist in dists.items():
+            if name not in external and any(dep in external for dep in _requires(dist)):
+                external.add(name)
+                changed = True
+    pure = [d for n, d in sorted(dists.items()) if n not in external]
+    return pure, [d for n, d in sorted(dists.items()) if n in external]
+
+
+def _copy_distribution(dist: metadata.Distribution, stage: Path) -> None:
+    for file in dist.files or []:
+        if file.parts[0] == ".." or "__pycache__" in file.parts or file.suffix == ".pyc":
+            continue  # console scripts outside site-packages, stale bytecode
+        source = Path(str(dist.locate_file(file)))
+        if source.is_file():
+            dest = stage / file
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, dest)
+
+
+def _project(project_root: Path) -> dict:
+    with open(project_root / "pyproject.toml", "rb") as f:
+        return tomllib.load(f)["project"]
+
+
+def build_zipapp(project_root: Path, output: Path, *, vendor: bool = True) -> BuildResult:
+    """Pack ``project_root/src/macmikase`` (and its pure deps) into ``output``."""
+    project = _project(project_root)
+    result = BuildResult(output)
+    started = time.time()
+    with tempfile.TemporaryDirectory(prefix="macmikase-zipapp-") as tmp:
+        stage = Path(tmp)
+        shutil.copytree(
+            project_root / "src" / PACKAGE,
+            stage / PACKAGE,
+            ignore=shutil.ignore_patterns("__pycache__", "*.pyc"),
+        )
+        # Metadata for importlib.metadata.version("macmikase") inside the archive.
+        info = stage / f"{PACKAGE}-{project['version']}.dist-info"
+        info.mkdir()
+        (info / "METADATA").write_text(
+            f"Metadata-Version: 2.1\nName: {PACKAGE}\nVersion: {project['version']}\n"
+        )
+        if vendor:
+            deps = dependency_closure(list(project.get("dependencies", [])))
+            pure, external = split_vendorable(deps)
+            for dist in pure:
+                _copy_distribution(dist, stage)
+            result.vendored = [f"{d.metadata['Name']} {d.version}" for d in pure]
+            result.external = [f"{d.metadata['Name']} {d.version}" for d in external]
+        (stage / "__main__.py").write_text(f"from {PACKAGE}.__main__ import main\n\nmain()\n")
+        compileall.compile_dir(
+            stage,
+            quiet=2,
+            legacy=True,  # zipimport looks for module.pyc, not __pycache__/
+            invalidation_mode=PycInvalidationMode.UNCHECKED_HASH,
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp_output = output.with_name(f".{output.name}.tmp")
+        zipapp.create_archive(stage, tmp_output)
+        # Stamp the archive with the copy time, so an edit made during the build
+        # still makes the sources count as newer.
+        os.utime(tmp_output, (started, started))
+        tmp_output.replace(output)
+    result.size = output.stat().st_size
+    return result
+
+
+def write_shim(
+    shim: Path, archive: Path, interpreter: str | None = None, source: Path | None = None
+) -> Path:
+    """Write an ``sh`` shim running ``archive`` with a fixed interpreter.
+
+    With ``source`` (the package directory the archive was built from), the shim
+    runs ``-m macmikase`` from the environment instead while any ``*.py`` in it
+    is newer than the archive (or the archive is missing), e.g. after an edit or
+    a ``git pull`` but before ``make zipapp``.
+    """
+    python = shlex.quote(interpreter or sys.executable)
+    pyz = shlex.quote(str(archive.resolve()))
+    lines = ["#!/bin/sh", "# Runs macmikase tools from the zipapp; regenerate with `make zipapp`."]
+    if source is not None:
+        src = shlex.quote(str(source.resolve()))
+        newer = f"$(find {src} -name '*.py' -newer {pyz} -print -quit 2>/dev/null)"
+        lines.append(
+            f'{{ [ ! -f {pyz} ] || [ -n "{newer}" ]; }} && exec {python} -s -m {PACKAGE} "$@"'
+        )
+    lines.append(f'exec {python} -s -E {pyz} "$@"')
+    shim.parent.mkdir(parents=True, exist_ok=True)
+    shim.write_text("\n".join(lines) + "\n")
+    shim.chmod(0o755)
+    return shim
+
+
+def _main() -> None:
+    """CLI entry point (scripts/build-zipapp.py)."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the macmikase zipapp and its shim")
+    parser.add_argument(
+        "--project", type=Path, default=Path.cwd(), help="Repository root (default: cwd)"
+    )
+    parser.add_argument("--output", type=Path, help="Archive path (default: dist/macmikase.pyz)")
+    parser.add_argument("--shim", type=Path, help="Shim path (default: dist/macmikase-py)")
+    parser.add_argument(
+        "--install", action="store_true", help="Also install the shim as ~/.local/bin/macmikase-py"
+    )
+    parser.add_argument(
+        "--no-vendor", action="store_true", help="Only pack macmikase; use the environment's deps"
+    )
+    args = parser.parse_args()
+
+    output = args.output or args.project / "dist" / f"{PACKAGE}.pyz"
+    result = build_zipapp(args.project, output, vendor=not args.no_vendor)
+    source = args.project / "src" / PACKAGE
+    shims = [write_shim(args.shim or output.with_name(f"{PACKAGE}-py"), output, source=source)]
+    if args.install:
+        home_shim = Path.home() / ".local" / "bin" / f"{PACKAGE}-py"
+        shims.append(write_shim(home_shim, output, source=source))
+
+    print(f"Built {result.output} ({result.size / 1024:.0f} KiB) for {sys.executable}")
+    if result.vendored:
+        print(f"  vendored: {', '.join(result.vendored)}")
+    if result.external:
+        print(f"  from the interpreter's environment: {', '.join(result.external)}")
+    for shim in shims:
+        print(f"  shim: {shim}")
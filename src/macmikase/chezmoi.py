@@ -1,77 +1,194 @@
-"""Safely update chezmoi configuration."""
+"""Safely update chezmoi configuration.
+
+``set_chezmoi_data`` is a small transactional store for the ``[data]`` section
+of ``~/.config/chezmoi/chezmoi.toml``: the read-modify-write runs under an
+advisory lock on a sidecar ``chezmoi.toml.lock`` (so a theme switch from the
+TUI and one from the CLI cannot lose each other's update), the new file is
+written to a unique temp file, fsynced and renamed over the old one, and
+nothing is written at all when the values already match. It returns whether
+the file changed.
+
+An unchanged file alone does not mean the dotfiles are current: the data is
+written before ``chezmoi apply`` runs, and that apply may fail or be skipped
+(``--no-apply``). ``mark_applied`` records the theme data of the last apply that
+succeeded, and callers only skip the apply when ``is_applied`` agrees.
+"""
 
 from __future__ import annotations
 
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any
 
 import tomli_w
 
+from macmikase.paths import state_dir
+
 # Use tomllib (standard library in 3.11+) or tomli for older versions
 try:
     import tomllib
 except ImportError:
     import tomli as tomllib
 
+DEFAULTS = {"font_family": "JetBrainsMono Nerd Font", "font_size": 9, "padding": 14}
 
-def update_chezmoi_data(theme: str, themes_dir: str) -> bool:
-    """Safely update chezmoi.toml [data] section.
 
-    Args:
-        theme: Theme name to set.
-        themes_dir: Directory containing themes.
+def config_path() -> Path:
+    return Path.home() / ".config" / "chezmoi" / "chezmoi.toml"
 
-    Returns:
-        True if successful, False otherwise.
+
+def read_chezmoi_config() -> dict[str, Any]:
+    """Return chezmoi.toml, or {} if it is missing or unreadable."""
+    try:
+        with open(config_path(), "rb") as f:
+            return tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError):
+        return {}
+
+
+def read_chezmoi_data() -> dict[str, Any]:
+    """Return the [data] section of chezmoi.toml, or {} if it is missing or unreadable."""
+    data = read_chezmoi_config().get("data")
+    return data if isinstance(data, dict) else {}
+
+
+def source_dir() -> Path:
+    """chezmoi's source directory (``sourceDir`` in chezmoi.toml, else the default)."""
+    configured = read_chezmoi_config().get("sourceDir")
+    if isinstance(configured, str) and configured:
+        return Path(configured).expanduser()
+    return Path.home() / ".local" / "share" / "chezmoi"
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on ``path``'s sidecar lock file.
+
+    The config itself is replaced by rename, so locking it would lock an inode
+    that the next writer no longer sees.
     """
-    config_path = Path.home() / ".config" / "chezmoi" / "chezmoi.toml"
+    lock_path = path.with_name(f"{path.name}.lock")
+    with open(lock_path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
 
-    # Ensure directory exists
-    config_path.parent.mkdir(parents=True, exist_ok=True)
 
-    data: dict[str, Any] = {}
+def _write_durable(path: Path, data: dict[str, Any]) -> None:
+    """Write ``data`` to a unique temp file, fsync it and rename it over ``path``."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            tomli_w.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp)
+        else:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    # Persist the rename itself.
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def set_chezmoi_data(
+    values: dict[str, Any],
+    defaults: dict[str, Any] | None = None,
+    path: Path | None = None,
+) -> bool:
+    """Set ``values`` (and missing ``defaults``) in the [data] section.
 
-    # Read existing config
-    if config_path.exists():
+    Returns True if the file was written, False if everything already matched.
+    Raises ``tomllib.TOMLDecodeError`` for an invalid file and ``OSError`` if
+    it cannot be read or written; the file is left untouched in both cases.
+    """
+    path = path or config_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _locked(path):
         try:
-            with open(config_path, "rb") as f:
-                data = tomllib.load(f)
-        except tomllib.TOMLDecodeError as e:
-            print(f"Error: chezmoi.toml has invalid TOML syntax: {e}")
-            print("Please fix the file manually or remove it to start fresh.")
-            return False
-        except PermissionError as e:
-            print(f"Error: Cannot read chezmoi config (permission denied): {e}")
-            return False
-        except OSError as e:
-            print(f"Error reading chezmoi config: {e}")
+            with open(path, "rb") as f:
+                document = tomllib.load(f)
+        except FileNotFoundError:
+            document = {}
+        current = document.get("data")
+        current = current if isinstance(current, dict) else {}
+        data = {**current, **values}
+        for key, value in (defaults or {}).items():
+            data.setdefault(key, value)
+        if path.exists() and data == current:
             return False
+        _write_durable(path, {**document, "data": data})
+        return True
+
+
+def set_theme_data(theme: str, themes_dir: str) -> bool:
+    """Record the active theme for chezmoi templates; returns whether anything changed."""
+    return set_chezmoi_data({"theme": theme, "themes_dir": themes_dir}, DEFAULTS)
+
 
-    # Update [data] section
-    if "data" not in data:
-        data["data"] = {}
+def applied_path() -> Path:
+    return state_dir() / "chezmoi-applied.json"
 
-    data["data"]["theme"] = theme
-    data["data"]["themes_dir"] = themes_dir
 
-    # Set some defaults if they don't exist
-    defaults = {"font_family": "JetBrainsMono Nerd Font", "font_size": 9, "padding": 14}
-    for key, val in defaults.items():
-        if key not in data["data"]:
-            data["data"][key] = val
+def mark_applied(theme: str, themes_dir: str) -> None:
+    """Record that ``chezmoi apply`` succeeded with this theme data."""
+    path = applied_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"theme": theme, "themes_dir": themes_dir}))
+    os.replace(tmp, path)
 
-    # Write atomically
-    tmp_path = config_path.with_suffix(".tmp")
+
+def is_applied(theme: str, themes_dir: str) -> bool:
+    """Whether the last successful ``chezmoi apply`` used this theme data."""
     try:
-        with open(tmp_path, "wb") as f:
-            tomli_w.dump(data, f)
-        tmp_path.replace(config_path)
-        return True
-    except Exception as e:
-        print(f"Error writing chezmoi config: {e}")
-        if tmp_path.exists():
-            tmp_path.unlink()
+        applied = json.loads(applied_path().read_text())
+    except (OSError, ValueError):
+        return False
+    return applied == {"theme": theme, "themes_dir": themes_dir}
+
+
+def update_chezmoi_data(theme: str, themes_dir: str) -> bool:
+    """Safely update chezmoi.toml [data] section.
+
+    Args:
+        theme: Theme name to set.
+        themes_dir: Directory containing themes.
+
+    Returns:
+        True if successful, False otherwise.
+    """
+    try:
+        set_theme_data(theme, themes_dir)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        _report(e)
         return False
+    return True
+
+
+def _report(error: Exception) -> None:
+    if isinstance(error, tomllib.TOMLDecodeError):
+        print(f"Error: chezmoi.toml has invalid TOML syntax: {error}")
+        print("Please fix the file manually or remove it to start fresh.")
+    elif isinstance(error, PermissionError):
+        print(f"Error: Cannot read chezmoi config (permission denied): {error}")
+    else:
+        print(f"Error updating chezmoi config: {error}")
 
 
 def _main() -> None:
@@ -82,12 +199,30 @@ def _main() -> None:
     parser = argparse.ArgumentParser(description="Update chezmoi configuration")
     parser.add_argument("theme", help="Theme name")
     parser.add_argument("themes_dir", help="Themes directory")
+    parser.add_argument(
+        "--exit-unchanged",
+        type=int,
+        default=0,
+        metavar="CODE",
+        help="Exit with CODE if the data already matched and was applied (nothing to apply)",
+    )
+    parser.add_argument(
+        "--mark-applied",
+        action="store_true",
+        help="Only record that chezmoi apply succeeded with this data",
+    )
 
     args = parser.parse_args()
-    if update_chezmoi_data(args.theme, args.themes_dir):
-        sys.exit(0)
-    else:
+    try:
+        if args.mark_applied:
+            mark_applied(args.theme, args.themes_dir)
+            sys.exit(0)
+        changed = set_theme_data(args.theme, args.themes_dir)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        _report(e)
         sys.exit(1)
+    current = not changed and is_applied(args.theme, args.themes_dir)
+    sys.exit(args.exit_unchanged if current else 0)
 
 
 if __name__ == "__main__":
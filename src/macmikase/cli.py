@@ -7,19 +7,39 @@ combining theme management, configuration, and validation commands.
 from __future__ import annotations
 
 import argparse
+import contextlib
+import json
 import os
+import shlex
+import signal
 import subprocess
 import sys
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from macmikase.chezmoi import update_chezmoi_data
-from macmikase.config import get_value, load_config
-from macmikase.schema import validate_config
-from macmikase.themes import discover_theme_dirs, find_theme_cli, list_themes
+from macmikase.chezmoi import is_applied, mark_applied, read_chezmoi_data, set_theme_data
+from macmikase.osc import emit, palette_sequences, previewing
+from macmikase.palette import load_palette
+from macmikase.paths import data_dir
+from macmikase.themes import (
+    discover_theme_dirs,
+    find_repo_root,
+    find_theme,
+    find_theme_cli,
+    list_themes,
+    primary_theme_dir,
+)
+
+if TYPE_CHECKING:
+    from macmikase.state import ApplyTimer
 
 
 def cmd_theme(args: argparse.Namespace) -> int:
     """Switch to a different theme."""
+    if args.rollback:
+        return cmd_theme_rollback(args)
+
     theme_dirs = discover_theme_dirs()
     if not theme_dirs:
         print("Error: No theme directories found", file=sys.stderr)
@@ -44,17 +64,55 @@ def cmd_theme(args: argparse.Namespace) -> int:
         print(f"Available: {', '.join(available)}")
         return 1
 
+    # Templates read theme files, so a pack applies from the tree it was built from.
+    apply_dir = primary_theme_dir(theme_dirs)
+    if apply_dir is None:
+        print(f"Error: {themes_dir} has no themes directory to apply from", file=sys.stderr)
+        return 1
+
+    from macmikase.snapshots import capture_theme_switch, drop
+    from macmikase.state import ApplyTimer
+
+    timer = ApplyTimer(args.name, previous=read_chezmoi_data().get("theme"))
+
+    # Record what the switch overwrites, for `theme --rollback`
+    with timer.step("snapshot"):
+        try:
+            snapshot = capture_theme_switch(args.name)
+        except OSError as e:
+            snapshot = None
+            print(f"Warning: Could not snapshot current theme files: {e}", file=sys.stderr)
+
     # Update chezmoi configuration
-    if not update_chezmoi_data(args.name, str(themes_dir)):
-        print("Error: Failed to update chezmoi configuration", file=sys.stderr)
+    try:
+        with timer.step("chezmoi-data"):
+            changed = set_theme_data(args.name, str(apply_dir))
+    except (OSError, ValueError) as e:
+        print(f"Error: Failed to update chezmoi configuration: {e}", file=sys.stderr)
+        _record_apply(timer, "failed")
         return 1
+    # Skip chezmoi apply only if the last successful apply used this same data.
+    applied = not changed and is_applied(args.name, str(apply_dir))
+    if snapshot and not changed and (args.no_apply or (applied and not args.reapply)):
+        drop(snapshot.id)
 
-    # Apply chezmoi
-    if not args.no_apply:
+    outcome = "ok"
+    if not args.no_apply and applied and not args.reapply:
+        print(f"Dotfiles already use '{args.name}', skipping chezmoi apply (--reapply to force)")
+        outcome = "unchanged"
+    elif not args.no_apply:
         print("Applying dotfiles...")
-        result = subprocess.run(["chezmoi", "apply", "--force"], capture_output=True, text=True)
+        with timer.step("chezmoi-apply"):
+            result = subprocess.run(["chezmoi", "apply", "--force"], capture_output=True, text=True)
         if result.returncode != 0:
-            print(f"Warning: chezmoi apply failed: {result.stderr}", file=sys.stderr)
+            timer.steps[-1].status = "failed"
+            print(f"Error: chezmoi apply failed: {result.stderr}", file=sys.stderr)
+            _record_apply(timer, "failed")
+            return 1
+        try:
+            mark_applied(args.name, str(apply_dir))
+        except OSError as e:
+            print(f"Warning: Could not record the applied theme: {e}", file=sys.stderr)
 
     print(f"Theme '{args.name}' applied successfully!")
 
@@ -62,14 +120,207 @@ def cmd_theme(args: argparse.Namespace) -> int:
     if not args.no_helpers:
         theme_cli = find_theme_cli()
         if theme_cli:
-            # The shell script handles helper orchestration
-            subprocess.run([theme_cli, args.name, "--no-chezmoi"], check=False)
+            # The shell script handles helper orchestration; this run records the switch.
+            with timer.step("helpers"):
+                helpers = subprocess.run(
+                    [theme_cli, args.name, "--no-chezmoi"],
+                    check=False,
+                    env={**os.environ, "MACMIKASE_NO_HISTORY": "1"},
+                )
+            if helpers.returncode != 0:
+                timer.steps[-1].status = "failed"
+                print("Warning: Some applications were not updated", file=sys.stderr)
+                outcome = "partial"
+
+    _record_apply(timer, outcome)
+    return 0
+
+
+def _record_apply(timer: ApplyTimer, outcome: str) -> None:
+    """Store a switch in the state database; history must never break a switch."""
+    import sqlite3
+
+    try:
+        timer.record(outcome)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Warning: Could not record theme history: {e}", file=sys.stderr)
+
+
+def cmd_theme_rollback(args: argparse.Namespace) -> int:
+    """Restore the files from before the N-th most recent theme switch."""
+    from macmikase.snapshots import rollback
+    from macmikase.state import ApplyTimer
+
+    timer = ApplyTimer("?", previous=read_chezmoi_data().get("theme"), source="rollback")
+    try:
+        with timer.step("restore"):
+            result = rollback(args.rollback)
+    except LookupError as e:
+        print(f"Error: Cannot roll back {args.rollback} switch(es): {e}", file=sys.stderr)
+        return 1
+    except OSError as e:
+        print(f"Error: Rollback failed: {e}", file=sys.stderr)
+        return 1
+    timer.theme = result.snapshot.theme or "?"
+    files = len(result.restored) + len(result.removed)
+    print(
+        f"Rolled back to '{result.snapshot.theme or 'previous state'}': "
+        f"restored {files} file(s) in {timer.steps[0].duration * 1000:.0f} ms"
+    )
+    for name in result.missing:
+        print(f"Warning: Snapshot of {name} is no longer stored", file=sys.stderr)
+
+    if not args.no_helpers and files:
+        from macmikase.terminals import reload_terminals
+
+        with timer.step("terminals"):
+            reload_terminals()
+    _record_apply(timer, "ok" if files else "unchanged")
+    return 0
+
+
+def cmd_history_list(args: argparse.Namespace) -> int:
+    """Show recent theme switches from the state database."""
+    from dataclasses import asdict
+
+    from macmikase.state import history, previous_theme
+
+    if args.previous:
+        theme = previous_theme()
+        if theme is None:
+            return 1
+        print(theme)
+        return 0
+    records = history(args.limit)
+    if args.json:
+        print(json.dumps([asdict(r) for r in records]))
+        return 0
+    if not records:
+        print("No theme switches recorded yet.")
+    for record in records:
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.started))
+        steps = ", ".join(f"{s.name} {s.duration * 1000:.0f}ms" for s in record.steps)
+        print(
+            f"  {started}  {record.previous or '?'} -> {record.theme}  {record.outcome:<9} "
+            f"{record.duration * 1000:>6.0f}ms  [{record.source}] {steps}"
+        )
+    return 0
+
+
+def cmd_history_stats(args: argparse.Namespace) -> int:
+    """Show p50/p95 theme switch time per step."""
+    from macmikase.state import format_stats, step_stats
+
+    stats = step_stats(by_version=args.by_version, last=args.last)
+    if args.json:
+        print(json.dumps(stats))
+    elif not stats:
+        print("No theme switches recorded yet.")
+    else:
+        print(format_stats(stats))
+    return 0
+
 
+def cmd_history_record(args: argparse.Namespace) -> int:
+    """Record a switch timed by a script (macmikase-theme) in the state database."""
+    from macmikase.state import ApplyRecord, Step, last_theme, record_apply
+
+    steps = []
+    for spec in args.step or []:
+        name, _, value = spec.partition("=")
+        seconds, _, status = value.partition(":")
+        try:
+            steps.append(Step(name, float(seconds), status or "ok"))
+        except ValueError:
+            print(f"Error: Invalid --step '{spec}'", file=sys.stderr)
+            return 1
+    duration = args.duration if args.duration is not None else sum(s.duration for s in steps)
+    record = ApplyRecord(
+        theme=args.theme,
+        started=time.time() - duration,
+        duration=duration,
+        outcome=args.outcome,
+        previous=args.from_theme or last_theme(),
+        source=args.source,
+        steps=steps,
+    )
+    record_apply(record)
+    return 0
+
+
+def cmd_snapshots_list(args: argparse.Namespace) -> int:
+    """List recorded theme-switch snapshots, newest first."""
+    from macmikase.snapshots import load_index
+
+    snapshots = list(reversed(load_index()))
+    if args.json:
+        print(json.dumps([vars(s) for s in snapshots]))
+        return 0
+    if not snapshots:
+        print("No snapshots recorded")
+    for n, snapshot in enumerate(snapshots, 1):
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot.created))
+        print(
+            f"  {n:>2}  {created}  {snapshot.theme or '?'} -> {snapshot.to or '?'}  "
+            f"({len(snapshot.files)} files)"
+        )
+    return 0
+
+
+def cmd_snapshots_capture(args: argparse.Namespace) -> int:
+    """Snapshot the files switching to THEME would overwrite; prints the snapshot id."""
+    from macmikase.snapshots import capture_theme_switch
+
+    try:
+        print(capture_theme_switch(args.theme).id)
+    except OSError as e:
+        print(f"Error: Could not snapshot theme files: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_snapshots_drop(args: argparse.Namespace) -> int:
+    """Forget a snapshot, e.g. after a switch that changed nothing."""
+    from macmikase.snapshots import drop
+
+    drop(args.id)
+    return 0
+
+
+def cmd_preview(args: argparse.Namespace) -> int:
+    """Retint the current terminal with a theme's palette, without writing files."""
+    theme_path = find_theme(args.theme)
+    if theme_path is None:
+        print(f"Error: Theme '{args.theme}' not found", file=sys.stderr)
+        return 1
+    palette = load_palette(theme_path)
+    if palette.is_empty:
+        print(f"Error: No terminal palette found for '{args.theme}'", file=sys.stderr)
+        return 1
+
+    if args.keep:
+        if not emit(palette_sequences(palette)):
+            print("Error: No terminal to preview in", file=sys.stderr)
+            return 1
+        print(f"Previewing '{args.theme}' until the terminal is reset (run 'reset').")
+        return 0
+
+    # SIGTERM unwinds through previewing() so the colors are restored.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(143))
+    with previewing(palette) as applied:
+        if not applied:
+            print("Error: No terminal to preview in", file=sys.stderr)
+            return 1
+        print(f"Previewing '{args.theme}'. Press Enter to restore your colors.")
+        with contextlib.suppress(EOFError, KeyboardInterrupt):
+            input()
     return 0
 
 
 def cmd_config(args: argparse.Namespace) -> int:
     """Query configuration values."""
+    from macmikase.config import get_value, load_config
+
     config_path = Path(args.config)
     if not config_path.exists():
         print(f"Error: Config file not found: {config_path}", file=sys.stderr)
@@ -90,6 +341,8 @@ def cmd_config(args: argparse.Namespace) -> int:
 
 def cmd_validate(args: argparse.Namespace) -> int:
     """Validate configuration file."""
+    from macmikase.schema import validate_config
+
     is_valid, errors = validate_config(args.config)
 
     if is_valid:
@@ -115,8 +368,607 @@ def cmd_themes_dir(args: argparse.Namespace) -> int:
         for d in dirs:
             print(d)
     else:
-        print(dirs[0])
+        primary = primary_theme_dir(dirs)
+        if primary is None:
+            print("No theme directories found", file=sys.stderr)
+            return 1
+        print(primary)
+
+    return 0
+
+
+def _print_help(parser: argparse.ArgumentParser) -> int:
+    parser.print_help()
+    return 1
+
+
+def cmd_themes_deploy(args: argparse.Namespace) -> int:
+    """Incrementally deploy the repo themes tree."""
+    from macmikase.deploy import deploy_tree
+    from macmikase.themepack import build_pack, default_pack_path
+    from macmikase.wallpapers import background_filter, ingest_tree
+
+    if args.source:
+        source = Path(args.source)
+    else:
+        repo_root = find_repo_root()
+        if repo_root is None:
+            print("Error: repo themes/ not found; pass --source", file=sys.stderr)
+            return 1
+        source = repo_root / "themes"
+    dest = Path(args.dest) if args.dest else data_dir() / "themes"
+
+    # Backgrounds live in the wallpaper store unless explicitly deployed.
+    exclude = None if args.with_backgrounds else background_filter(source)
+    try:
+        result = deploy_tree(
+            source, dest, hardlink=not args.copy, dry_run=args.dry_run, exclude=exclude
+        )
+        stored = None if exclude is None or args.dry_run else ingest_tree(source)
+        # Keep an existing pack in step with the tree it was built from.
+        pack = default_pack_path(dest)
+        repack = not args.dry_run and (args.pack or (result.changed and pack.exists()))
+        packed = build_pack(dest, pack) if repack else None
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        payload = result.to_dict()
+        if stored is not None:
+            payload["changed"] = result.changed or stored.changed
+            payload["wallpapers"] = {"added": stored.added, "removed": stored.removed}
+        payload["pack"] = str(packed) if packed else None
+        print(json.dumps(payload, indent=2))
+        return 0
+    if args.verbose:
+        for rel in result.written:
+            print(f"  + {rel}")
+        for rel in result.removed:
+            print(f"  - {rel}")
+    prefix = "Would deploy" if args.dry_run else "Deployed"
+    print(f"{prefix} {source} -> {dest}: {result.summary()}")
+    if stored is not None:
+        print(
+            f"Wallpapers: {len(stored.added)} stored, {len(stored.removed)} removed, "
+            f"{len(stored.unchanged)} unchanged"
+        )
+    if packed is not None:
+        print(f"Packed {dest} -> {packed}")
+    return 0
+
+
+def _repo_themes_dir() -> Path | None:
+    repo_root = find_repo_root()
+    if repo_root is not None:
+        return repo_root / "themes"
+    theme_dirs = discover_theme_dirs()
+    return theme_dirs[0] if theme_dirs else None
+
+
+def cmd_themes_audit(args: argparse.Namespace) -> int:
+    """Check contrast, color collisions and light/dark consistency of theme palettes."""
+    try:
+        from macmikase.audit import audit_palettes, format_table, load_inputs
+    except ImportError:
+        print("Error: themes audit needs NumPy (pip install 'macmikase[color]')", file=sys.stderr)
+        return 1
+
+    themes_dir = Path(args.themes_dir) if args.themes_dir else _repo_themes_dir()
+    if themes_dir is None or not themes_dir.is_dir():
+        print("Error: No themes directory found; pass --themes-dir", file=sys.stderr)
+        return 1
+    try:
+        inputs = load_inputs(themes_dir, args.names or None)
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    reports = audit_palettes(
+        inputs,
+        min_text_contrast=args.min_contrast,
+        min_ansi_contrast=args.min_ansi_contrast,
+        min_delta_e=args.min_delta_e,
+    )
+    if args.json:
+        print(json.dumps([report.to_dict() for report in reports], indent=2))
+    else:
+        print(format_table(reports))
+
+    failed = any(report.errors or (args.strict and report.warnings) for report in reports)
+    return 1 if failed else 0
+
+
+def cmd_themes_derive(args: argparse.Namespace) -> int:
+    """Generate light/dark/dim variants of themes."""
+    try:
+        from macmikase.derive import generate_theme
+    except ImportError:
+        print("Error: themes derive needs NumPy (pip install 'macmikase[color]')", file=sys.stderr)
+        return 1
+
+    themes_dir = Path(args.themes_dir) if args.themes_dir else _repo_themes_dir()
+    if themes_dir is None or not themes_dir.is_dir():
+        print("Error: No themes directory found; pass --themes-dir", file=sys.stderr)
+        return 1
+    if args.name and len(args.bases) > 1:
+        print("Error: --name only works with a single base theme", file=sys.stderr)
+        return 1
+
+    failed = False
+    for base in args.bases:
+        base_path = themes_dir / base
+        dest = themes_dir / f"{base}-{args.variant}"
+        if not base_path.is_dir():
+            print(f"Error: Theme '{base}' not found in {themes_dir}", file=sys.stderr)
+            failed = True
+            continue
+        try:
+            generate_theme(base_path, dest, args.variant, name=args.name, force=args.force)
+        except (ValueError, FileExistsError, OSError) as e:
+            print(f"Error: {base}: {e}", file=sys.stderr)
+            failed = True
+            continue
+        print(f"Generated {dest}")
+    return 1 if failed else 0
+
+
+def cmd_themes_extract(args: argparse.Namespace) -> int:
+    """Extract a candidate palette from a wallpaper."""
+    try:
+        from macmikase.extract import extract_palette, write_candidate
+    except ImportError:
+        print(
+            "Error: themes extract needs NumPy and Pillow (pip install 'macmikase[color,images]')",
+            file=sys.stderr,
+        )
+        return 1
+
+    image = Path(args.image).expanduser()
+    if not image.is_file():
+        print(f"Error: {image} not found", file=sys.stderr)
+        return 1
+    try:
+        palette = extract_palette(image, args.colors)
+    except (OSError, ValueError) as e:
+        print(f"Error: {image}: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(palette.colors(), indent=2))
+    else:
+        for slot, color in palette.colors().items():
+            print(f"{slot:<22} {color}")
+
+    if args.output:
+        dest = Path(args.output).expanduser()
+        # Reference the image as the wallpaper when it already lives in the theme.
+        try:
+            wallpaper = str(image.resolve().relative_to(dest.resolve()))
+        except ValueError:
+            wallpaper = None
+        try:
+            written = write_candidate(
+                palette,
+                dest,
+                name=args.name or dest.name.replace("-", " ").title(),
+                wallpaper=wallpaper,
+                force=args.force,
+            )
+        except (FileExistsError, OSError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        for path in written:
+            print(f"Wrote {path}", file=sys.stderr if args.json else sys.stdout)
+    return 0
+
+
+def cmd_themes_pack(args: argparse.Namespace) -> int:
+    """Pack a themes tree into a single indexed archive."""
+    from macmikase.themepack import build_pack
+
+    if args.themes_dir:
+        themes_dir = Path(args.themes_dir)
+    else:
+        installed = data_dir() / "themes"
+        themes_dir = installed if installed.is_dir() else _repo_themes_dir()
+    if themes_dir is None or not themes_dir.is_dir():
+        print("Error: No themes directory found; pass --themes-dir", file=sys.stderr)
+        return 1
+    try:
+        dest = build_pack(themes_dir, Path(args.output) if args.output else None)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    count = len(list_themes(dest))
+    print(f"Packed {count} themes from {themes_dir} -> {dest} ({dest.stat().st_size} bytes)")
+    return 0
+
+
+def _csv(value: str) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def cmd_editors_apply(args: argparse.Namespace) -> int:
+    """Set a theme's editor color theme in every detected VS Code fork."""
+    from macmikase.editors import EDITOR_KEYS, apply_color_theme, read_cursor_theme
+
+    unknown = sorted(set(args.only or []) - set(EDITOR_KEYS))
+    if unknown:
+        print(f"Error: Unknown editor(s): {', '.join(unknown)}", file=sys.stderr)
+        return 1
+    theme_path = Path(args.themes_dir) / args.theme if args.themes_dir else find_theme(args.theme)
+    if theme_path is None or not theme_path.is_dir():
+        print(f"Error: Theme '{args.theme}' not found", file=sys.stderr)
+        return 1
+    try:
+        color_theme, _extension = read_cursor_theme(theme_path)
+    except FileNotFoundError:
+        if not args.quiet:
+            print(f"No cursor.json found for theme '{args.theme}', skipping editor configuration")
+        return 0
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error: {theme_path / 'cursor.json'}: {e}", file=sys.stderr)
+        return 1
+    if not color_theme:
+        print(f"Error: No colorTheme found in {theme_path / 'cursor.json'}", file=sys.stderr)
+        return 1
+
+    results = apply_color_theme(color_theme, args.only)
+    if args.json:
+        print(json.dumps({"colorTheme": color_theme, "editors": [vars(r) for r in results]}))
+    elif not args.quiet:
+        for result in results:
+            if result.status == "updated":
+                print(f"  - Updated {result.editor} settings")
+            elif result.status == "unchanged":
+                print(f"  - {result.editor} already uses {color_theme}")
+    for result in results:
+        if result.status == "error":
+            print(f"Error: {result.editor}: {result.message}", file=sys.stderr)
+    return 1 if any(result.status == "error" for result in results) else 0
+
+
+def cmd_editors_extensions(args: argparse.Namespace) -> int:
+    """Install, diff, list or export editor extensions without per-extension CLI calls."""
+    from macmikase.editors import EDITOR_KEYS, selected_editors
+    from macmikase.extensions import (
+        export_list,
+        install,
+        installed_extensions,
+        list_path,
+        missing_extensions,
+        read_list,
+    )
+
+    unknown = sorted(set(args.only or []) - set(EDITOR_KEYS))
+    if unknown:
+        print(f"Error: Unknown editor(s): {', '.join(unknown)}", file=sys.stderr)
+        return 1
+    editors = selected_editors(args.only)
+    if not editors:
+        print("Error: No supported editor found", file=sys.stderr)
+        return 1
+    file = Path(args.file).expanduser() if args.file else None
+
+    if args.action == "export":
+        targets = [(editors[0], file)] if file else [(e, list_path(e)) for e in editors]
+        for editor, path in targets:
+            count = len(export_list(editor, path))
+            if not args.quiet:
+                print(f"Exported {count} {editor.name} extensions to {path}")
+        return 0
+
+    lists = {}
+    for editor in editors:
+        path = file or list_path(editor)
+        if args.extension:
+            lists[editor] = args.extension
+        elif path.is_file():
+            lists[editor] = read_list(path)
+        elif file:
+            print(f"Error: Extensions file not found: {path}", file=sys.stderr)
+            return 1
+    if not lists:
+        print("Error: No extensions.txt found; run 'export' first", file=sys.stderr)
+        return 1
+
+    if args.action == "list":
+        payload = {e.name: wanted for e, wanted in lists.items()}
+        if args.json:
+            print(json.dumps(payload))
+        else:
+            for name, wanted in payload.items():
+                print(f"{name}:")
+                for ext in wanted:
+                    print(f"  {ext}")
+        return 0
+
+    if args.action == "diff":
+        diff = {}
+        for editor, wanted in lists.items():
+            installed = installed_extensions(editor)
+            diff[editor.name] = {
+                "missing": missing_extensions(wanted, installed),
+                "extra": missing_extensions(installed, wanted),
+            }
+        if args.json:
+            print(json.dumps(diff))
+        else:
+            for name, entry in diff.items():
+                print(f"{name}:")
+                for ext in entry["missing"]:
+                    print(f"  + {ext}")
+                for ext in entry["extra"]:
+                    print(f"  - {ext}")
+        return 0
+
+    results = install(lists)
+    if args.json:
+        print(json.dumps({"editors": [vars(r) for r in results]}))
+    elif not args.quiet:
+        for result in results:
+            if result.installed:
+                print(f"  - {result.editor}: installed {', '.join(result.installed)}")
+            elif result.status == "unchanged":
+                print(f"  - {result.editor}: all extensions installed")
+    for result in results:
+        if result.status == "error":
+            print(
+                f"Error: {result.editor}: failed {', '.join(result.failed)} ({result.message})",
+                file=sys.stderr,
+            )
+    return 1 if any(result.status == "error" for result in results) else 0
+
+
+def cmd_terminals_reload(args: argparse.Namespace) -> int:
+    """Reload running terminal emulators from one process-table snapshot."""
+    from macmikase.terminals import reload_terminals
+
+    results = reload_terminals()
+    if args.json:
+        print(json.dumps({"terminals": [vars(r) for r in results]}))
+    elif not args.quiet:
+        for result in results:
+            if result.status == "not running":
+                print(f"  - {result.terminal} not running")
+            else:
+                pids = ", ".join(str(pid) for pid in result.pids)
+                print(f"  - {result.terminal} ({pids}): {result.status}, {result.message}")
+    return 1 if any(result.status == "failed" for result in results) else 0
+
+
+def cmd_shell_cache_refresh(args: argparse.Namespace) -> int:
+    """Regenerate cached shell init snippets whose binary changed."""
+    from macmikase.shellcache import refresh
+
+    results = refresh(force=args.force)
+    if args.json:
+        print(json.dumps({"snippets": [vars(r) for r in results]}))
+    elif not args.quiet:
+        for result in results:
+            detail = f" ({result.message})" if result.message else ""
+            print(f"  - {result.name}: {result.status}{detail}")
+    return 1 if any(result.status == "failed" for result in results) else 0
+
+
+def _refresh_shell_cache() -> None:
+    """Refresh the shell init cache after tools may have been upgraded."""
+    from macmikase.shellcache import refresh
+
+    try:
+        results = refresh()
+    except OSError as e:
+        print(f"Warning: could not refresh the shell init cache: {e}", file=sys.stderr)
+        return
+    generated = [r.name for r in results if r.status == "generated"]
+    if generated:
+        print(f"==> Refreshed shell init cache: {', '.join(generated)}")
+    for result in results:
+        if result.status == "failed":
+            print(f"Warning: shell init cache: {result.name}: {result.message}", file=sys.stderr)
+
+
+def cmd_shell_profile(args: argparse.Namespace) -> int:
+    """Profile interactive shell startup per line and per file."""
+    from macmikase.shellprofile import format_profile, profile
+
+    rcfile = Path(args.rcfile).expanduser() if args.rcfile else None
+    try:
+        result = profile(args.shell, args.runs, warmup=args.warmup, rcfile=rcfile)
+    except (ValueError, OSError, TimeoutError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        lines = [vars(c) for c in result.lines if c.managed or args.all]
+        print(
+            json.dumps(
+                {
+                    "shell": result.shell,
+                    "median": result.median,
+                    "walls": result.walls,
+                    "files": [vars(f) for f in result.files],
+                    "lines": lines,
+                },
+                indent=2,
+            )
+        )
+    else:
+        print(format_profile(result, args.limit, managed_only=not args.all))
+    if args.budget is not None and result.median * 1000 > args.budget:
+        print(
+            f"Error: median startup {result.median * 1000:.0f}ms exceeds {args.budget}ms",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+def cmd_watch(args: argparse.Namespace) -> int:
+    """Watch the themes tree; sync edits and re-apply the active theme."""
+    from macmikase.watch import ThemeWatcher
+
+    themes_dir = Path(args.themes_dir) if args.themes_dir else _repo_themes_dir()
+    if themes_dir is None or not themes_dir.is_dir():
+        print("Error: No themes directory found; pass --themes-dir", file=sys.stderr)
+        return 1
+    watcher = ThemeWatcher(themes_dir, apply=not args.no_apply)
+    with contextlib.suppress(KeyboardInterrupt):
+        watcher.run(debounce=args.debounce / 1000, poll=args.poll)
+    return 0
+
+
+def cmd_update(args: argparse.Namespace) -> int:
+    """Update package managers concurrently."""
+    from macmikase.update import (
+        LANES,
+        format_results,
+        format_summary,
+        load_history,
+        record_history,
+        run_updates,
+        select_lanes,
+        summarize_history,
+    )
+
+    if args.report:
+        summary = summarize_history(load_history())
+        if not summary:
+            print("No update history recorded yet.")
+            return 0
+        print(format_summary(summary))
+        return 0
+
+    try:
+        lanes = select_lanes(LANES, args.only, args.skip)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.list:
+        for lane in lanes:
+            lock = f" (serialised with: {lane.lock})" if lane.lock else ""
+            print(f"  {lane.name:<10} {lane.description}{lock}")
+        return 0
 
+    print("==> Starting macmikase system update...")
+    results = run_updates(lanes, jobs=args.jobs)
+    if not args.no_history:
+        record_history(results)
+    _refresh_shell_cache()
+
+    print("")
+    print("==> Lane timings:")
+    print(format_results(results))
+    if any(r.status == "failed" for r in results):
+        print("==> Update finished with failures.", file=sys.stderr)
+        return 1
+    print("==> Update complete!")
+    return 0
+
+
+def _load_install_config(config_path: Path) -> dict[str, object] | None:
+    from macmikase.install import config_sections
+
+    if not config_path.exists():
+        print(f"Error: Config file not found: {config_path}", file=sys.stderr)
+        return None
+    try:
+        return config_sections(config_path)
+    except Exception as e:
+        print(f"✗ Configuration errors in {config_path}:", file=sys.stderr)
+        print(f"  {e}", file=sys.stderr)
+        return None
+
+
+def cmd_install(args: argparse.Namespace) -> int:
+    """Run the install playbook, optionally limited to changed config sections."""
+    from macmikase.install import (
+        changed_sections,
+        load_snapshot,
+        playbook_command,
+        save_snapshot,
+        tags_for_sections,
+    )
+
+    config_path = Path(args.config).resolve()
+    sections = _load_install_config(config_path)
+    if sections is None:
+        return 1
+
+    tags: list[str] | None = None
+    if args.changed:
+        previous = load_snapshot()
+        if previous is None:
+            print("No successful install recorded yet; running the full playbook.")
+        else:
+            changed = changed_sections(previous, sections)
+            if not changed:
+                print("Configuration unchanged since the last successful install.")
+                return 0
+            print(f"Changed sections: {', '.join(changed)}")
+            tags = tags_for_sections(changed)
+            if tags == []:
+                print("No install steps depend on these sections.")
+                if not args.dry_run:
+                    save_snapshot(sections, config_path)
+                return 0
+
+    repo_root = find_repo_root()
+    if repo_root is None or not (repo_root / "ansible" / "playbook.yml").is_file():
+        print("Error: ansible/playbook.yml not found; run from the repo", file=sys.stderr)
+        return 1
+
+    cmd = playbook_command(config_path, tags)
+    print(f"Tags: {', '.join(tags) if tags else 'all'}")
+    if args.dry_run:
+        print(shlex.join(cmd))
+        return 0
+
+    result = subprocess.run(cmd, cwd=repo_root / "ansible", check=False)
+    if result.returncode == 0:
+        save_snapshot(sections, config_path)
+        _refresh_shell_cache()
+    return result.returncode
+
+
+def cmd_install_snapshot(args: argparse.Namespace) -> int:
+    """Record the current config as successfully installed."""
+    from macmikase.install import save_snapshot
+
+    config_path = Path(args.config).resolve()
+    sections = _load_install_config(config_path)
+    if sections is None:
+        return 1
+    path = save_snapshot(sections, config_path)
+    if not args.quiet:
+        print(f"Recorded install snapshot: {path}")
+    return 0
+
+
+def cmd_install_report(args: argparse.Namespace) -> int:
+    """Rank the slowest install tasks across recorded runs."""
+    from macmikase.install import (
+        format_report,
+        load_events,
+        phase_timings,
+        recent_runs,
+        task_timings,
+    )
+
+    events = load_events()
+    runs = recent_runs(events, args.runs)
+    if not runs:
+        print("No install runs recorded yet.")
+        return 0
+
+    tasks = task_timings(events, runs)[: args.limit]
+    phases = phase_timings(events, runs)
+    if args.json:
+        print(json.dumps({"runs": len(runs), "phases": phases, "tasks": tasks}, indent=2))
+    else:
+        print(format_report(tasks, phases, len(runs)))
     return 0
 
 
@@ -133,9 +985,82 @@ def main(argv: list[str] | None = None) -> int:
     theme_parser.add_argument("name", nargs="?", help="Theme name to apply")
     theme_parser.add_argument("--list", "-l", action="store_true", help="List available themes")
     theme_parser.add_argument("--no-apply", action="store_true", help="Skip chezmoi apply")
+    theme_parser.add_argument(
+        "--reapply", action="store_true", help="Run chezmoi apply even if the theme is already set"
+    )
+    theme_parser.add_argument(
+        "--rollback",
+        nargs="?",
+        type=int,
+        const=1,
+        metavar="N",
+        help="Restore the files from before the Nth most recent switch (default: 1)",
+    )
     theme_parser.add_argument("--no-helpers", action="store_true", help="Skip helper scripts")
     theme_parser.set_defaults(func=cmd_theme)
 
+    # preview command
+    preview_parser = subparsers.add_parser(
+        "preview", help="Retint the terminal with a theme's palette, without writing files"
+    )
+    preview_parser.add_argument("theme", help="Theme to preview")
+    preview_parser.add_argument(
+        "--keep", action="store_true", help="Keep the colors until the terminal is reset"
+    )
+    preview_parser.set_defaults(func=cmd_preview)
+
+    # history command group
+    history_group = subparsers.add_parser("history", help="Theme switch history and timings")
+    history_sub = history_group.add_subparsers(dest="history_command")
+    history_list = history_sub.add_parser("list", help="Show recent theme switches")
+    history_list.add_argument(
+        "--limit", "-n", type=int, default=20, help="Number of switches to show"
+    )
+    history_list.add_argument(
+        "--previous", action="store_true", help="Print the previous theme only"
+    )
+    history_list.add_argument("--json", action="store_true", help="Output as JSON")
+    history_list.set_defaults(func=cmd_history_list)
+    history_stats = history_sub.add_parser("stats", help="Show p50/p95 switch time per step")
+    history_stats.add_argument(
+        "--last", type=int, metavar="N", help="Only the N most recent switches"
+    )
+    history_stats.add_argument(
+        "--by-version", action="store_true", help="Group by macmikase version"
+    )
+    history_stats.add_argument("--json", action="store_true", help="Output as JSON")
+    history_stats.set_defaults(func=cmd_history_stats)
+    # Used by macmikase-theme to record the switches it times.
+    history_record = history_sub.add_parser("record", help="Record a switch timed by a script")
+    history_record.add_argument("theme", help="Theme that was applied")
+    history_record.add_argument(
+        "--step", action="append", metavar="NAME=SECONDS[:STATUS]", help="A timed step"
+    )
+    history_record.add_argument("--outcome", default="ok", help="ok, partial, failed, unchanged")
+    history_record.add_argument("--source", default="shell", help="Where the switch came from")
+    history_record.add_argument("--duration", type=float, help="Total seconds (default: steps)")
+    history_record.add_argument("--from", dest="from_theme", help="Previous theme")
+    history_record.set_defaults(func=cmd_history_record)
+    history_group.set_defaults(func=lambda _args: _print_help(history_group))
+
+    # snapshots command group
+    snapshots_group = subparsers.add_parser(
+        "snapshots", help="Inspect theme-switch snapshots used by theme --rollback"
+    )
+    snapshots_sub = snapshots_group.add_subparsers(dest="snapshots_command")
+    snapshots_list = snapshots_sub.add_parser("list", help="List snapshots, newest first")
+    snapshots_list.add_argument("--json", action="store_true", help="Output as JSON")
+    snapshots_list.set_defaults(func=cmd_snapshots_list)
+    snapshots_capture = snapshots_sub.add_parser(
+        "capture", help="Snapshot the files a switch to THEME overwrites"
+    )
+    snapshots_capture.add_argument("theme", help="Theme about to be applied")
+    snapshots_capture.set_defaults(func=cmd_snapshots_capture)
+    snapshots_drop = snapshots_sub.add_parser("drop", help="Forget a snapshot")
+    snapshots_drop.add_argument("id", type=int, help="Snapshot id (from capture)")
+    snapshots_drop.set_defaults(func=cmd_snapshots_drop)
+    snapshots_group.set_defaults(func=lambda _args: _print_help(snapshots_group))
+
     # config command
     config_parser = subparsers.add_parser("config", help="Query configuration")
     default_config = os.environ.get("MACMIKASE_CONFIG", "macmikase.yaml")
@@ -159,6 +1084,251 @@ def main(argv: list[str] | None = None) -> int:
     themes_parser.add_argument("--all", "-a", action="store_true", help="Show all directories")
     themes_parser.set_defaults(func=cmd_themes_dir)
 
+    # themes command group
+    themes_group = subparsers.add_parser("themes", help="Manage the installed themes tree")
+    themes_sub = themes_group.add_subparsers(dest="themes_command")
+    deploy_parser = themes_sub.add_parser(
+        "deploy", help="Copy changed theme files to ~/.local/share/macmikase/themes"
+    )
+    deploy_parser.add_argument("--source", help="Themes tree to deploy (default: repo themes/)")
+    deploy_parser.add_argument(
+        "--dest", help="Destination (default: ~/.local/share/macmikase/themes)"
+    )
+    deploy_parser.add_argument(
+        "--copy", action="store_true", help="Never hard-link; clone or copy instead"
+    )
+    deploy_parser.add_argument(
+        "--with-backgrounds",
+        action="store_true",
+        help="Also deploy backgrounds/ instead of only storing each theme's wallpaper",
+    )
+    deploy_parser.add_argument(
+        "--dry-run", "-n", action="store_true", help="Report changes without writing"
+    )
+    deploy_parser.add_argument("--verbose", "-v", action="store_true", help="List changed files")
+    deploy_parser.add_argument(
+        "--pack", action="store_true", help="Also (re)build the destination's theme pack"
+    )
+    deploy_parser.add_argument("--json", action="store_true", help="Output as JSON")
+    deploy_parser.set_defaults(func=cmd_themes_deploy)
+    audit_parser = themes_sub.add_parser(
+        "audit", help="Check palette contrast, collisions and light/dark consistency"
+    )
+    audit_parser.add_argument("names", nargs="*", help="Themes to audit (default: all)")
+    audit_parser.add_argument("--themes-dir", help="Themes tree to audit (default: repo themes/)")
+    audit_parser.add_argument(
+        "--min-contrast", type=float, default=4.5, help="Minimum foreground contrast (4.5)"
+    )
+    audit_parser.add_argument(
+        "--min-ansi-contrast", type=float, default=3.0, help="Minimum ANSI contrast (3.0)"
+    )
+    audit_parser.add_argument(
+        "--min-delta-e", type=float, default=0.03, help="Minimum OKLab ΔE between hues (0.03)"
+    )
+    audit_parser.add_argument("--strict", action="store_true", help="Fail on warnings too")
+    audit_parser.add_argument("--json", action="store_true", help="Output as JSON")
+    audit_parser.set_defaults(func=cmd_themes_audit)
+    derive_parser = themes_sub.add_parser(
+        "derive", help="Generate light/dark/dim variants of themes in OKLCH"
+    )
+    derive_parser.add_argument("bases", nargs="+", help="Base theme(s) to derive from")
+    derive_parser.add_argument(
+        "--variant", "-V", choices=["light", "dark", "dim"], required=True, help="Variant"
+    )
+    derive_parser.add_argument("--name", help="Display name (default: '<Base> <Variant>')")
+    derive_parser.add_argument("--themes-dir", help="Themes tree (default: repo themes/)")
+    derive_parser.add_argument(
+        "--force", "-f", action="store_true", help="Overwrite an existing variant"
+    )
+    derive_parser.set_defaults(func=cmd_themes_derive)
+    extract_parser = themes_sub.add_parser(
+        "extract", help="Extract a candidate palette from a wallpaper (k-means in OKLab)"
+    )
+    extract_parser.add_argument("image", help="Wallpaper image")
+    extract_parser.add_argument(
+        "--output", "-o", help="Theme directory to write cursor.json and theme.yaml into"
+    )
+    extract_parser.add_argument("--name", help="Display name (default: from --output)")
+    extract_parser.add_argument(
+        "--colors", "-k", type=int, default=12, help="Number of color clusters (12)"
+    )
+    extract_parser.add_argument(
+        "--force", "-f", action="store_true", help="Overwrite existing candidate files"
+    )
+    extract_parser.add_argument("--json", action="store_true", help="Output as JSON")
+    extract_parser.set_defaults(func=cmd_themes_extract)
+    pack_parser = themes_sub.add_parser(
+        "pack", help="Pack a themes tree into one indexed archive for fast listing"
+    )
+    pack_parser.add_argument(
+        "--themes-dir", help="Themes tree (default: installed themes, else repo themes/)"
+    )
+    pack_parser.add_argument("--output", "-o", help="Pack file (default: <themes-dir>.mmkpack)")
+    pack_parser.set_defaults(func=cmd_themes_pack)
+    themes_group.set_defaults(func=lambda _args: _print_help(themes_group))
+
+    # editors command group
+    editors_group = subparsers.add_parser("editors", help="Configure VS Code-based editors")
+    editors_sub = editors_group.add_subparsers(dest="editors_command")
+    editors_apply = editors_sub.add_parser(
+        "apply", help="Set a theme's colorTheme in Cursor, VS Code and Antigravity settings"
+    )
+    editors_apply.add_argument("theme", help="Theme name")
+    editors_apply.add_argument("--themes-dir", help="Themes directory (default: discovered)")
+    editors_apply.add_argument(
+        "--only",
+        type=_csv,
+        action="extend",
+        metavar="EDITORS",
+        help="Comma-separated editors to update (cursor, code, antigravity)",
+    )
+    editors_apply.add_argument("--quiet", "-q", action="store_true", help="Suppress output")
+    editors_apply.add_argument("--json", action="store_true", help="Output as JSON")
+    editors_apply.set_defaults(func=cmd_editors_apply)
+
+    editors_ext = editors_sub.add_parser(
+        "extensions",
+        help="Install extensions from extensions.txt, one CLI call per editor",
+    )
+    editors_ext.add_argument("action", choices=["install", "diff", "list", "export"])
+    editors_ext.add_argument(
+        "-f",
+        "--file",
+        help="Extensions list (default: each editor's extensions.txt)",
+    )
+    editors_ext.add_argument(
+        "--extension",
+        action="append",
+        metavar="ID",
+        help="Extension to use instead of a list (repeatable)",
+    )
+    editors_ext.add_argument(
+        "--only",
+        type=_csv,
+        action="extend",
+        metavar="EDITORS",
+        help="Comma-separated editors (cursor, code, antigravity)",
+    )
+    editors_ext.add_argument("--quiet", "-q", action="store_true", help="Suppress output")
+    editors_ext.add_argument("--json", action="store_true", help="Output as JSON")
+    editors_ext.set_defaults(func=cmd_editors_extensions)
+    editors_group.set_defaults(func=lambda _args: _print_help(editors_group))
+
+    # terminals command group
+    terminals_group = subparsers.add_parser("terminals", help="Reload terminal emulators")
+    terminals_sub = terminals_group.add_subparsers(dest="terminals_command")
+    terminals_reload = terminals_sub.add_parser(
+        "reload", help="Signal running kitty/Ghostty; report alacritty, WezTerm and foot"
+    )
+    terminals_reload.add_argument("--quiet", "-q", action="store_true", help="Suppress output")
+    terminals_reload.add_argument("--json", action="store_true", help="Output as JSON")
+    terminals_reload.set_defaults(func=cmd_terminals_reload)
+    terminals_group.set_defaults(func=lambda _args: _print_help(terminals_group))
+
+    # shell-cache command group
+    shell_cache_group = subparsers.add_parser(
+        "shell-cache", help="Pre-generated shell init snippets (brew, zoxide, direnv, starship)"
+    )
+    shell_cache_sub = shell_cache_group.add_subparsers(dest="shell_cache_command")
+    shell_cache_refresh = shell_cache_sub.add_parser(
+        "refresh", help="Regenerate the snippets whose binary changed"
+    )
+    shell_cache_refresh.add_argument(
+        "--force", "-f", action="store_true", help="Regenerate every snippet"
+    )
+    shell_cache_refresh.add_argument("--quiet", "-q", action="store_true", help="Suppress output")
+    shell_cache_refresh.add_argument("--json", action="store_true", help="Output as JSON")
+    shell_cache_refresh.set_defaults(func=cmd_shell_cache_refresh)
+    shell_cache_group.set_defaults(func=lambda _args: _print_help(shell_cache_group))
+
+    # shell-profile command
+    shell_profile = subparsers.add_parser(
+        "shell-profile", help="Time interactive shell startup per line and per file"
+    )
+    shell_profile.add_argument("--shell", help="bash, zsh or a path to one (default: $SHELL)")
+    shell_profile.add_argument(
+        "--runs", "-n", type=int, default=5, help="Measured shell starts (5)"
+    )
+    shell_profile.add_argument("--warmup", type=int, default=1, help="Unmeasured starts first (1)")
+    shell_profile.add_argument(
+        "--rcfile", help="Profile this file instead of ~/.bashrc (zsh: its directory's .zshrc)"
+    )
+    shell_profile.add_argument("--limit", type=int, default=15, help="Rows per table (15)")
+    shell_profile.add_argument(
+        "--all", action="store_true", help="Rank lines of every file, not just managed dotfiles"
+    )
+    shell_profile.add_argument(
+        "--budget", type=int, metavar="MS", help="Exit 1 if the median startup exceeds MS"
+    )
+    shell_profile.add_argument("--json", action="store_true", help="Output as JSON")
+    shell_profile.set_defaults(func=cmd_shell_profile)
+
+    # watch command
+    watch_parser = subparsers.add_parser(
+        "watch", help="Sync theme edits and re-apply the active theme as files change"
+    )
+    watch_parser.add_argument("--themes-dir", help="Themes tree to watch (default: repo themes/)")
+    watch_parser.add_argument(
+        "--debounce", type=int, default=150, metavar="MS", help="Quiet time before acting (150)"
+    )
+    watch_parser.add_argument(
+        "--poll", action="store_true", help="Poll with stat instead of using inotify"
+    )
+    watch_parser.add_argument(
+        "--no-apply", action="store_true", help="Only sync and deploy; do not re-apply"
+    )
+    watch_parser.set_defaults(func=cmd_watch)
+
+    # update command
+    update_parser = subparsers.add_parser("update", help="Update package managers")
+    update_parser.add_argument(
+        "--only",
+        type=_csv,
+        action="extend",
+        metavar="LANES",
+        help="Comma-separated lanes to run (see --list)",
+    )
+    update_parser.add_argument(
+        "--skip", type=_csv, action="extend", metavar="LANES", help="Comma-separated lanes to skip"
+    )
+    update_parser.add_argument("--jobs", "-j", type=int, help="Maximum concurrent lanes")
+    update_parser.add_argument("--list", "-l", action="store_true", help="List lanes and exit")
+    update_parser.add_argument(
+        "--report", action="store_true", help="Show per-lane timing history and exit"
+    )
+    update_parser.add_argument(
+        "--no-history", action="store_true", help="Do not record timings to the history file"
+    )
+    update_parser.set_defaults(func=cmd_update)
+
+    # install command
+    install_parser = subparsers.add_parser("install", help="Run the install playbook")
+    install_parser.add_argument("--config", "-c", default=default_config, help="Config file path")
+    install_parser.add_argument(
+        "--changed",
+        action="store_true",
+        help="Only run steps affected by config changes since the last successful install",
+    )
+    install_parser.add_argument(
+        "--dry-run", "-n", action="store_true", help="Print the planned command and exit"
+    )
+    install_sub = install_parser.add_subparsers(dest="install_command")
+    report_parser = install_sub.add_parser("report", help="Rank the slowest install tasks")
+    report_parser.add_argument(
+        "--limit", "-n", type=int, default=20, help="Number of tasks to show"
+    )
+    report_parser.add_argument(
+        "--runs", type=int, default=None, help="Only include the last N runs"
+    )
+    report_parser.add_argument("--json", action="store_true", help="Output as JSON")
+    report_parser.set_defaults(func=cmd_install_report)
+    snapshot_parser = install_sub.add_parser(
+        "snapshot", help="Record the config as successfully installed"
+    )
+    snapshot_parser.add_argument("--quiet", "-q", action="store_true", help="No output")
+    snapshot_parser.set_defaults(func=cmd_install_snapshot)
+    install_parser.set_defaults(func=cmd_install)
+
     args = parser.parse_args(argv)
 
     if not args.command:
@@ -0,0 +1,131 @@
+"""Vectorised color math on NumPy arrays of sRGB colors.
+
+Colors are ``(..., 3)`` float arrays in ``[0, 1]``; missing colors are NaN and
+propagate through every function, so callers can mask them at the end instead
+of branching per color. Needs NumPy (``pip install 'macmikase[color]'``).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+
+
+def hex_to_rgb(colors: Sequence[str | None]) -> np.ndarray:
+    """``["#rrggbb", None, ...]`` -> ``(N, 3)`` sRGB in ``[0, 1]``, NaN for None."""
+    out = np.full((len(colors), 3), np.nan)
+    for i, color in enumerate(colors):
+        if color:
+            out[i] = [int(color[j : j + 2], 16) for j in (1, 3, 5)]
+    return out / 255.0
+
+
+def srgb_to_linear(rgb: np.ndarray) -> np.ndarray:
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+def relative_luminance(rgb: np.ndarray) -> np.ndarray:
+    """WCAG 2.x relative luminance, shape ``rgb.shape[:-1]``."""
+    return srgb_to_linear(rgb) @ np.array([0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(lum_a: np.ndarray, lum_b: np.ndarray) -> np.ndarray:
+    """WCAG contrast ratio (1-21) between two luminance arrays (broadcasting)."""
+    lighter = np.maximum(lum_a, lum_b)
+    darker = np.minimum(lum_a, lum_b)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+_LMS = np.array(
+    [
+        [0.4122214708, 0.5363325363, 0.0514459929],
+        [0.2119034982, 0.6806995451, 0.1073969566],
+        [0.0883024619, 0.2817188376, 0.6299787005],
+    ]
+)
+_OKLAB = np.array(
+    [
+        [0.2104542553, 0.7936177850, -0.0040720468],
+        [1.9779984951, -2.4285922050, 0.4505937099],
+        [0.0259040371, 0.7827717662, -0.8086757660],
+    ]
+)
+
+
+_LMS_INV = np.linalg.inv(_LMS)
+_OKLAB_INV = np.linalg.inv(_OKLAB)
+
+
+def srgb_to_oklab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB -> OKLab (L in ``[0, 1]``)."""
+    lms = srgb_to_linear(rgb) @ _LMS.T
+    return np.cbrt(lms) @ _OKLAB.T
+
+
+def pairwise_delta_e(lab: np.ndarray) -> np.ndarray:
+    """Euclidean OKLab distance between every pair: ``(..., N, 3)`` -> ``(..., N, N)``."""
+    diff = lab[..., :, None, :] - lab[..., None, :, :]
+    return np.sqrt((diff**2).sum(axis=-1))
+
+
+def linear_to_srgb(linear: np.ndarray) -> np.ndarray:
+    linear = np.clip(linear, 0.0, None)
+    return np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+
+
+def oklab_to_linear(lab: np.ndarray) -> np.ndarray:
+    return (lab @ _OKLAB_INV.T) ** 3 @ _LMS_INV.T
+
+
+def oklab_to_srgb(lab: np.ndarray) -> np.ndarray:
+    """OKLab -> sRGB; out-of-gamut values are not clipped (see ``in_gamut``)."""
+    return linear_to_srgb(oklab_to_linear(lab))
+
+
+def oklab_to_oklch(lab: np.ndarray) -> np.ndarray:
+    chroma = np.hypot(lab[..., 1], lab[..., 2])
+    hue = np.arctan2(lab[..., 2], lab[..., 1])
+    return np.stack([lab[..., 0], chroma, hue], axis=-1)
+
+
+def oklch_to_oklab(lch: np.ndarray) -> np.ndarray:
+    return np.stack(
+        [lch[..., 0], lch[..., 1] * np.cos(lch[..., 2]), lch[..., 1] * np.sin(lch[..., 2])],
+        axis=-1,
+    )
+
+
+def in_gamut(lab: np.ndarray, eps: float = 1e-4) -> np.ndarray:
+    linear = oklab_to_linear(lab)
+    return ((linear >= -eps) & (linear <= 1 + eps)).all(axis=-1)
+
+
+def oklch_to_srgb(lch: np.ndarray, steps: int = 16) -> np.ndarray:
+    """OKLCH -> sRGB, reducing chroma (by bisection) until each color fits the gamut."""
+    lch = lch.copy()
+    lch[..., 0] = np.clip(lch[..., 0], 0.0, 1.0)
+    low = np.zeros(lch.shape[:-1])
+    high = lch[..., 1].copy()
+    fits = in_gamut(oklch_to_oklab(lch))
+    for _ in range(steps):
+        mid = (low + high) / 2
+        trial = lch.copy()
+        trial[..., 1] = mid
+        ok = in_gamut(oklch_to_oklab(trial))
+        low = np.where(ok, mid, low)
+        high = np.where(ok, high, mid)
+    lch[..., 1] = np.where(fits, lch[..., 1], low)
+    return np.clip(oklab_to_srgb(oklch_to_oklab(lch)), 0.0, 1.0)
+
+
+def rgb_to_hex(rgb: np.ndarray) -> list[str | None]:
+    """``(N, 3)`` sRGB -> ``["#rrggbb", ...]``; NaN rows become None."""
+    out: list[str | None] = []
+    for row in np.asarray(rgb).reshape(-1, 3):
+        if np.isnan(row).any():
+            out.append(None)
+        else:
+            r, g, b = np.rint(np.clip(row, 0, 1) * 255).astype(int)
+            out.append(f"#{r:02x}{g:02x}{b:02x}")
+    return out
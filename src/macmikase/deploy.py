@@ -0,0 +1,243 @@
+"""Incremental, content-addressed deployment of the themes tree.
+
+``deploy_tree`` mirrors a source directory (the repo's ``themes/``) into a
+destination (``~/.local/share/macmikase/themes``). A manifest in the
+destination records each deployed file's size, mtime and SHA-256, so an
+unchanged repo is re-deployed with nothing but ``stat`` calls. Changed files
+are cloned (APFS ``clonefile``/Linux ``FICLONE``), hard-linked or copied into a
+temporary name and atomically renamed into place. Files that were deployed
+previously but no longer exist in the source are removed; anything else in the
+destination is left alone.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import hashlib
+import json
+import os
+import shutil
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+MANIFEST_NAME = ".macmikase-manifest.json"
+MANIFEST_VERSION = 1
+
+# _IOW(0x94, 9, int) from linux/fs.h
+_FICLONE = 0x40049409
+
+
+@dataclass
+class DeployResult:
+    """Per-file outcome of a deployment, as paths relative to the source."""
+
+    cloned: list[str] = field(default_factory=list)
+    linked: list[str] = field(default_factory=list)
+    copied: list[str] = field(default_factory=list)
+    touched: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def written(self) -> list[str]:
+        return self.cloned + self.linked + self.copied
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.written or self.removed)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.written)} updated ({len(self.cloned)} cloned, {len(self.linked)} linked, "
+            f"{len(self.copied)} copied), {len(self.removed)} removed, "
+            f"{len(self.touched)} retimed, {self.unchanged} unchanged"
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "changed": self.changed,
+            "cloned": self.cloned,
+            "linked": self.linked,
+            "copied": self.copied,
+            "touched": self.touched,
+            "removed": self.removed,
+            "unchanged": self.unchanged,
+        }
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_manifest(dest: Path) -> dict[str, dict]:
+    """Return the ``files`` table of the destination manifest, or {}."""
+    try:
+        data = json.loads((dest / MANIFEST_NAME).read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    files = data.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def _write_manifest(dest: Path, source: Path, files: dict[str, dict]) -> None:
+    path = dest / MANIFEST_NAME
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    payload = {"version": MANIFEST_VERSION, "source": str(source), "files": files}
+    tmp.write_text(json.dumps(payload, indent=1, sort_keys=True) + "\n")
+    os.replace(tmp, path)
+
+
+def _source_files(source: Path, exclude: Callable[[str], bool] | None) -> dict[str, Path]:
+    files = {}
+    for root, dirs, names in os.walk(source):
+        dirs.sort()
+        for name in sorted(names):
+            path = Path(root) / name
+            if name == MANIFEST_NAME or not path.is_file():
+                continue
+            rel = path.relative_to(source).as_posix()
+            if exclude is None or not exclude(rel):
+                files[rel] = path
+    return files
+
+
+def _clone(src: Path, dst: Path) -> bool:
+    """Copy-on-write clone ``src`` to the not-yet-existing ``dst``."""
+    if sys.platform == "darwin":
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            return libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+        except (OSError, AttributeError):
+            return False
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        try:
+            with open(src, "rb") as s, open(dst, "wb") as d:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        except OSError:
+            dst.unlink(missing_ok=True)
+            return False
+        return True
+    return False
+
+
+def place_file(src: Path, dst: Path, *, hardlink: bool = True) -> str:
+    """Place ``src`` at ``dst`` atomically, returning how it was written."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        if _clone(src, tmp):
+            method = "cloned"
+            shutil.copystat(src, tmp)
+        else:
+            method = "copied"
+            if hardlink:
+                try:
+                    os.link(src, tmp)
+                    method = "linked"
+                except OSError:
+                    pass
+            if method == "copied":
+                shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return method
+
+
+def _dest_matches(dst: Path, entry: dict) -> bool:
+    try:
+        st = dst.stat()
+    except OSError:
+        return False
+    return st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns")
+
+
+def deploy_tree(
+    source: Path,
+    dest: Path,
+    *,
+    hardlink: bool = True,
+    dry_run: bool = False,
+    exclude: Callable[[str], bool] | None = None,
+) -> DeployResult:
+    """Bring ``dest`` in line with ``source``, touching only what changed.
+
+    Args:
+        source: Directory to deploy from.
+        dest: Directory to deploy into (created if missing).
+        hardlink: Fall back to hard links when cloning is unsupported. Copies are
+            used when neither works (e.g. across filesystems).
+        dry_run: Report what would change without writing anything.
+        exclude: Predicate on source-relative POSIX paths to leave out. Excluded
+            files that were deployed before are removed like stale ones.
+
+    Raises:
+        FileNotFoundError: If ``source`` is not a directory.
+    """
+    if not source.is_dir():
+        raise FileNotFoundError(f"Source directory not found: {source}")
+    old = load_manifest(dest)
+    new: dict[str, dict] = {}
+    result = DeployResult()
+
+    for rel, src in _source_files(source, exclude).items():
+        st = src.stat()
+        dst = dest / rel
+        entry = old.get(rel)
+        # Fast path: source stat unchanged and the deployed copy still matches.
+        if (
+            entry is not None
+            and entry.get("size") == st.st_size
+            and entry.get("mtime_ns") == st.st_mtime_ns
+            and _dest_matches(dst, entry)
+        ):
+            new[rel] = entry
+            result.unchanged += 1
+            continue
+
+        digest = file_digest(src)
+        new[rel] = {"sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if entry is not None and entry.get("sha256") == digest and _dest_matches(dst, entry):
+            # Same content with a new mtime (e.g. after a git checkout): only
+            # carry the timestamp over so the next run takes the fast path.
+            if not dry_run:
+                os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+            result.touched.append(rel)
+            continue
+
+        if dry_run:
+            result.copied.append(rel)
+            continue
+        getattr(result, place_file(src, dst, hardlink=hardlink)).append(rel)
+
+    for rel in sorted(set(old) - set(new)):
+        result.removed.append(rel)
+        if not dry_run:
+            (dest / rel).unlink(missing_ok=True)
+            _prune_empty_dirs((dest / rel).parent, dest)
+
+    if not dry_run and new != old:
+        dest.mkdir(parents=True, exist_ok=True)
+        _write_manifest(dest, source, new)
+    return result
+
+
+def _prune_empty_dirs(path: Path, stop: Path) -> None:
+    while path != stop and path.is_relative_to(stop):
+        try:
+            path.rmdir()
+        except OSError:
+            return
+        path = path.parent
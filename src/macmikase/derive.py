@@ -0,0 +1,249 @@
+"""Derive palettes and whole theme variants in OKLCH.
+
+``fill_missing`` completes a partial palette (bright colors from normal ones
+and vice versa, cursor, selection, accent/error/warning from ANSI slots).
+``derive_variant`` turns a palette into a ``light``, ``dark`` or ``dim``
+variant: neutrals are remapped so the old background/foreground land on the
+new ones, chromatic colors keep their hue and move into a lightness band that
+reads on the new background, and any slot that still falls below the WCAG
+minimum is nudged away from the background. Both are memoised per input
+palette, so regenerating every variant of every theme is cheap.
+
+``generate_theme`` writes a new theme directory from a base theme, updating
+its configs through the same writers as ``scripts/sync-theme-colors.py``.
+
+Needs NumPy (``pip install 'macmikase[color]'``).
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+from dataclasses import fields
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from macmikase.colorspace import (
+    contrast_ratio,
+    hex_to_rgb,
+    oklab_to_oklch,
+    oklch_to_srgb,
+    relative_luminance,
+    rgb_to_hex,
+    srgb_to_oklab,
+)
+from macmikase.palette import Palette, load_palette
+from macmikase.theme_sync import SyncColors, update_theme
+from macmikase.themes import load_manifest
+
+VARIANTS = ("light", "dark", "dim")
+
+# Semantic slots in array order; ANSI colors follow.
+_SEMANTIC = tuple(f.name for f in fields(Palette) if f.name != "ansi")
+_FG = _SEMANTIC.index("foreground")
+_BG = _SEMANTIC.index("background")
+_ANSI = len(_SEMANTIC)
+
+# Target lightness (OKLCH L) of background/foreground per variant kind.
+LIGHTNESS_TARGETS = {"light": (0.97, 0.32), "dark": (0.22, 0.90)}
+# Lightness band for chromatic colors so they read on the new background.
+CHROMA_BANDS = {"light": (0.40, 0.62), "dark": (0.62, 0.86)}
+# Colors below this chroma are treated as neutrals (greys, near-black/white).
+NEUTRAL_CHROMA = 0.04
+_MIN_CONTRAST = {"text": 4.5, "ansi": 3.0}
+
+
+def _to_array(palette: Palette) -> np.ndarray:
+    colors = [getattr(palette, name) for name in _SEMANTIC] + list(palette.ansi)
+    return oklab_to_oklch(srgb_to_oklab(hex_to_rgb(colors)))
+
+
+def _from_array(lch: np.ndarray) -> Palette:
+    colors = rgb_to_hex(oklch_to_srgb(lch))
+    # NaN rows (missing colors) come back as None.
+    values = dict(zip(_SEMANTIC, colors[:_ANSI], strict=True))
+    return Palette(**values, ansi=tuple(colors[_ANSI:]))
+
+
+def _mix(a: str, b: str, t: float) -> str:
+    """Mix two colors in OKLab, ``t`` of the way from ``a`` to ``b``."""
+    lab = srgb_to_oklab(hex_to_rgb([a, b]))
+    mixed = lab[0] + (lab[1] - lab[0]) * t
+    return rgb_to_hex(oklch_to_srgb(oklab_to_oklch(mixed[None, :])))[0]
+
+
+def is_light(palette: Palette) -> bool:
+    lum = relative_luminance(hex_to_rgb([palette.background, palette.foreground]))
+    return bool(lum[0] > lum[1])
+
+
+@lru_cache(maxsize=256)
+def fill_missing(palette: Palette) -> Palette:
+    """Derive unset slots from the ones a theme defines.
+
+    Raises ValueError if the palette has no foreground/background.
+    """
+    if not (palette.foreground and palette.background):
+        raise ValueError("palette needs at least a foreground and background")
+    lch = _to_array(palette)
+    ansi = lch[_ANSI:]
+    normal, bright = ansi[:8].copy(), ansi[8:].copy()
+    missing_bright = np.isnan(bright[:, 0]) & ~np.isnan(normal[:, 0])
+    missing_normal = np.isnan(normal[:, 0]) & ~np.isnan(bright[:, 0])
+    step = np.array([0.06, 0.01, 0.0])
+    bright[missing_bright] = normal[missing_bright] + step
+    normal[missing_normal] = bright[missing_normal] - step
+    filled = _from_array(np.concatenate([lch[:_ANSI], normal, bright]))
+
+    accent = palette.accent or filled.ansi[4] or filled.ansi[6] or palette.foreground
+    return Palette(
+        foreground=palette.foreground,
+        background=palette.background,
+        cursor=palette.cursor or palette.foreground,
+        cursor_text=palette.cursor_text or palette.background,
+        selection_foreground=palette.selection_foreground or palette.foreground,
+        selection_background=(
+            palette.selection_background or _mix(palette.background, accent, 0.25)
+        ),
+        accent=accent,
+        error=palette.error or filled.ansi[1],
+        warning=palette.warning or filled.ansi[3],
+        ansi=filled.ansi,
+    )
+
+
+def _enforce_contrast(lch: np.ndarray, target: str, steps: int = 30) -> np.ndarray:
+    """Move foreground-ish slots away from the background until they meet the minimums."""
+    lch = lch.copy()
+    direction = -1.0 if target == "light" else 1.0
+    minimum = np.full(len(lch), _MIN_CONTRAST["ansi"])
+    minimum[_FG] = _MIN_CONTRAST["text"]
+    # Background-side slots are meant to blend in with the background.
+    exempt = np.zeros(len(lch), dtype=bool)
+    exempt[[_BG, _SEMANTIC.index("cursor_text"), _SEMANTIC.index("selection_background")]] = True
+    blend = (0, 7, 15) if target == "light" else (0,)
+    exempt[[_ANSI + index for index in blend]] = True
+    for _ in range(steps):
+        lum = relative_luminance(oklch_to_srgb(lch))
+        ratio = contrast_ratio(lum, lum[_BG])
+        # Small margin so rounding to 8-bit hex cannot drop below the minimum.
+        low = ~exempt & ~np.isnan(ratio) & (ratio < minimum + 0.05)
+        if not low.any():
+            break
+        lch[low, 0] = np.clip(lch[low, 0] + 0.02 * direction, 0.0, 1.0)
+    return lch
+
+
+@lru_cache(maxsize=256)
+def derive_variant(palette: Palette, variant: str) -> Palette:
+    """Return ``palette`` turned into a ``light``, ``dark`` or ``dim`` variant."""
+    if variant not in VARIANTS:
+        raise ValueError(f"unknown variant '{variant}' (expected one of {', '.join(VARIANTS)})")
+    palette = fill_missing(palette)
+    lch = _to_array(palette)
+    base = "light" if is_light(palette) else "dark"
+    bg_l, fg_l = lch[_BG, 0], lch[_FG, 0]
+
+    if variant == "dim":
+        target = base
+        # Pull background and foreground towards each other and mute chroma.
+        new_bg = bg_l + (fg_l - bg_l) * 0.08
+        new_fg = fg_l - (fg_l - bg_l) * 0.08
+        chroma_scale, band = 0.8, None
+    else:
+        target = variant
+        if target == base:
+            raise ValueError(f"palette is already {base}")
+        new_bg, new_fg = LIGHTNESS_TARGETS[target]
+        chroma_scale, band = 1.0, CHROMA_BANDS[target]
+
+    # Linear lightness map sending the old bg/fg to the new ones.
+    scale = (new_fg - new_bg) / (fg_l - bg_l)
+    out = lch.copy()
+    out[:, 0] = np.clip(new_bg + (lch[:, 0] - bg_l) * scale, 0.0, 1.0)
+    out[:, 1] = lch[:, 1] * chroma_scale
+    if band is not None:
+        chromatic = lch[:, 1] >= NEUTRAL_CHROMA
+        out[chromatic, 0] = np.clip(out[chromatic, 0], *band)
+    return _from_array(_enforce_contrast(out, target))
+
+
+def readable(palette: Palette) -> Palette:
+    """Fill missing slots and nudge colors until they meet the contrast minimums."""
+    palette = fill_missing(palette)
+    target = "light" if is_light(palette) else "dark"
+    return _from_array(_enforce_contrast(_to_array(palette), target))
+
+
+def _sidebar(palette: Palette) -> str:
+    """A slightly deeper shade of the background for panels and ANSI black."""
+    lch = _to_array(palette)[_BG]
+    lch[0] -= 0.03
+    return rgb_to_hex(oklch_to_srgb(lch[None, :]))[0]
+
+
+def sync_colors(palette: Palette) -> SyncColors:
+    """Colors for the theme_sync writers, with sidebar/terminal derived from the background."""
+    palette = fill_missing(palette)
+    return SyncColors(
+        background=palette.background,
+        foreground=palette.foreground,
+        accent=palette.accent,
+        sidebar=_sidebar(palette),
+        terminal=palette.background,
+        error=palette.error,
+        warning=palette.warning,
+        ansi=tuple(palette.ansi),
+    )
+
+
+def generate_theme(
+    base_path: Path, dest: Path, variant: str, *, name: str | None = None, force: bool = False
+) -> Path:
+    """Write a ``variant`` of the theme at ``base_path`` to ``dest``.
+
+    Copies the base theme (without previews or backgrounds other than its
+    wallpaper), writes the derived colors to cursor.json and every per-app
+    config, and updates theme.yaml and the ``light.mode`` marker.
+    """
+    if dest.exists() and not force:
+        raise FileExistsError(f"{dest} already exists (use --force to overwrite)")
+    palette = derive_variant(load_palette(base_path), variant)
+    manifest = load_manifest(base_path)
+    target = "light" if is_light(palette) else "dark"
+
+    shutil.copytree(
+        base_path,
+        dest,
+        ignore=shutil.ignore_patterns("preview.png", "backgrounds", "light.mode"),
+        dirs_exist_ok=True,
+    )
+    if manifest.wallpaper and (base_path / manifest.wallpaper).is_file():
+        (dest / manifest.wallpaper).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(base_path / manifest.wallpaper, dest / manifest.wallpaper)
+
+    colors = sync_colors(palette)
+    cursor_json = dest / "cursor.json"
+    cursor_data = json.loads(cursor_json.read_text()) if cursor_json.exists() else {}
+    cursor_data["colors"] = colors.cursor_colors()
+    cursor_json.write_text(json.dumps(cursor_data, indent=2) + "\n")
+
+    theme_yaml = dest / "theme.yaml"
+    data = yaml.safe_load(theme_yaml.read_text()) if theme_yaml.exists() else {}
+    data = data or {}
+    data["name"] = name or f"{manifest.name} {variant.title()}"
+    data["variant"] = target
+    data["colors"] = {}
+    theme_yaml.write_text(yaml.safe_dump(data, sort_keys=False, allow_unicode=True))
+
+    marker = dest / "light.mode"
+    if target == "light":
+        marker.touch()
+    else:
+        marker.unlink(missing_ok=True)
+
+    update_theme(dest, verbose=False, colors=colors)
+    return dest
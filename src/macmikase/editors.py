@@ -0,0 +1,249 @@
+"""Apply editor themes to VS Code forks (Cursor, VS Code, Antigravity).
+
+``apply_color_theme`` sets ``workbench.colorTheme`` in every detected editor's
+``settings.json`` concurrently, in one process. The files are JSONC (comments
+and trailing commas allowed), so instead of a parse/dump round trip that would
+drop comments and reformat the file, ``set_jsonc_value`` patches only the
+value span of the key, or inserts the key before the closing brace. Files
+already using the theme are not written; changed files are replaced
+atomically.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+COLOR_THEME_KEY = "workbench.colorTheme"
+
+
+@dataclass(frozen=True)
+class Editor:
+    name: str
+    key: str  # short name for --only
+    command: str  # CLI used for extensions
+    app_dir: str  # under ~/Library/Application Support
+    dot_dir: str  # under ~, holds extensions/
+
+    @property
+    def support_dir(self) -> Path:
+        return Path.home() / "Library" / "Application Support" / self.app_dir
+
+    @property
+    def settings_path(self) -> Path:
+        return self.support_dir / "User" / "settings.json"
+
+    @property
+    def extensions_dir(self) -> Path:
+        return Path.home() / self.dot_dir / "extensions"
+
+    @property
+    def detected(self) -> bool:
+        return self.support_dir.is_dir()
+
+
+EDITORS = (
+    Editor("Cursor", "cursor", "cursor", "Cursor", ".cursor"),
+    Editor("VS Code", "code", "code", "Code", ".vscode"),
+    Editor("Antigravity", "antigravity", "antigravity", "Antigravity", ".antigravity"),
+)
+EDITOR_KEYS = tuple(editor.key for editor in EDITORS)
+
+
+def selected_editors(only: list[str] | None = None) -> list[Editor]:
+    """Detected editors, restricted to the ``only`` keys if given."""
+    return [editor for editor in EDITORS if (not only or editor.key in only) and editor.detected]
+
+
+# JSONC tokens: whitespace and comments are skipped, strings kept whole.
+_TOKEN = re.compile(
+    r"""(?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+      | (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<punct>[{}\[\]:,])
+      | (?P<literal>[^\s{}\[\]:,"/]+)""",
+    re.DOTALL | re.VERBOSE,
+)
+
+
+def _tokens(text: str) -> list[tuple[str, int, int]]:
+    """``(kind, start, end)`` for each token; kind is the punctuation char itself."""
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            raise ValueError(f"invalid JSONC at offset {pos}")
+        kind = match.lastgroup
+        if kind == "punct":
+            tokens.append((match.group(), match.start(), match.end()))
+        elif kind != "skip":
+            tokens.append((kind, match.start(), match.end()))
+        pos = match.end()
+    return tokens
+
+
+@dataclass
+class _Document:
+    # key -> (key start, value start, value end), top-level properties only
+    properties: dict[str, tuple[int, int, int]]
+    open_brace: int
+    close_brace: int
+    last_value_end: int | None
+    trailing_comma: bool
+
+
+def _parse(text: str) -> _Document:
+    tokens = _tokens(text)
+    if not tokens or tokens[0][0] != "{":
+        raise ValueError("settings are not a JSON object")
+    properties: dict[str, tuple[int, int, int]] = {}
+    last_value_end = None
+    trailing_comma = False
+    i = 1
+    while i < len(tokens):
+        kind, start, end = tokens[i]
+        if kind == "}":
+            return _Document(properties, tokens[0][1], start, last_value_end, trailing_comma)
+        if kind == ",":
+            trailing_comma = True
+            i += 1
+            continue
+        if kind != "string" or i + 2 >= len(tokens) or tokens[i + 1][0] != ":":
+            raise ValueError(f"expected a property name at offset {start}")
+        key = json.loads(text[start:end])
+        i += 2
+        value_kind, value_start, value_end = tokens[i]
+        if value_kind in "{[":
+            depth = 0
+            while i < len(tokens):
+                if tokens[i][0] in "{[":
+                    depth += 1
+                elif tokens[i][0] in "}]":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                i += 1
+            else:
+                raise ValueError("unterminated value")
+            value_end = tokens[i][2]
+        properties[key] = (start, value_start, value_end)
+        last_value_end = value_end
+        trailing_comma = False
+        i += 1
+    raise ValueError("unterminated object")
+
+
+def get_jsonc_value(text: str, key: str) -> Any:
+    """Top-level ``key`` from JSONC ``text``; None if missing or unreadable."""
+    try:
+        span = _parse(text).properties.get(key)
+        return None if span is None else json.loads(text[span[1] : span[2]])
+    except ValueError:
+        return None
+
+
+def _indent(text: str, doc: _Document) -> str:
+    if doc.properties:
+        first = min(start for start, _, _ in doc.properties.values())
+        line_start = text.rfind("\n", 0, first) + 1
+        prefix = text[line_start:first]
+        if not prefix.strip():
+            return prefix
+    return "    "
+
+
+def set_jsonc_value(text: str, key: str, value: Any) -> str:
+    """Return ``text`` with top-level ``key`` set to ``value``, keeping comments and layout."""
+    encoded = json.dumps(value, ensure_ascii=False)
+    if not text.strip():
+        return f"{{\n    {json.dumps(key)}: {encoded}\n}}\n"
+    doc = _parse(text)
+    if key in doc.properties:
+        _, start, end = doc.properties[key]
+        return text[:start] + encoded + text[end:]
+
+    indent = _indent(text, doc)
+    line = f"{indent}{json.dumps(key)}: {encoded}"
+    close = doc.close_brace
+    if doc.last_value_end is None:
+        # Empty object: put the property on its own line between the braces.
+        return f"{text[: doc.open_brace + 1]}\n{line}\n{text[close:].lstrip(' ')}"
+    if doc.trailing_comma:
+        line += ","
+    line_start = text.rfind("\n", 0, close) + 1
+    if text[line_start:close].strip():
+        insert, new = close, f"\n{line}\n"  # closing brace shares a line
+    else:
+        insert, new = line_start, f"{line}\n"
+    patched = text[:insert] + new + text[insert:]
+    if not doc.trailing_comma:
+        end = doc.last_value_end
+        patched = patched[:end] + "," + patched[end:]
+    return patched
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Replace ``path`` (or a symlink's target) with ``text``, keeping its mode."""
+    target = path.resolve() if path.is_symlink() else path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(text)
+        if target.exists():
+            shutil.copymode(target, tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def update_settings(path: Path, settings: dict[str, Any]) -> bool:
+    """Set top-level ``settings`` in a JSONC file; returns False if nothing changed."""
+    try:
+        original = path.read_text()
+    except FileNotFoundError:
+        original = ""
+    text = original
+    for key, value in settings.items():
+        if get_jsonc_value(text, key) != value:
+            text = set_jsonc_value(text, key, value)
+    if text == original:
+        return False
+    write_atomic(path, text)
+    return True
+
+
+@dataclass
+class EditorResult:
+    editor: str
+    status: str  # "updated", "unchanged" or "error"
+    message: str = ""
+
+
+def _apply_one(editor: Editor, color_theme: str) -> EditorResult:
+    try:
+        changed = update_settings(editor.settings_path, {COLOR_THEME_KEY: color_theme})
+    except (OSError, ValueError) as e:
+        return EditorResult(editor.name, "error", str(e))
+    return EditorResult(editor.name, "updated" if changed else "unchanged")
+
+
+def apply_color_theme(color_theme: str, only: list[str] | None = None) -> list[EditorResult]:
+    """Set the color theme in every detected (and selected) editor concurrently."""
+    selected = selected_editors(only)
+    if not selected:
+        return []
+    with ThreadPoolExecutor(max_workers=len(selected)) as pool:
+        return list(pool.map(lambda editor: _apply_one(editor, color_theme), selected))
+
+
+def read_cursor_theme(theme_path: Path) -> tuple[str | None, str | None]:
+    """``(colorTheme, extension)`` from a theme's cursor.json."""
+    data = json.loads((theme_path / "cursor.json").read_text())
+    return data.get("colorTheme") or None, data.get("extension") or None
@@ -0,0 +1,145 @@
+"""Install editor extensions from a list, one CLI launch per editor.
+
+Every ``cursor``/``code`` invocation boots an Electron CLI, so listing and
+installing extensions one at a time is slow. Instead, the installed set is
+read straight from each editor's ``extensions/extensions.json`` (the file the
+CLI itself consults), and everything missing is installed with a single
+invocation carrying repeated ``--install-extension`` flags. Editors are
+handled concurrently, and the result is checked by re-reading the manifest.
+
+Each editor keeps its list at ``<support dir>/extensions.txt``; one ``#``
+comment or extension ID per line.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from macmikase.editors import Editor
+
+LIST_NAME = "extensions.txt"
+
+Runner = Callable[[list[str]], subprocess.CompletedProcess]
+
+
+def list_path(editor: Editor) -> Path:
+    return editor.support_dir / LIST_NAME
+
+
+def read_list(path: Path) -> list[str]:
+    """Extension IDs from an extensions.txt, in order, without duplicates."""
+    ids: dict[str, str] = {}
+    for line in path.read_text().splitlines():
+        ext = line.split("#", 1)[0].replace(" ", "").strip()
+        if ext:
+            ids.setdefault(ext.lower(), ext)
+    return list(ids.values())
+
+
+def installed_extensions(editor: Editor) -> list[str]:
+    """IDs recorded in the editor's extensions.json, minus entries pending removal."""
+    ext_dir = editor.extensions_dir
+    try:
+        entries = json.loads((ext_dir / "extensions.json").read_text())
+    except (OSError, json.JSONDecodeError):
+        return []
+    try:
+        obsolete = json.loads((ext_dir / ".obsolete").read_text())
+    except (OSError, json.JSONDecodeError):
+        obsolete = {}
+    ids: dict[str, str] = {}
+    for entry in entries if isinstance(entries, list) else []:
+        try:
+            ext = entry["identifier"]["id"]
+        except (KeyError, TypeError):
+            continue
+        folder = (
+            entry.get("relativeLocation")
+            or Path((entry.get("location") or {}).get("path", "")).name
+        )
+        if isinstance(obsolete, dict) and obsolete.get(folder):
+            continue
+        ids.setdefault(ext.lower(), ext)
+    return sorted(ids.values(), key=str.lower)
+
+
+def missing_extensions(wanted: list[str], installed: list[str]) -> list[str]:
+    """``wanted`` IDs not in ``installed``; IDs compare case-insensitively."""
+    have = {ext.lower() for ext in installed}
+    return [ext for ext in wanted if ext.lower() not in have]
+
+
+def install_command(command: str, extensions: list[str]) -> list[str]:
+    cmd = [command]
+    for ext in extensions:
+        cmd += ["--install-extension", ext]
+    return [*cmd, "--force"]
+
+
+@dataclass
+class InstallResult:
+    editor: str
+    status: str  # "installed", "unchanged" or "error"
+    installed: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    message: str = ""
+
+
+def _run(cmd: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, capture_output=True, text=True, check=False)
+
+
+def _install_one(editor: Editor, wanted: list[str], run: Runner) -> InstallResult:
+    missing = missing_extensions(wanted, installed_extensions(editor))
+    if not missing:
+        return InstallResult(editor.name, "unchanged")
+    command = shutil.which(editor.command)
+    if command is None:
+        return InstallResult(
+            editor.name, "error", failed=missing, message=f"'{editor.command}' not on PATH"
+        )
+    try:
+        proc = run(install_command(command, missing))
+    except OSError as e:
+        return InstallResult(editor.name, "error", failed=missing, message=str(e))
+    failed = missing_extensions(missing, installed_extensions(editor))
+    installed = [ext for ext in missing if ext not in failed]
+    if not failed:
+        return InstallResult(editor.name, "installed", installed)
+    message = (proc.stderr or proc.stdout or "").strip().splitlines()
+    return InstallResult(
+        editor.name, "error", installed, failed, message[-1] if message else "install failed"
+    )
+
+
+def install(
+    lists: dict[Editor, list[str]],
+    run: Runner | None = None,
+) -> list[InstallResult]:
+    """Install each editor's missing extensions, one CLI call per editor, in parallel."""
+    if not lists:
+        return []
+    run = run or _run
+    with ThreadPoolExecutor(max_workers=len(lists)) as pool:
+        return list(pool.map(lambda item: _install_one(*item, run), lists.items()))
+
+
+def export_list(editor: Editor, path: Path) -> list[str]:
+    """Write the editor's installed extensions to ``path``; returns them."""
+    installed = installed_extensions(editor)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = [
+        f"# {editor.name} Extensions",
+        f"# Exported on {datetime.now():%Y-%m-%d %H:%M:%S}",
+        "# Install with: macmikase-cursor-extensions install",
+        "",
+    ]
+    path.write_text("\n".join([*header, *installed]) + "\n")
+    return installed
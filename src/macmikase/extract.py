@@ -0,0 +1,259 @@
+"""Dominant-color palette extraction from wallpapers.
+
+``extract_palette`` downsamples an image, clusters its pixels with a
+vectorised k-means in OKLab and maps the clusters onto the ANSI and semantic
+slots: the most common color sets the background (and whether the theme is
+light or dark), the most common saturated color becomes the accent, and each
+ANSI hue takes the nearest cluster hue, falling back to the canonical hue
+tinted by the image. ``derive.readable`` then enforces the audit's contrast
+minimums.
+
+Downsampling works on horizontal strips so only a few rows of a
+multi-megapixel image are held as arrays at once (JPEGs are additionally
+decoded at reduced scale). Cluster centroids are cached in
+``~/.cache/macmikase/palettes`` by image hash and cluster count.
+
+Needs NumPy and Pillow (``pip install 'macmikase[color,images]'``).
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from macmikase.colorspace import oklab_to_oklch, oklch_to_srgb, rgb_to_hex, srgb_to_oklab
+from macmikase.deploy import file_digest
+from macmikase.derive import (
+    CHROMA_BANDS,
+    LIGHTNESS_TARGETS,
+    NEUTRAL_CHROMA,
+    is_light,
+    readable,
+    sync_colors,
+)
+from macmikase.palette import ANSI_NAMES, Palette, palettes_dir
+
+# Roughly 160x100 samples: plenty for a dozen clusters, fast to iterate on.
+MAX_SAMPLES = 16_000
+DEFAULT_CLUSTERS = 12
+# Rows decoded into an array at a time while downsampling.
+STRIP_ROWS = 256
+
+# OKLCH hue (degrees) of the sRGB primaries/secondaries for ANSI 1-6.
+ANSI_HUES = {
+    "red": 29.2,
+    "green": 142.5,
+    "yellow": 109.8,
+    "blue": 264.1,
+    "magenta": 328.4,
+    "cyan": 194.8,
+}
+# A cluster is used for an ANSI slot if its hue is within this many degrees.
+MAX_HUE_DISTANCE = 35.0
+# ...and its hue may pull the slot at most this far from the canonical hue.
+MAX_HUE_SHIFT = 15.0
+
+
+def _block_factor(width: int, height: int, max_samples: int) -> int:
+    return max(1, math.ceil(math.sqrt(width * height / max_samples)))
+
+
+def downsample(path: Path, max_samples: int = MAX_SAMPLES) -> np.ndarray:
+    """Return ``(N, 3)`` sRGB samples in ``[0, 1]`` by block-averaging strips of the image."""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        factor = _block_factor(img.width, img.height, max_samples)
+        # JPEG can decode at 1/2, 1/4 or 1/8 scale directly.
+        img.draft("RGB", (img.width // factor, img.height // factor))
+        img = img.convert("RGB")
+        factor = _block_factor(img.width, img.height, max_samples)
+        out_w = img.width // factor
+        usable_h = (img.height // factor) * factor
+        step = max(factor, (STRIP_ROWS // factor) * factor)
+
+        strips = []
+        for top in range(0, usable_h, step):
+            bottom = min(top + step, usable_h)
+            strip = np.asarray(img.crop((0, top, out_w * factor, bottom)), dtype=np.float32)
+            rows = (bottom - top) // factor
+            blocks = strip.reshape(rows, factor, out_w, factor, 3).mean(axis=(1, 3))
+            strips.append(blocks.reshape(-1, 3))
+    if not strips:
+        raise ValueError(f"{path} is too small to sample")
+    return np.concatenate(strips) / 255.0
+
+
+def kmeans(
+    points: np.ndarray, k: int, *, iterations: int = 30, seed: int = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorised k-means (k-means++ init); returns ``(centroids, counts)`` by size."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(points))
+    centroids = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        dist = ((points[:, None, :] - np.array(centroids)[None]) ** 2).sum(-1).min(axis=1)
+        total = dist.sum()
+        if total == 0:
+            break
+        centroids.append(points[rng.choice(len(points), p=dist / total)])
+    centroids = np.array(centroids)
+
+    for _ in range(iterations):
+        dist = ((points[:, None, :] - centroids[None]) ** 2).sum(-1)
+        labels = dist.argmin(axis=1)
+        counts = np.bincount(labels, minlength=len(centroids))
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, points)
+        moved = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centroids)
+        shift = np.abs(moved - centroids).max()
+        centroids = moved
+        if shift < 1e-5:
+            break
+
+    labels = ((points[:, None, :] - centroids[None]) ** 2).sum(-1).argmin(axis=1)
+    counts = np.bincount(labels, minlength=len(centroids))
+    keep = counts > 0
+    order = np.argsort(-counts[keep])
+    return centroids[keep][order], counts[keep][order]
+
+
+def _cache_file(digest: str, k: int) -> Path:
+    return palettes_dir() / f"extract-{digest[:32]}-k{k}.json"
+
+
+def clusters(path: Path, k: int = DEFAULT_CLUSTERS) -> tuple[np.ndarray, np.ndarray]:
+    """OKLab cluster centroids and pixel counts for an image, cached by content hash."""
+    cache = _cache_file(file_digest(path), k)
+    try:
+        data = json.loads(cache.read_text())
+        return np.array(data["centroids"]), np.array(data["counts"])
+    except (OSError, json.JSONDecodeError, KeyError):
+        pass
+
+    centroids, counts = kmeans(srgb_to_oklab(downsample(path)), k)
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_name(f".{cache.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"centroids": centroids.tolist(), "counts": counts.tolist()}))
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+    return centroids, counts
+
+
+def _hex(lch: list[float]) -> str:
+    return rgb_to_hex(oklch_to_srgb(np.array([lch])))[0]
+
+
+def _hue_distance(a: np.ndarray, b: float) -> np.ndarray:
+    return np.abs((a - b + 180.0) % 360.0 - 180.0)
+
+
+def palette_from_clusters(centroids: np.ndarray, counts: np.ndarray) -> Palette:
+    """Map OKLab clusters (sorted by size) onto a full palette."""
+    lch = oklab_to_oklch(centroids)
+    hues = np.degrees(lch[:, 2]) % 360.0
+    weights = counts / counts.sum()
+
+    # The dominant color decides light vs dark and tints the neutrals.
+    dominant = lch[0]
+    kind = "light" if dominant[0] > 0.6 else "dark"
+    bg_l, fg_l = LIGHTNESS_TARGETS[kind]
+    tint_h = dominant[2]
+    tint_c = min(dominant[1], 0.03)
+    low, high = CHROMA_BANDS[kind]
+    mid_l = (low + high) / 2
+
+    chromatic = lch[:, 1] >= NEUTRAL_CHROMA
+    # Each chromatic cluster competes only for the ANSI hue nearest to it; a
+    # slot takes its best-scoring (close, common, saturated) candidate.
+    targets = np.array(list(ANSI_HUES.values()))
+    distance = _hue_distance(hues[None, :], targets[:, None])
+    nearest = distance.argmin(axis=0)
+    allowed = (
+        chromatic[None, :]
+        & (distance < MAX_HUE_DISTANCE)
+        & (nearest[None, :] == np.arange(len(targets))[:, None])
+    )
+    score = np.where(allowed, weights[None, :] * lch[None, :, 1] / (1 + distance / 10), -1.0)
+    picks = {slot: int(score[slot].argmax()) for slot in range(len(targets)) if allowed[slot].any()}
+
+    ansi: dict[str, str] = {}
+    for slot, (name, hue) in enumerate(ANSI_HUES.items()):
+        if slot in picks:
+            best = picks[slot]
+            chroma = float(np.clip(lch[best, 1], 0.08, 0.2))
+            # Keep within MAX_HUE_SHIFT of the canonical hue so slots stay distinct.
+            shift = (hues[best] - hue + 180.0) % 360.0 - 180.0
+            tinted = hue + float(np.clip(shift, -MAX_HUE_SHIFT, MAX_HUE_SHIFT))
+            ansi[name] = _hex([mid_l, chroma, math.radians(tinted)])
+        else:
+            ansi[name] = _hex([mid_l, 0.1, math.radians(hue)])
+
+    if chromatic.any():
+        best = int(np.argmax(np.where(chromatic, weights * lch[:, 1], -1)))
+        accent = _hex([mid_l, float(np.clip(lch[best, 1], 0.08, 0.2)), lch[best, 2]])
+    else:
+        accent = ansi["blue"]
+
+    background = _hex([bg_l, tint_c, tint_h])
+    foreground = _hex([fg_l, tint_c / 2, tint_h])
+    black = _hex([bg_l - 0.05 if kind == "dark" else bg_l - 0.08, tint_c, tint_h])
+    white = _hex([fg_l - 0.05 if kind == "dark" else fg_l + 0.1, tint_c / 2, tint_h])
+    grey = _hex([(bg_l + fg_l) / 2, tint_c, tint_h])
+
+    normal = [black, *(ansi[name] for name in ANSI_NAMES[1:7]), white]
+    return Palette(
+        foreground=foreground,
+        background=background,
+        accent=accent,
+        error=ansi["red"],
+        warning=ansi["yellow"],
+        # Brights are derived from the normal colors by fill_missing.
+        ansi=(*normal, grey, *(None,) * 6, foreground),
+    )
+
+
+def extract_palette(path: Path, k: int = DEFAULT_CLUSTERS) -> Palette:
+    """Return a complete, readable palette for the image at ``path``."""
+    centroids, counts = clusters(path, k)
+    return readable(palette_from_clusters(centroids, counts))
+
+
+def write_candidate(
+    palette: Palette, dest: Path, *, name: str, wallpaper: str | None = None, force: bool = False
+) -> list[Path]:
+    """Write a candidate ``cursor.json`` and ``theme.yaml`` for ``palette`` into ``dest``."""
+    cursor_json = dest / "cursor.json"
+    theme_yaml = dest / "theme.yaml"
+    existing = [path for path in (cursor_json, theme_yaml) if path.exists()]
+    if existing and not force:
+        raise FileExistsError(f"{existing[0]} already exists (use --force to overwrite)")
+
+    light = is_light(palette)
+    variant = "light" if light else "dark"
+    colors = sync_colors(palette)
+    dest.mkdir(parents=True, exist_ok=True)
+    cursor_data = {
+        "colorTheme": "Default Light Modern" if light else "Default Dark Modern",
+        "extension": None,
+        "colors": colors.cursor_colors(),
+    }
+    cursor_json.write_text(json.dumps(cursor_data, indent=2) + "\n")
+
+    manifest = {
+        "name": name,
+        "variant": variant,
+        "colors": palette.colors(),
+        "cursor": {"theme": cursor_data["colorTheme"], "extension": None},
+    }
+    if wallpaper:
+        manifest["wallpaper"] = wallpaper
+    theme_yaml.write_text(yaml.safe_dump(manifest, sort_keys=False))
+    return [cursor_json, theme_yaml]
@@ -0,0 +1,223 @@
+"""Install run history and config-delta planning for macmikase.
+
+The ``macmikase`` Ansible callback plugin (``ansible/callback_plugins``) appends
+one JSON object per line to ``~/.local/state/macmikase/install-events.jsonl``
+for every playbook, phase and task boundary. This module reads that log and
+ranks the slowest tasks across runs.
+
+After every successful install a normalised snapshot of ``macmikase.yaml`` is
+stored in ``~/.local/state/macmikase/install-snapshot.json``. ``macmikase
+install --changed`` diffs the current config against it section by section and
+runs only the Ansible tags those sections feed.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+from collections.abc import Iterable, Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+
+from macmikase.paths import state_dir
+
+# Ansible tags (see ansible/playbook.yml and the role task files) that must run
+# when a config section changes. Newly installed formulae can bring in the
+# toolchains (rustup, go, uv, node) the runtimes role installs into, so brew
+# changes also re-run runtimes. Sections absent here trigger a full install.
+SECTION_TAGS: dict[str, tuple[str, ...]] = {
+    "defaults": ("dotfiles",),
+    "brew": ("brew", "runtimes"),
+    "cask": ("cask",),
+    "web": ("web",),
+    "npm": ("npm",),
+    "uv_tools": ("uv_tools",),
+    "cargo_tools": ("cargo_tools",),
+    "go_tools": ("go_tools",),
+    "themes": ("themes",),
+    "scripts": (),
+}
+
+
+def default_events_path() -> Path:
+    return state_dir() / "install-events.jsonl"
+
+
+def load_events(path: Path | None = None) -> list[dict]:
+    """Read the event log, skipping malformed or truncated lines."""
+    path = path or default_events_path()
+    if not path.exists():
+        return []
+    events = []
+    with open(path) as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return events
+
+
+def recent_runs(events: Iterable[dict], limit: int | None = None) -> list[str]:
+    """Return run ids in chronological order, keeping only the last ``limit``."""
+    runs: list[str] = []
+    for event in events:
+        run = event.get("run")
+        if run and event.get("event") == "playbook_start":
+            runs.append(run)
+    return runs[-limit:] if limit else runs
+
+
+def task_timings(events: Iterable[dict], runs: Sequence[str] | None = None) -> list[dict]:
+    """Aggregate ``task_end`` durations per task, slowest total first.
+
+    Args:
+        events: Parsed events from the log.
+        runs: Only include these run ids (all runs if None).
+    """
+    wanted = set(runs) if runs is not None else None
+    rows: dict[tuple[str | None, str], dict] = {}
+    for event in events:
+        if event.get("event") != "task_end":
+            continue
+        if wanted is not None and event.get("run") not in wanted:
+            continue
+        key = (event.get("role"), event.get("task", ""))
+        row = rows.setdefault(
+            key,
+            {
+                "role": key[0],
+                "task": key[1],
+                "runs": set(),
+                "count": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "failed": 0,
+                "changed": 0,
+            },
+        )
+        duration = float(event.get("duration", 0.0))
+        row["runs"].add(event.get("run"))
+        row["count"] += 1
+        row["total"] += duration
+        row["max"] = max(row["max"], duration)
+        row["failed"] += event.get("status") == "failed"
+        row["changed"] += bool(event.get("changed"))
+
+    result = []
+    for row in rows.values():
+        n_runs = len(row.pop("runs"))
+        row["runs"] = n_runs
+        row["mean"] = row["total"] / n_runs if n_runs else 0.0
+        result.append(row)
+    return sorted(result, key=lambda r: r["mean"], reverse=True)
+
+
+def phase_timings(events: Iterable[dict], runs: Sequence[str] | None = None) -> dict[str, float]:
+    """Mean ``phase_end`` duration per phase."""
+    wanted = set(runs) if runs is not None else None
+    durations: dict[str, list[float]] = {}
+    for event in events:
+        if event.get("event") != "phase_end":
+            continue
+        if wanted is not None and event.get("run") not in wanted:
+            continue
+        durations.setdefault(event["phase"], []).append(float(event.get("duration", 0.0)))
+    return {phase: sum(values) / len(values) for phase, values in durations.items()}
+
+
+def format_report(tasks: Sequence[dict], phases: dict[str, float], n_runs: int) -> str:
+    lines = [f"Install timing across {n_runs} run(s)", ""]
+    if phases:
+        lines.append("Phases (mean):")
+        for phase, mean in sorted(phases.items(), key=lambda kv: kv[1], reverse=True):
+            lines.append(f"  {phase:<12} {mean:>8.1f}s")
+        lines.append("")
+    lines.append(f"{'mean':>8} {'max':>8} {'runs':>5} {'fail':>5}  task")
+    for row in tasks:
+        name = f"{row['role']} : {row['task']}" if row["role"] else row["task"]
+        lines.append(
+            f"{row['mean']:>7.1f}s {row['max']:>7.1f}s {row['runs']:>5} {row['failed']:>5}  {name}"
+        )
+    return "\n".join(lines)
+
+
+def default_snapshot_path() -> Path:
+    return state_dir() / "install-snapshot.json"
+
+
+def config_sections(config_path: Path | str) -> dict[str, object]:
+    """Validate a config file and return its normalised top-level sections.
+
+    Raises:
+        pydantic.ValidationError: If the configuration is invalid.
+        FileNotFoundError: If the file doesn't exist.
+    """
+    from macmikase.schema import load_and_validate
+
+    return load_and_validate(config_path).model_dump(mode="json")
+
+
+def load_snapshot(path: Path | None = None) -> dict | None:
+    """Return the sections recorded by the last successful install, if any."""
+    path = path or default_snapshot_path()
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return None
+    sections = data.get("sections") if isinstance(data, dict) else None
+    return sections if isinstance(sections, dict) else None
+
+
+def save_snapshot(
+    sections: dict[str, object], config_path: Path | str, path: Path | None = None
+) -> Path:
+    """Record ``sections`` as the successfully installed configuration."""
+    path = path or default_snapshot_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "config": str(config_path),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sections": sections,
+    }
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(entry, indent=2, sort_keys=True) + "\n")
+    tmp.replace(path)
+    return path
+
+
+def changed_sections(old: dict[str, object], new: dict[str, object]) -> list[str]:
+    """Names of sections that were added, removed or modified, in config order."""
+    names = list(new) + [name for name in old if name not in new]
+    return [
+        name
+        for name in names
+        if json.dumps(old.get(name), sort_keys=True) != json.dumps(new.get(name), sort_keys=True)
+    ]
+
+
+def tags_for_sections(sections: Iterable[str]) -> list[str] | None:
+    """Map changed sections onto Ansible tags.
+
+    Returns:
+        Sorted tags to pass to ``--tags``, or None if a section has no known
+        mapping and the whole playbook must run.
+    """
+    tags: set[str] = set()
+    for name in sections:
+        if name not in SECTION_TAGS:
+            return None
+        tags.update(SECTION_TAGS[name])
+    return sorted(tags)
+
+
+def playbook_command(config_path: Path | str, tags: Sequence[str] | None = None) -> list[str]:
+    """Build the ansible-playbook invocation, run from the repo's ``ansible/`` dir."""
+    if shutil.which("ansible-playbook"):
+        cmd = ["ansible-playbook"]
+    else:
+        cmd = ["uv", "run", "--extra", "dev", "ansible-playbook"]
+    cmd += ["-i", "inventory.yml", "playbook.yml", "-e", f"config_file={config_path}"]
+    if tags:
+        cmd += ["--tags", ",".join(tags)]
+    return cmd
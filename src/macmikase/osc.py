@@ -0,0 +1,82 @@
+"""OSC escape sequences for retinting the current terminal.
+
+``palette_sequences`` sets the 16 ANSI colors (OSC 4) and the default
+foreground, background and cursor colors (OSC 10/11/12) from a
+:class:`~macmikase.palette.Palette`; ``RESET_SEQUENCES`` (OSC 104/110/111/112)
+restores the terminal's configured colors. Nothing is written to disk, so a
+preview disappears as soon as it is reset or the terminal is closed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import sys
+from collections.abc import Iterator
+from typing import TextIO
+
+from macmikase.palette import Palette
+
+# String terminator; BEL also works but ST is what terminals echo back.
+ST = "\x1b\\"
+
+RESET_SEQUENCES = f"\x1b]104{ST}\x1b]110{ST}\x1b]111{ST}\x1b]112{ST}"
+
+
+def _rgb(hex_color: str) -> str:
+    """``#rrggbb`` -> XParseColor ``rgb:rr/gg/bb``."""
+    return f"rgb:{hex_color[1:3]}/{hex_color[3:5]}/{hex_color[5:7]}"
+
+
+def palette_sequences(palette: Palette) -> str:
+    """Build the OSC 4/10/11/12 sequences for every color the palette defines."""
+    parts = [
+        f"\x1b]4;{index};{_rgb(color)}{ST}" for index, color in enumerate(palette.ansi) if color
+    ]
+    for code, color in (
+        (10, palette.foreground),
+        (11, palette.background),
+        (12, palette.cursor),
+    ):
+        if color:
+            parts.append(f"\x1b]{code};{_rgb(color)}{ST}")
+    return "".join(parts)
+
+
+def open_terminal() -> TextIO | None:
+    """Return a writable handle on the controlling terminal, or None."""
+    if sys.stdout.isatty():
+        return sys.stdout
+    try:
+        return open("/dev/tty", "w")  # noqa: SIM115
+    except OSError:
+        return None
+
+
+def emit(sequences: str, stream: TextIO | None = None) -> bool:
+    """Write sequences to ``stream`` (default: the controlling terminal)."""
+    target = stream or open_terminal()
+    if target is None:
+        return False
+    try:
+        target.write(sequences)
+        target.flush()
+    except OSError:
+        return False
+    finally:
+        if stream is None and target is not sys.stdout:
+            target.close()
+    return True
+
+
+@contextlib.contextmanager
+def previewing(palette: Palette, stream: TextIO | None = None) -> Iterator[bool]:
+    """Apply ``palette`` for the duration of the block, then reset.
+
+    Yields whether the sequences could be written.
+    """
+    applied = emit(palette_sequences(palette), stream)
+    try:
+        yield applied
+    finally:
+        if applied:
+            emit(RESET_SEQUENCES, stream)
@@ -0,0 +1,414 @@
+"""Color palettes compiled from every color-bearing file in a theme.
+
+A :class:`Palette` holds the 16 ANSI colors plus semantic colors (foreground,
+background, cursor, selection, accent, error, warning). ``load_palette`` parses
+each supported file in a theme directory (see ``PARSERS``) and merges them,
+earlier files winning where two define the same color: explicit ``theme.yaml``
+colors first, then the terminal configs, then ``cursor.json``, ``starship.toml``
+and ``neovim.lua``. Compiled palettes are cached as JSON in
+``~/.cache/macmikase/palettes`` and reused until a source file's mtime or size
+changes, so a lookup costs a few ``stat`` calls and one small read.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field, fields, replace
+from pathlib import Path
+
+import yaml
+
+from macmikase.paths import cache_dir
+from macmikase.themepack import packed_theme
+
+# Use tomllib (standard library in 3.11+) or tomli for older versions
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
+
+ANSI_NAMES = (
+    "black",
+    "red",
+    "green",
+    "yellow",
+    "blue",
+    "magenta",
+    "cyan",
+    "white",
+    "bright_black",
+    "bright_red",
+    "bright_green",
+    "bright_yellow",
+    "bright_blue",
+    "bright_magenta",
+    "bright_cyan",
+    "bright_white",
+)
+
+_HEX_RE = re.compile(r"^(?:#|0x)?([0-9a-fA-F]{6}|[0-9a-fA-F]{3})$")
+
+# Bump when the cached JSON layout or the parsers change meaning.
+CACHE_VERSION = 2
+
+
+def normalize_hex(value: object) -> str | None:
+    """Return ``#rrggbb`` for ``#rgb``/``rrggbb``/``0xrrggbb`` values, else None."""
+    if not isinstance(value, str):
+        return None
+    match = _HEX_RE.match(value.strip().strip("\"'"))
+    if not match:
+        return None
+    digits = match.group(1).lower()
+    if len(digits) == 3:
+        digits = "".join(c * 2 for c in digits)
+    return f"#{digits}"
+
+
+def _empty_ansi() -> tuple[str | None, ...]:
+    return (None,) * 16
+
+
+@dataclass(frozen=True)
+class Palette:
+    """A normalised terminal palette; colors are ``#rrggbb`` or None."""
+
+    foreground: str | None = None
+    background: str | None = None
+    cursor: str | None = None
+    cursor_text: str | None = None
+    selection_foreground: str | None = None
+    selection_background: str | None = None
+    accent: str | None = None
+    error: str | None = None
+    warning: str | None = None
+    ansi: tuple[str | None, ...] = field(default_factory=_empty_ansi)
+
+    def merged(self, fallback: Palette) -> Palette:
+        """Fill colors missing here from ``fallback``."""
+        values = {
+            f.name: getattr(self, f.name) or getattr(fallback, f.name)
+            for f in fields(self)
+            if f.name != "ansi"
+        }
+        ansi = tuple(a or b for a, b in zip(self.ansi, fallback.ansi, strict=False))
+        return Palette(**values, ansi=ansi)
+
+    @property
+    def is_empty(self) -> bool:
+        return self == Palette()
+
+    def colors(self) -> dict[str, str]:
+        """Flat ``name -> #rrggbb`` mapping of every defined color."""
+        colors = {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.name != "ansi" and getattr(self, f.name)
+        }
+        for name, color in zip(ANSI_NAMES, self.ansi, strict=False):
+            if color:
+                colors[name] = color
+        return colors
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["ansi"] = list(self.ansi)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Palette:
+        ansi = tuple(data.get("ansi") or _empty_ansi())
+        names = {f.name for f in fields(cls)} - {"ansi"}
+        return cls(**{k: v for k, v in data.items() if k in names}, ansi=ansi)
+
+
+def _with_ansi(palette: Palette, ansi: dict[int, str]) -> Palette:
+    merged = list(palette.ansi)
+    for index, color in ansi.items():
+        if 0 <= index < 16:
+            merged[index] = color
+    return replace(palette, ansi=tuple(merged))
+
+
+_KITTY_KEYS = {
+    "foreground": "foreground",
+    "background": "background",
+    "cursor": "cursor",
+    "cursor_text_color": "cursor_text",
+    "selection_foreground": "selection_foreground",
+    "selection_background": "selection_background",
+}
+
+
+def parse_kitty(text: str) -> Palette:
+    """Parse ``key value`` lines from a kitty.conf color scheme."""
+    values: dict[str, str] = {}
+    ansi: dict[int, str] = {}
+    for line in text.splitlines():
+        parts = line.split(None, 1)
+        if len(parts) != 2 or parts[0].startswith("#"):
+            continue
+        key = parts[0]
+        color = normalize_hex(parts[1].split()[0])
+        if color is None:
+            continue
+        if key in _KITTY_KEYS:
+            values[_KITTY_KEYS[key]] = color
+        elif key.startswith("color") and key[5:].isdigit():
+            ansi[int(key[5:])] = color
+    return _with_ansi(Palette(**values), ansi)
+
+
+_GHOSTTY_KEYS = {
+    "foreground": "foreground",
+    "background": "background",
+    "cursor-color": "cursor",
+    "cursor-text": "cursor_text",
+    "selection-foreground": "selection_foreground",
+    "selection-background": "selection_background",
+}
+
+
+def parse_ghostty(text: str) -> Palette:
+    """Parse ``key = value`` lines (including ``palette = N=#hex``) from ghostty.conf."""
+    values: dict[str, str] = {}
+    ansi: dict[int, str] = {}
+    for line in text.splitlines():
+        if line.lstrip().startswith("#") or "=" not in line:
+            continue
+        key, raw = (part.strip() for part in line.split("=", 1))
+        if key == "palette" and "=" in raw:
+            index, color = raw.split("=", 1)
+            normalized = normalize_hex(color)
+            if index.strip().isdigit() and normalized:
+                ansi[int(index)] = normalized
+        elif key in _GHOSTTY_KEYS:
+            color = normalize_hex(raw)
+            if color:
+                values[_GHOSTTY_KEYS[key]] = color
+    return _with_ansi(Palette(**values), ansi)
+
+
+def _palette_from_mapping(colors: dict, keys: dict[str, str]) -> Palette:
+    values = {}
+    for key, name in keys.items():
+        color = normalize_hex(colors.get(key))
+        if color and name not in values:
+            values[name] = color
+    return Palette(**values)
+
+
+_ALACRITTY_KEYS = {
+    ("primary", "foreground"): "foreground",
+    ("primary", "background"): "background",
+    ("cursor", "cursor"): "cursor",
+    ("cursor", "text"): "cursor_text",
+    ("selection", "text"): "selection_foreground",
+    ("selection", "background"): "selection_background",
+}
+
+
+def parse_alacritty(text: str) -> Palette:
+    """Parse the ``[colors.*]`` tables of an alacritty.toml."""
+    try:
+        colors = tomllib.loads(text).get("colors", {})
+    except tomllib.TOMLDecodeError:
+        return Palette()
+    values = {}
+    for (table, key), name in _ALACRITTY_KEYS.items():
+        color = normalize_hex(colors.get(table, {}).get(key))
+        if color:
+            values[name] = color
+    ansi = {}
+    for offset, table in ((0, "normal"), (8, "bright")):
+        for index, name in enumerate(ANSI_NAMES[:8]):
+            color = normalize_hex(colors.get(table, {}).get(name))
+            if color:
+                ansi[offset + index] = color
+    return _with_ansi(Palette(**values), ansi)
+
+
+_CURSOR_KEYS = {
+    "foreground": "foreground",
+    "background": "background",
+    "accent": "accent",
+    "error": "error",
+    "warning": "warning",
+}
+
+
+def parse_cursor_json(text: str) -> Palette:
+    """Parse the ``colors`` object of a theme's cursor.json."""
+    try:
+        colors = json.loads(text).get("colors") or {}
+    except (json.JSONDecodeError, AttributeError):
+        return Palette()
+    return _palette_from_mapping(colors, _CURSOR_KEYS)
+
+
+_STARSHIP_KEYS = {
+    "text": "foreground",
+    "base": "background",
+    "accent": "accent",
+    "err": "error",
+    "warn": "warning",
+}
+
+
+def parse_starship(text: str) -> Palette:
+    """Parse the active ``[palettes.<name>]`` table of a starship.toml."""
+    try:
+        data = tomllib.loads(text)
+    except tomllib.TOMLDecodeError:
+        return Palette()
+    palettes = data.get("palettes", {})
+    colors = palettes.get(data.get("palette", "")) or {}
+    return _palette_from_mapping(colors, _STARSHIP_KEYS)
+
+
+# Top-level ``key = "#hex"`` assignments as written by sync-theme-colors.py,
+# and the ``Normal`` highlight group.
+_NVIM_ASSIGN_RE = re.compile(r'^\s*(bg|fg|accent|error|warn)\s*=\s*"([^"]+)"', re.MULTILINE)
+_NVIM_NORMAL_RE = re.compile(r"\bNormal\s*=\s*\{([^}]*)\}")
+_NVIM_KEYS = {
+    "fg": "foreground",
+    "bg": "background",
+    "accent": "accent",
+    "error": "error",
+    "warn": "warning",
+}
+
+
+def parse_neovim(text: str) -> Palette:
+    """Parse colors from a theme's neovim.lua (most only name a colorscheme)."""
+    colors = dict(_NVIM_ASSIGN_RE.findall(text))
+    normal = _NVIM_NORMAL_RE.search(text)
+    if normal:
+        for key, value in re.findall(r'\b(fg|bg)\s*=\s*"([^"]+)"', normal.group(1)):
+            colors.setdefault(key, value)
+    return _palette_from_mapping(colors, _NVIM_KEYS)
+
+
+_YAML_KEYS = {
+    "foreground": "foreground",
+    "fg": "foreground",
+    "background": "background",
+    "bg": "background",
+    "cursor": "cursor",
+    "cursor_text": "cursor_text",
+    "selection_foreground": "selection_foreground",
+    "selection_background": "selection_background",
+    "accent": "accent",
+    "error": "error",
+    "warning": "warning",
+    "warn": "warning",
+}
+
+
+def parse_theme_yaml(text: str) -> Palette:
+    """Parse the ``colors`` mapping of theme.yaml (semantic, ANSI or ``colorN`` keys)."""
+    try:
+        data = yaml.safe_load(text) or {}
+        colors = data.get("colors") or {}
+    except (yaml.YAMLError, AttributeError):
+        return Palette()
+    if not isinstance(colors, dict):
+        return Palette()
+    ansi = {}
+    for key, value in colors.items():
+        color = normalize_hex(value)
+        if color is None:
+            continue
+        if key in ANSI_NAMES:
+            ansi[ANSI_NAMES.index(key)] = color
+        elif str(key).startswith("color") and str(key)[5:].isdigit():
+            ansi[int(str(key)[5:])] = color
+    return _with_ansi(_palette_from_mapping(colors, _YAML_KEYS), ansi)
+
+
+# Source files in precedence order: earlier files win for colors both define.
+PARSERS: dict[str, Callable[[str], Palette]] = {
+    "theme.yaml": parse_theme_yaml,
+    "ghostty.conf": parse_ghostty,
+    "kitty.conf": parse_kitty,
+    "alacritty.toml": parse_alacritty,
+    "cursor.json": parse_cursor_json,
+    "starship.toml": parse_starship,
+    "neovim.lua": parse_neovim,
+}
+
+# In-process memo: cache file -> (signature, palette).
+_memo: dict[Path, tuple[list, Palette]] = {}
+
+
+def palettes_dir() -> Path:
+    return cache_dir() / "palettes"
+
+
+def _signature(theme_path: Path) -> list[list]:
+    signature = []
+    for name in PARSERS:
+        try:
+            st = (theme_path / name).stat()
+        except OSError:
+            continue
+        signature.append([name, st.st_mtime_ns, st.st_size])
+    return signature
+
+
+def _cache_file(theme_path: Path) -> Path:
+    key = hashlib.sha1(str(theme_path.resolve()).encode()).hexdigest()[:16]
+    return palettes_dir() / f"{theme_path.name}-{key}.json"
+
+
+def compile_palette(theme_path: Path) -> Palette:
+    """Parse every supported file in ``theme_path`` into one palette (uncached)."""
+    palette = Palette()
+    for name, parser in PARSERS.items():
+        path = theme_path / name
+        if not path.is_file():
+            continue
+        try:
+            palette = palette.merged(parser(path.read_text(errors="replace")))
+        except OSError:
+            continue
+    return palette
+
+
+def load_palette(theme_path: Path) -> Palette:
+    """Return the compiled palette for a theme, using the on-disk cache when fresh.
+
+    Themes inside a pack use the palette compiled into its index.
+    """
+    packed = packed_theme(theme_path)
+    if packed is not None:
+        return Palette.from_dict(packed.palette)
+    signature = _signature(theme_path)
+    cache = _cache_file(theme_path)
+    memo = _memo.get(cache)
+    if memo and memo[0] == signature:
+        return memo[1]
+    try:
+        cached = json.loads(cache.read_text())
+        if cached.get("version") == CACHE_VERSION and cached.get("signature") == signature:
+            palette = Palette.from_dict(cached["palette"])
+            _memo[cache] = (signature, palette)
+            return palette
+    except (OSError, json.JSONDecodeError, KeyError, TypeError):
+        pass
+
+    palette = compile_palette(theme_path)
+    _memo[cache] = (signature, palette)
+    payload = {"version": CACHE_VERSION, "signature": signature, "palette": palette.to_dict()}
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_name(f".{cache.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+    return palette
@@ -0,0 +1,95 @@
+"""Persistent cache for resolved paths (theme directories, helper scripts).
+
+Each entry stores a value together with the key it was computed for (the
+relevant environment variables and cwd) and the mtimes of the few paths whose
+contents decide it: creating or removing a candidate directory changes its
+parent's mtime, and a resolved file that is removed or replaced changes its
+own. A lookup therefore costs one ``stat`` of the cache file (its parsed
+contents are kept in-process) plus one ``stat`` per watched path, instead of
+re-walking parents and resolving every candidate.
+
+Entries live in ``~/.cache/macmikase/paths.json``; set
+``MACMIKASE_NO_PATH_CACHE=1`` to bypass it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+from macmikase.paths import cache_dir
+
+CACHE_VERSION = 1
+
+# Parsed cache file: (path, mtime_ns) it was read at -> entries.
+_loaded: tuple[tuple[str, int], dict[str, Any]] | None = None
+
+
+def cache_file() -> Path:
+    return cache_dir() / "paths.json"
+
+
+def _mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _entries(path: Path) -> dict[str, Any]:
+    global _loaded
+    stamp = (str(path), _mtime(str(path)) or 0)
+    if _loaded is not None and _loaded[0] == stamp:
+        return _loaded[1]
+    try:
+        data = json.loads(path.read_text())
+        entries = data["entries"] if data.get("version") == CACHE_VERSION else {}
+    except (OSError, json.JSONDecodeError, KeyError, TypeError, AttributeError):
+        entries = {}
+    _loaded = (stamp, entries)
+    return entries
+
+
+def _store(path: Path, entries: dict[str, Any]) -> None:
+    global _loaded
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": CACHE_VERSION, "entries": entries}))
+        os.replace(tmp, path)
+    except OSError:
+        return
+    _loaded = ((str(path), _mtime(str(path)) or 0), entries)
+
+
+def cached(
+    name: str,
+    key: list[str | None],
+    compute: Callable[[], tuple[Any, Iterable[Path]]],
+) -> Any:
+    """Return entry ``name`` if ``key`` matches and no watched path changed.
+
+    Otherwise ``compute()`` returns ``(value, watched_paths)``; the JSON-able
+    value is stored with the current mtimes of the watched paths.
+    """
+    if os.environ.get("MACMIKASE_NO_PATH_CACHE"):
+        return compute()[0]
+    path = cache_file()
+    entries = _entries(path)
+    entry = entries.get(name)
+    if (
+        isinstance(entry, dict)
+        and entry.get("key") == key
+        and all(_mtime(watched) == mtime for watched, mtime in entry.get("watch", {}).items())
+    ):
+        return entry["value"]
+
+    value, watched = compute()
+    watch = {str(p): _mtime(str(p)) for p in dict.fromkeys(watched)}
+    # Re-read: compute() may itself have stored entries (nested cached() calls).
+    entries = _entries(path)
+    _store(path, {**entries, name: {"key": key, "watch": watch, "value": value}})
+    return value
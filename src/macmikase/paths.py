@@ -0,0 +1,23 @@
+"""Well-known per-user locations used by macmikase.
+
+Kept in one place so tests can redirect everything by patching ``Path.home()``.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+
+def state_dir() -> Path:
+    """Directory for persistent state (history files, databases)."""
+    return Path.home() / ".local" / "state" / "macmikase"
+
+
+def cache_dir() -> Path:
+    """Directory for disposable caches that can be regenerated at any time."""
+    return Path.home() / ".cache" / "macmikase"
+
+
+def data_dir() -> Path:
+    """Directory for installed data (themes, assets)."""
+    return Path.home() / ".local" / "share" / "macmikase"
@@ -0,0 +1,154 @@
+"""Pre-generated shell init snippets, so a new shell does not fork helpers.
+
+``~/.bashrc`` used to run ``eval "$(brew shellenv)"``, ``eval "$(zoxide init
+bash)"``, ``eval "$(direnv hook bash)"`` and ``eval "$(starship init bash)"``
+on every start. ``refresh`` runs those commands once and stores their output
+in ``~/.cache/macmikase/shell/<name>.bash``, which the bashrc sources instead.
+
+Each snippet is keyed on the resolved path, size and mtime of the binary that
+produced it (recorded in ``manifest.json``); ``refresh`` regenerates only the
+snippets whose binary changed, so it is cheap enough to run after every
+``macmikase update`` and install. The bashrc falls back to the live ``eval``
+when a snippet is missing or older than the binary on ``PATH``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from macmikase.paths import cache_dir
+
+Runner = Callable[[list[str]], subprocess.CompletedProcess]
+
+
+@dataclass(frozen=True)
+class Snippet:
+    name: str
+    binaries: tuple[str, ...]  # command names or absolute paths; the first found wins
+    args: tuple[str, ...]
+
+
+SNIPPETS: tuple[Snippet, ...] = (
+    Snippet("brew", ("/opt/homebrew/bin/brew", "/usr/local/bin/brew"), ("shellenv", "bash")),
+    Snippet("zoxide", ("zoxide",), ("init", "bash")),
+    Snippet("direnv", ("direnv",), ("hook", "bash")),
+    # `starship init bash` prints a stub that runs starship again; cache the full script.
+    Snippet("starship", ("starship",), ("init", "bash", "--print-full-init")),
+)
+
+
+@dataclass
+class CacheResult:
+    name: str
+    status: str  # "generated", "fresh", "missing" or "failed"
+    binary: str | None = None
+    message: str = ""
+
+
+def shell_cache_dir() -> Path:
+    return cache_dir() / "shell"
+
+
+def snippet_path(name: str) -> Path:
+    return shell_cache_dir() / f"{name}.bash"
+
+
+def _search_path() -> str:
+    """PATH as the bashrc sees it once its own additions are in place."""
+    home = Path.home()
+    extra = ["/opt/homebrew/bin", "/usr/local/bin", str(home / "bin"), str(home / ".local" / "bin")]
+    return os.pathsep.join([*extra, os.environ.get("PATH", "")])
+
+
+def find_binary(snippet: Snippet) -> Path | None:
+    path = _search_path()
+    for candidate in snippet.binaries:
+        found = shutil.which(candidate, path=path)
+        if found:
+            return Path(found)
+    return None
+
+
+def binary_key(binary: Path) -> dict[str, object]:
+    """What identifies a build: upgrades change the resolved path, size or mtime."""
+    real = binary.resolve()
+    st = real.stat()
+    return {"binary": str(real), "size": st.st_size, "mtime": st.st_mtime_ns}
+
+
+def load_manifest() -> dict[str, dict]:
+    try:
+        data = json.loads((shell_cache_dir() / "manifest.json").read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def _run(cmd: list[str]) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PATH": _search_path()}
+    return subprocess.run(cmd, capture_output=True, text=True, check=False, timeout=30, env=env)
+
+
+def _refresh_one(
+    snippet: Snippet, entry: dict | None, force: bool, run: Runner
+) -> tuple[CacheResult, dict | None]:
+    binary = find_binary(snippet)
+    if binary is None:
+        snippet_path(snippet.name).unlink(missing_ok=True)
+        return CacheResult(snippet.name, "missing", message="not installed"), None
+    try:
+        key = {**binary_key(binary), "args": list(snippet.args)}
+    except OSError as e:
+        return CacheResult(snippet.name, "failed", str(binary), str(e)), entry
+    if not force and entry == key and snippet_path(snippet.name).is_file():
+        return CacheResult(snippet.name, "fresh", str(binary)), entry
+    try:
+        proc = run([str(binary), *snippet.args])
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return CacheResult(snippet.name, "failed", str(binary), str(e)), entry
+    if proc.returncode != 0 or not proc.stdout.strip():
+        lines = (proc.stderr or "").strip().splitlines()
+        message = lines[-1] if lines else f"exit status {proc.returncode}"
+        return CacheResult(snippet.name, "failed", str(binary), message), entry
+    header = f"# Generated by `macmikase shell-cache refresh`: {binary} {' '.join(snippet.args)}\n"
+    _write(snippet_path(snippet.name), header + proc.stdout.rstrip("\n") + "\n")
+    return CacheResult(snippet.name, "generated", str(binary)), key
+
+
+def refresh(
+    snippets: tuple[Snippet, ...] | None = None,
+    *,
+    force: bool = False,
+    run: Runner | None = None,
+) -> list[CacheResult]:
+    """Regenerate the snippets whose binary changed (all of them with ``force``)."""
+    snippets = SNIPPETS if snippets is None else snippets
+    run = run or _run
+    manifest = load_manifest()
+    with ThreadPoolExecutor(max_workers=len(snippets) or 1) as pool:
+        outcomes = list(
+            pool.map(lambda s: _refresh_one(s, manifest.get(s.name), force, run), snippets)
+        )
+    updated = dict(manifest)
+    for snippet, (_result, entry) in zip(snippets, outcomes, strict=True):
+        if entry is None:
+            updated.pop(snippet.name, None)
+        else:
+            updated[snippet.name] = entry
+    if updated != manifest:
+        _write(shell_cache_dir() / "manifest.json", json.dumps(updated, indent=1) + "\n")
+    return [result for result, _entry in outcomes]
@@ -0,0 +1,317 @@
+"""Profile interactive shell startup, line by line.
+
+``profile`` starts the shell ``runs`` times in a pseudo-terminal (so it really
+is interactive and reads its rc files) with xtrace enabled and a timestamp in
+``PS4``. Every trace line carries the time it started, the file and line of
+the command and the chain of files/lines that led there (``source`` calls and
+function calls), so the time up to the next trace line is charged to the line
+itself (*self*) and to every line on that chain (*total*): a ``source`` line's
+total includes everything the sourced file did.
+
+bash needs ``EPOCHREALTIME`` (bash 5); zsh needs ``%D{%s.%6.}`` (zsh 5.6).
+``zsh/zprof`` is not used because it only times functions, not the sourced
+lines that make up an rc file. The report ranks files and, by default, the
+lines of the dotfiles macmikase manages (``~/.bashrc``, ``~/.zshrc``,
+``~/.config/shell/*``).
+"""
+
+from __future__ import annotations
+
+import os
+import pty
+import re
+import select
+import shlex
+import shutil
+import signal
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass, field
+from itertools import pairwise
+from pathlib import Path
+
+SHELLS = ("bash", "zsh")
+# Targets (relative to $HOME) of the shell config macmikase deploys.
+MANAGED = (".bashrc", ".zshrc", ".config/shell/")
+
+_BASH_RC = """\
+exec {_macmikase_trace}>>"$MACMIKASE_TRACE"
+BASH_XTRACEFD=$_macmikase_trace
+PS4=$'+${EPOCHREALTIME}\\t${LINENO}\\t${BASH_SOURCE[@]@Q}\\t${BASH_LINENO[@]}\\t'
+set -x
+[ -f "$MACMIKASE_RCFILE" ] && source "$MACMIKASE_RCFILE"
+"""
+_ZSH_ENV = """\
+exec 2>>"$MACMIKASE_TRACE"
+setopt prompt_subst xtrace
+PS4=$'+%D{%s.%6.}\\t%I\\t%x\\t${(pj:\\t:)funcfiletrace}\\t'
+ZDOTDIR="$MACMIKASE_ZDOTDIR"
+[ -f "$ZDOTDIR/.zshenv" ] && source "$ZDOTDIR/.zshenv"
+"""
+_BASH_LINE = re.compile(r"^\++(\d+\.\d+)\t(\d+)\t([^\t]*)\t([^\t]*)\t")
+_ZSH_LINE = re.compile(r"^\++(\d+\.\d+)\t(\d+)\t([^\t]*)\t(.*?)\t")
+
+Frame = tuple[str, int]  # (file, line)
+
+
+@dataclass
+class TraceLine:
+    stamp: float
+    frames: list[Frame]  # innermost first
+
+
+@dataclass
+class LineCost:
+    file: str
+    line: int
+    text: str
+    self: float  # seconds, mean per run
+    total: float
+    hits: float
+    managed: bool
+
+
+@dataclass
+class FileCost:
+    file: str
+    self: float
+    total: float
+    managed: bool
+
+
+@dataclass
+class Profile:
+    shell: str
+    walls: list[float]  # seconds, per run
+    files: list[FileCost] = field(default_factory=list)
+    lines: list[LineCost] = field(default_factory=list)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.walls)
+
+
+def is_managed(path: str) -> bool:
+    try:
+        rel = Path(path).relative_to(Path.home()).as_posix()
+    except ValueError:
+        return False
+    return any(rel == m or (m.endswith("/") and rel.startswith(m)) for m in MANAGED)
+
+
+def display_path(path: str) -> str:
+    home = str(Path.home())
+    return "~" + path[len(home) :] if path == home or path.startswith(home + "/") else path
+
+
+def parse_bash_trace(text: str, ignore: str = "") -> list[TraceLine]:
+    lines = []
+    for raw in text.splitlines():
+        m = _BASH_LINE.match(raw)
+        if not m:
+            continue  # continuation of a multi-line command, or stray output
+        try:
+            sources = shlex.split(m.group(3))
+        except ValueError:
+            continue
+        callers = [int(n) for n in m.group(4).split()]
+        frames = [(sources[0], int(m.group(2)))] if sources else []
+        # BASH_LINENO[i - 1] is the line in BASH_SOURCE[i] that called frame i - 1.
+        frames += [(src, callers[i - 1]) for i, src in enumerate(sources[1:], 1)]
+        lines.append(TraceLine(float(m.group(1)), _keep(frames, ignore)))
+    return lines
+
+
+def parse_zsh_trace(text: str, ignore: str = "") -> list[TraceLine]:
+    lines = []
+    for raw in text.splitlines():
+        m = _ZSH_LINE.match(raw)
+        if not m:
+            continue
+        frames = [(m.group(3), int(m.group(2)))]
+        for caller in m.group(4).split("\t") if m.group(4) else []:
+            file, _, line = caller.rpartition(":")
+            if line.isdigit():
+                frames.append((file, int(line)))
+        lines.append(TraceLine(float(m.group(1)), _keep(frames, ignore)))
+    return lines
+
+
+def _keep(frames: list[Frame], ignore: str) -> list[Frame]:
+    return [f for f in frames if f[0].startswith("/") and f[0] != ignore]
+
+
+def _setup(shell: str, binary: str, workdir: Path, rcfile: Path | None) -> tuple[list[str], dict]:
+    env = {k: v for k, v in os.environ.items() if k not in ("PAGER", "COMPOSER_NO_INTERACTION")}
+    env.setdefault("TERM", "xterm-256color")
+    home = Path.home()
+    if shell == "bash":
+        wrapper = workdir / "bashrc"
+        wrapper.write_text(_BASH_RC)
+        env["MACMIKASE_RCFILE"] = str(rcfile or home / ".bashrc")
+        return [binary, "--rcfile", str(wrapper), "-i", "-c", "exit"], env
+    (workdir / ".zshenv").write_text(_ZSH_ENV)
+    env["MACMIKASE_ZDOTDIR"] = str(rcfile.parent if rcfile else env.get("ZDOTDIR", home))
+    env["ZDOTDIR"] = str(workdir)
+    return [binary, "-i", "-c", "exit"], env
+
+
+def _run_in_pty(argv: list[str], env: dict, timeout: float) -> float:
+    """Run ``argv`` on a new pty, discarding its output; returns the wall time."""
+    start = time.perf_counter()
+    pid, fd = pty.fork()
+    if pid == 0:
+        try:
+            os.execvpe(argv[0], argv, env)
+        finally:
+            os._exit(127)
+    try:
+        deadline = start + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                raise TimeoutError(f"{argv[0]} did not exit within {timeout:.0f}s")
+            try:
+                if not os.read(fd, 65536):
+                    break
+            except OSError:
+                break  # EIO: the child closed the terminal
+        _, status = os.waitpid(pid, 0)
+    finally:
+        os.close(fd)
+    if os.waitstatus_to_exitcode(status) == 127:
+        raise OSError(f"could not run {argv[0]}")
+    return time.perf_counter() - start
+
+
+def _line_text(file: str, line: int, cache: dict[str, list[str]]) -> str:
+    if file not in cache:
+        try:
+            cache[file] = Path(file).read_text(errors="replace").splitlines()
+        except OSError:
+            cache[file] = []
+    lines = cache[file]
+    return lines[line - 1].strip() if 0 < line <= len(lines) else ""
+
+
+def aggregate(shell: str, walls: list[float], traces: list[list[TraceLine]]) -> Profile:
+    """Mean per-run self/total time per line and per file across ``traces``."""
+    line_self: dict[Frame, float] = {}
+    line_total: dict[Frame, float] = {}
+    hits: dict[Frame, int] = {}
+    file_self: dict[str, float] = {}
+    file_total: dict[str, float] = {}
+    for trace in traces:
+        for current, following in pairwise(trace):
+            if not current.frames:
+                continue
+            elapsed = max(0.0, following.stamp - current.stamp)
+            top = current.frames[0]
+            line_self[top] = line_self.get(top, 0.0) + elapsed
+            hits[top] = hits.get(top, 0) + 1
+            file_self[top[0]] = file_self.get(top[0], 0.0) + elapsed
+            for frame in set(current.frames):
+                line_total[frame] = line_total.get(frame, 0.0) + elapsed
+            for file in {f for f, _ in current.frames}:
+                file_total[file] = file_total.get(file, 0.0) + elapsed
+
+    runs = len(traces) or 1
+    texts: dict[str, list[str]] = {}
+    lines = [
+        LineCost(
+            file=file,
+            line=line,
+            text=_line_text(file, line, texts),
+            self=line_self.get((file, line), 0.0) / runs,
+            total=total / runs,
+            hits=hits.get((file, line), 0) / runs,
+            managed=is_managed(file),
+        )
+        for (file, line), total in line_total.items()
+    ]
+    files = [
+        FileCost(file, file_self.get(file, 0.0) / runs, total / runs, is_managed(file))
+        for file, total in file_total.items()
+    ]
+    return Profile(
+        shell=shell,
+        walls=walls,
+        files=sorted(files, key=lambda f: -f.total),
+        lines=sorted(lines, key=lambda c: (-c.total, -c.self)),
+    )
+
+
+def profile(
+    shell: str | None = None,
+    runs: int = 5,
+    *,
+    warmup: int = 1,
+    rcfile: Path | None = None,
+    timeout: float = 30.0,
+) -> Profile:
+    """Start ``shell`` (default: ``$SHELL``) ``runs`` times and profile its startup.
+
+    Raises ``ValueError`` for an unsupported shell or when the shell produced no
+    timestamps (too old), and ``OSError``/``TimeoutError`` if it cannot be run.
+    """
+    shell = shell or os.environ.get("SHELL") or "bash"
+    binary = shell if "/" in shell else shutil.which(shell)
+    kind = Path(shell).name
+    if kind not in SHELLS:
+        raise ValueError(f"unsupported shell '{kind}' (supported: {', '.join(SHELLS)})")
+    if binary is None:
+        raise OSError(f"{shell} not found on PATH")
+
+    walls: list[float] = []
+    traces: list[list[TraceLine]] = []
+    with tempfile.TemporaryDirectory(prefix="macmikase-profile-") as tmp:
+        workdir = Path(tmp)
+        argv, env = _setup(kind, binary, workdir, rcfile)
+        trace_file = workdir / "trace"
+        env["MACMIKASE_TRACE"] = str(trace_file)
+        wrapper = str(workdir / "bashrc")
+        for i in range(warmup + runs):
+            trace_file.write_text("")
+            wall = _run_in_pty(argv, env, timeout)
+            if i < warmup:
+                continue
+            text = trace_file.read_text(errors="replace")
+            if kind == "bash":
+                trace = parse_bash_trace(text, ignore=wrapper)
+            else:
+                trace = parse_zsh_trace(text, ignore=str(workdir / ".zshenv"))
+            if not trace:
+                raise ValueError(
+                    f"{binary} produced no timestamped trace (bash 5 / zsh 5.6 needed)"
+                )
+            walls.append(wall)
+            traces.append(trace)
+    return aggregate(kind, walls, traces)
+
+
+def format_profile(result: Profile, limit: int = 15, managed_only: bool = True) -> str:
+    ms = 1000
+    walls = result.walls
+    out = [
+        f"{result.shell} startup over {len(walls)} run(s): median {result.median * ms:.0f}ms "
+        f"(min {min(walls) * ms:.0f}ms, max {max(walls) * ms:.0f}ms)",
+        "",
+        f"{'file':<48} {'total':>9} {'self':>9}",
+    ]
+    for f in result.files[:limit]:
+        mark = "*" if f.managed else " "
+        out.append(f"{mark}{display_path(f.file):<47} {f.total * ms:>7.1f}ms {f.self * ms:>7.1f}ms")
+    lines = [c for c in result.lines if c.managed or not managed_only]
+    scope = "managed dotfiles" if managed_only else "all files"
+    out += ["", f"Slowest lines ({scope}):", f"{'line':<32} {'total':>9} {'self':>9}  source"]
+    for c in lines[:limit]:
+        where = f"{display_path(c.file)}:{c.line}"
+        text = c.text if len(c.text) <= 60 else c.text[:57] + "..."
+        out.append(f"{where:<32} {c.total * ms:>7.1f}ms {c.self * ms:>7.1f}ms  {text}")
+    if not lines:
+        out.append("  (none traced)")
+    out += ["", "* managed by macmikase; times are means per run"]
+    return "\n".join(out)
@@ -0,0 +1,284 @@
+"""Snapshots of the files a theme switch rewrites, for instant rollback.
+
+Before a theme is applied, ``capture`` records the current contents of every
+file the switch can touch: chezmoi's data file, the dotfiles rendered from
+templates that use ``.theme``/``.themes_dir``, the theme files copied by
+``run_after_10-setup-theme.sh`` and each detected editor's ``settings.json``.
+Contents go to ``~/.local/state/macmikase/snapshots/objects`` keyed by their
+SHA-256, so the many files that are identical between snapshots are stored
+once; ``index.json`` lists the snapshots, newest last.
+
+``rollback(n)`` restores the state from before the ``n``-th most recent
+switch by writing those files back directly, without rendering templates or
+running helpers, and records the state it replaced as a new snapshot so a
+rollback can itself be rolled back. The oldest snapshots are evicted once
+there are more than ``MAX_SNAPSHOTS`` or their objects exceed ``MAX_BYTES``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from macmikase.chezmoi import config_path, read_chezmoi_data, source_dir
+from macmikase.editors import EDITORS
+from macmikase.paths import state_dir
+
+MAX_SNAPSHOTS = 50
+MAX_BYTES = 64 * 1024 * 1024
+
+# A template that reads the theme data renders differently per theme.
+_THEMED = re.compile(r"\{\{[^}]*\.(?:theme|themes_dir)\b")
+# chezmoi source-state attributes stripped from each path component.
+_ATTRIBUTES = ("private_", "readonly_", "empty_", "executable_", "exact_", "create_")
+
+
+def store_dir() -> Path:
+    return state_dir() / "snapshots"
+
+
+def object_path(digest: str) -> Path:
+    return store_dir() / "objects" / digest[:2] / digest
+
+
+@dataclass
+class Snapshot:
+    id: int
+    created: float
+    theme: str | None  # active before the switch, i.e. what a rollback restores
+    to: str | None  # the theme that was being applied
+    # absolute path -> [sha256, mode], or None if the file did not exist
+    files: dict[str, list[Any] | None] = field(default_factory=dict)
+
+
+def load_index() -> list[Snapshot]:
+    try:
+        data = json.loads((store_dir() / "index.json").read_text())
+        return [Snapshot(**entry) for entry in data]
+    except (OSError, json.JSONDecodeError, TypeError):
+        return []
+
+
+def _save_index(snapshots: list[Snapshot]) -> None:
+    path = store_dir() / "index.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".index.json.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps([vars(s) for s in snapshots], indent=1) + "\n")
+    os.replace(tmp, path)
+
+
+def _target_component(name: str) -> str | None:
+    """Target name for one source-state path component; None for non-file entries."""
+    if name.startswith((".chezmoi", "run_", "modify_", "remove_", "symlink_", "encrypted_")):
+        return None
+    if name.startswith("literal_"):
+        return name.removeprefix("literal_")
+    changed = True
+    while changed:
+        changed = False
+        for prefix in _ATTRIBUTES:
+            if name.startswith(prefix):
+                name, changed = name.removeprefix(prefix), True
+    if name.startswith("dot_"):
+        name = "." + name.removeprefix("dot_")
+    return name
+
+
+def rendered_targets(source: Path | None = None) -> list[Path]:
+    """Targets under $HOME rendered from templates that use the theme data."""
+    source = source or source_dir()
+    home = Path.home()
+    targets = []
+    for root, dirs, files in os.walk(source):
+        dirs[:] = [d for d in dirs if not d.startswith((".git", ".chezmoi"))]
+        for name in files:
+            if not name.endswith(".tmpl"):
+                continue
+            path = Path(root) / name
+            rel = path.relative_to(source).with_name(name.removesuffix(".tmpl"))
+            parts = [_target_component(part) for part in rel.parts]
+            if any(part is None for part in parts):
+                continue
+            try:
+                if not _THEMED.search(path.read_text(errors="replace")):
+                    continue
+            except OSError:
+                continue
+            targets.append(home.joinpath(*parts))
+    return sorted(targets)
+
+
+def tracked_files(theme: str) -> list[Path]:
+    """Every file applying ``theme`` can rewrite."""
+    from macmikase.watch import COPIED_OUTPUTS
+
+    home = Path.home()
+    paths = [config_path(), *rendered_targets()]
+    paths += [home / rel.format(theme=theme) for rel in COPIED_OUTPUTS.values()]
+    paths += [editor.settings_path for editor in EDITORS if editor.detected]
+    return list(dict.fromkeys(paths))
+
+
+def _store_object(data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{digest}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    return digest
+
+
+def _record(paths: list[Path]) -> dict[str, list[Any] | None]:
+    files: dict[str, list[Any] | None] = {}
+    for path in paths:
+        try:
+            data = path.read_bytes()
+            mode = path.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            files[str(path)] = None
+            continue
+        except OSError:
+            continue  # unreadable (a directory, no permission): leave it alone
+        files[str(path)] = [_store_object(data), mode]
+    return files
+
+
+def _append(files: dict[str, list[Any] | None], theme: str | None, to: str | None) -> Snapshot:
+    snapshots = load_index()
+    snapshot = Snapshot(
+        id=(snapshots[-1].id + 1) if snapshots else 1,
+        created=time.time(),
+        theme=theme,
+        to=to,
+        files=files,
+    )
+    snapshots.append(snapshot)
+    _save_index(evict(snapshots))
+    return snapshot
+
+
+def capture(paths: list[Path], *, theme: str | None, to: str | None) -> Snapshot:
+    """Record the current contents of ``paths`` as the newest snapshot."""
+    return _append(_record(paths), theme, to)
+
+
+def capture_theme_switch(theme: str) -> Snapshot:
+    """Snapshot before applying ``theme``, labelled with the currently active theme."""
+    return capture(tracked_files(theme), theme=read_chezmoi_data().get("theme"), to=theme)
+
+
+def drop(snapshot_id: int) -> None:
+    """Forget a snapshot (e.g. the switch turned out to be a no-op)."""
+    snapshots = load_index()
+    kept = [s for s in snapshots if s.id != snapshot_id]
+    if len(kept) != len(snapshots):
+        _save_index(kept)
+        gc(kept)
+
+
+def evict(snapshots: list[Snapshot]) -> list[Snapshot]:
+    """Drop the oldest snapshots beyond ``MAX_SNAPSHOTS`` or ``MAX_BYTES``; prune objects."""
+    snapshots = snapshots[-MAX_SNAPSHOTS:]
+    while len(snapshots) > 1 and _size(snapshots) > MAX_BYTES:
+        snapshots = snapshots[1:]
+    gc(snapshots)
+    return snapshots
+
+
+def _digests(snapshots: list[Snapshot]) -> set[str]:
+    return {entry[0] for s in snapshots for entry in s.files.values() if entry}
+
+
+def _size(snapshots: list[Snapshot]) -> int:
+    total = 0
+    for digest in _digests(snapshots):
+        try:
+            total += object_path(digest).stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+def gc(snapshots: list[Snapshot]) -> list[Path]:
+    """Delete stored objects no snapshot refers to."""
+    keep = _digests(snapshots)
+    removed = []
+    objects = store_dir() / "objects"
+    if objects.is_dir():
+        for path in objects.glob("*/*"):
+            if path.name not in keep:
+                path.unlink(missing_ok=True)
+                removed.append(path)
+    return removed
+
+
+@dataclass
+class RollbackResult:
+    snapshot: Snapshot  # the oldest switch undone
+    restored: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)  # objects evicted or lost
+
+
+def _write_file(path: Path, data: bytes, mode: int) -> None:
+    """Atomically replace ``path`` (or a symlink's target) with ``data``."""
+    target = path.resolve() if path.is_symlink() else path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.chmod(tmp, mode)
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def rollback(n: int = 1) -> RollbackResult:
+    """Restore every file to its state before the ``n``-th most recent switch.
+
+    Raises ``LookupError`` if there are fewer than ``n`` snapshots.
+    """
+    snapshots = load_index()
+    if n < 1 or n > len(snapshots):
+        raise LookupError(f"only {len(snapshots)} snapshot(s) recorded")
+    undone = snapshots[-n:]
+    # The oldest undone snapshot holding a file has its state from before all of them.
+    state: dict[str, list[Any] | None] = {}
+    for snapshot in reversed(undone):
+        state.update(snapshot.files)
+
+    result = RollbackResult(undone[0])
+    # Read the old contents before recording the current state can evict them.
+    contents: dict[str, tuple[bytes, int] | None] = {}
+    for name, entry in state.items():
+        if entry is None:
+            contents[name] = None
+            continue
+        try:
+            contents[name] = (object_path(entry[0]).read_bytes(), entry[1])
+        except OSError:
+            result.missing.append(name)
+    current = _record([Path(name) for name in contents])
+    active = read_chezmoi_data().get("theme")
+
+    for name, content in contents.items():
+        path = Path(name)
+        if content is None:
+            if path.is_file() or path.is_symlink():
+                path.unlink()
+                result.removed.append(name)
+        elif current.get(name) != [hashlib.sha256(content[0]).hexdigest(), content[1]]:
+            _write_file(path, *content)
+            result.restored.append(name)
+
+    _append(current, active, result.snapshot.theme)
+    return result
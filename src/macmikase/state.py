@@ -0,0 +1,284 @@
+"""Theme apply history in SQLite (``~/.local/state/macmikase/state.db``).
+
+Every theme switch is recorded with its timestamp, theme, the previous theme,
+where it came from (``cli``, ``shell`` or ``rollback``), its outcome, the
+macmikase version and the duration of each step it ran. ``history`` lists
+recent switches and ``step_stats`` reports p50/p95 per step (optionally per
+version), which shows whether switching is getting slower over time.
+
+The database uses WAL mode and a busy timeout so the TUI, the CLI and the
+shell helpers can record concurrently; ``PRAGMA user_version`` tracks the
+schema.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import sqlite3
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from macmikase.paths import state_dir
+
+SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS applies (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    theme TEXT NOT NULL,
+    previous TEXT,
+    source TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL,
+    version TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    apply_id INTEGER NOT NULL REFERENCES applies(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    duration REAL NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (apply_id, position)
+);
+CREATE INDEX IF NOT EXISTS applies_started ON applies(started);
+"""
+TOTAL = "total"
+
+
+def db_path() -> Path:
+    return state_dir() / "state.db"
+
+
+def _version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("macmikase")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+@contextlib.contextmanager
+def connect(path: Path | None = None) -> Iterator[sqlite3.Connection]:
+    """Open (and create or migrate) the state database; commits on success."""
+    path = path or db_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5)
+    try:
+        conn.execute("PRAGMA foreign_keys = ON")
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+@dataclass
+class Step:
+    name: str
+    duration: float  # seconds
+    status: str = "ok"  # "ok", "failed" or "skipped"
+
+
+@dataclass
+class ApplyRecord:
+    theme: str
+    started: float
+    duration: float
+    outcome: str  # "ok", "partial" (an app helper failed), "failed" or "unchanged"
+    previous: str | None = None
+    source: str = "cli"
+    version: str = ""
+    steps: list[Step] = field(default_factory=list)
+    id: int | None = None
+
+
+class ApplyTimer:
+    """Times the steps of one theme switch (``with timer.step(name):``); ``record`` stores them."""
+
+    def __init__(self, theme: str, *, previous: str | None = None, source: str = "cli"):
+        self.theme = theme
+        self.previous = previous
+        self.source = source
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.steps: list[Step] = []
+
+    @contextlib.contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        status = "failed"
+        try:
+            yield
+            status = "ok"
+        finally:
+            self.steps.append(Step(name, time.perf_counter() - start, status))
+
+    def record(self, outcome: str, path: Path | None = None) -> ApplyRecord:
+        entry = ApplyRecord(
+            theme=self.theme,
+            started=self.started,
+            duration=time.perf_counter() - self._start,
+            outcome=outcome,
+            previous=self.previous,
+            source=self.source,
+            steps=self.steps,
+        )
+        return record_apply(entry, path)
+
+
+def record_apply(entry: ApplyRecord, path: Path | None = None) -> ApplyRecord:
+    """Store one switch and its steps; fills in ``id`` and ``version``."""
+    entry.version = entry.version or _version()
+    with connect(path) as conn:
+        cursor = conn.execute(
+            "INSERT INTO applies (started, theme, previous, source, outcome, duration, version)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry.started,
+                entry.theme,
+                entry.previous,
+                entry.source,
+                entry.outcome,
+                entry.duration,
+                entry.version,
+            ),
+        )
+        entry.id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO steps (apply_id, position, name, duration, status) VALUES (?, ?, ?, ?, ?)",
+            [(entry.id, i, s.name, s.duration, s.status) for i, s in enumerate(entry.steps)],
+        )
+    return entry
+
+
+def history(limit: int = 20, path: Path | None = None) -> list[ApplyRecord]:
+    """The ``limit`` most recent switches, newest first."""
+    if not (path or db_path()).exists():
+        return []
+    with connect(path) as conn:
+        rows = conn.execute(
+            "SELECT id, started, theme, previous, source, outcome, duration, version"
+            " FROM applies ORDER BY started DESC, id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        records = [
+            ApplyRecord(
+                id=row[0],
+                started=row[1],
+                theme=row[2],
+                previous=row[3],
+                source=row[4],
+                outcome=row[5],
+                duration=row[6],
+                version=row[7],
+            )
+            for row in rows
+        ]
+        for record in records:
+            record.steps = [
+                Step(*step)
+                for step in conn.execute(
+                    "SELECT name, duration, status FROM steps WHERE apply_id = ? ORDER BY position",
+                    (record.id,),
+                )
+            ]
+    return records
+
+
+def previous_theme(path: Path | None = None) -> str | None:
+    """The theme active before the most recent successful switch."""
+    if not (path or db_path()).exists():
+        return None
+    with connect(path) as conn:
+        row = conn.execute(
+            "SELECT previous FROM applies WHERE outcome IN ('ok', 'partial')"
+            " AND previous IS NOT NULL"
+            " ORDER BY started DESC, id DESC LIMIT 1"
+        ).fetchone()
+    return row[0] if row else None
+
+
+def last_theme(path: Path | None = None) -> str | None:
+    """The theme of the most recent switch that did not fail."""
+    if not (path or db_path()).exists():
+        return None
+    with connect(path) as conn:
+        row = conn.execute(
+            "SELECT theme FROM applies WHERE outcome != 'failed' ORDER BY started DESC, id DESC"
+            " LIMIT 1"
+        ).fetchone()
+    return row[0] if row else None
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """Linearly interpolated percentile of sorted ``values``."""
+    if len(values) == 1:
+        return values[0]
+    pos = (len(values) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def step_stats(
+    *, by_version: bool = False, last: int | None = None, path: Path | None = None
+) -> list[dict]:
+    """p50/p95 duration per step (and ``total``) over successful steps.
+
+    ``last`` limits the sample to the most recent switches.
+    """
+    if not (path or db_path()).exists():
+        return []
+    recent = "SELECT id FROM applies ORDER BY started DESC, id DESC"
+    params: tuple = ()
+    if last:
+        recent += " LIMIT ?"
+        params = (last,)
+    with connect(path) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT a.version, s.name, s.duration FROM steps s JOIN applies a ON a.id = s.apply_id
+            WHERE s.status = 'ok' AND a.id IN ({recent})
+            UNION ALL
+            SELECT version, '{TOTAL}', duration FROM applies
+            WHERE outcome != 'failed' AND id IN ({recent})
+            """,
+            params * 2,
+        ).fetchall()
+
+    samples: dict[tuple[str, str], list[float]] = {}
+    for version, name, duration in rows:
+        samples.setdefault((version if by_version else "", name), []).append(duration)
+    stats = []
+    for (version, name), values in samples.items():
+        values.sort()
+        row = {
+            "step": name,
+            "runs": len(values),
+            "p50": _percentile(values, 0.50),
+            "p95": _percentile(values, 0.95),
+            "max": values[-1],
+        }
+        if by_version:
+            row["version"] = version
+        stats.append(row)
+    return sorted(stats, key=lambda r: (r.get("version", ""), r["step"] == TOTAL, -r["p50"]))
+
+
+def format_stats(stats: list[dict]) -> str:
+    by_version = any("version" in row for row in stats)
+    head = f"{'version':<10} " if by_version else ""
+    lines = [f"{head}{'step':<16} {'runs':>5} {'p50':>9} {'p95':>9} {'max':>9}"]
+    for row in stats:
+        prefix = f"{row['version']:<10} " if by_version else ""
+        lines.append(
+            f"{prefix}{row['step']:<16} {row['runs']:>5} {row['p50'] * 1000:>7.0f}ms "
+            f"{row['p95'] * 1000:>7.0f}ms {row['max'] * 1000:>7.0f}ms"
+        )
+    return "\n".join(lines)
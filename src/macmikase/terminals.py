@@ -0,0 +1,171 @@
+"""Reload running terminal emulators after a theme change.
+
+``reload_terminals`` reads the process table once (``/proc`` on Linux,
+``ps`` elsewhere), matches every registered terminal against that snapshot
+and applies its reload strategy to the matching PIDs directly, instead of a
+``pgrep``/``pkill`` pair per process name.
+
+Terminals are described in the ``TERMINALS`` registry; ``register_terminal``
+adds new ones. A strategy is any object with ``reload(pids) -> (status,
+message)``: ``SignalReload`` sends a signal (kitty and Ghostty reload their
+config on SIGUSR1), ``AutoReload`` covers terminals that watch their own
+config files, and ``ManualReload`` those that must be restarted.
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Protocol
+
+
+@dataclass(frozen=True)
+class Process:
+    pid: int
+    name: str
+
+
+class ProcessTable(Protocol):
+    def processes(self) -> list[Process]: ...
+
+
+class ProcTable:
+    """Process names from ``/proc/<pid>/comm`` (Linux)."""
+
+    def __init__(self, root: Path = Path("/proc")):
+        self.root = root
+
+    def processes(self) -> list[Process]:
+        found = []
+        for entry in os.scandir(self.root):
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(os.path.join(entry.path, "comm")) as f:
+                    name = f.read().rstrip("\n")
+            except OSError:
+                continue  # exited meanwhile
+            found.append(Process(int(entry.name), name))
+        return found
+
+
+class PsTable:
+    """Process names from one ``ps`` call (macOS and other systems without /proc)."""
+
+    def __init__(self, run: Callable[..., subprocess.CompletedProcess] = subprocess.run):
+        self._run = run
+
+    def processes(self) -> list[Process]:
+        result = self._run(
+            ["ps", "-axo", "pid=,comm="], capture_output=True, text=True, check=False
+        )
+        found = []
+        for line in result.stdout.splitlines():
+            pid, _, command = line.strip().partition(" ")
+            if pid.isdigit() and command:
+                # macOS reports the executable path, e.g. /Applications/kitty.app/.../kitty.
+                found.append(Process(int(pid), os.path.basename(command.strip())))
+        return found
+
+
+def process_table() -> ProcessTable:
+    return ProcTable() if os.path.exists("/proc/self/comm") else PsTable()
+
+
+class ReloadStrategy(Protocol):
+    def reload(self, pids: list[int]) -> tuple[str, str]: ...
+
+
+@dataclass(frozen=True)
+class SignalReload:
+    """Send ``sig`` to every process; the terminal re-reads its config."""
+
+    sig: int = signal.SIGUSR1
+    kill: Callable[[int, int], None] = os.kill
+
+    def reload(self, pids: list[int]) -> tuple[str, str]:
+        errors = []
+        for pid in pids:
+            try:
+                self.kill(pid, self.sig)
+            except ProcessLookupError:
+                continue  # exited since the snapshot
+            except OSError as e:
+                errors.append(f"{pid}: {e.strerror or e}")
+        if errors:
+            return "failed", "; ".join(errors)
+        return "reloaded", f"sent {signal.Signals(self.sig).name}"
+
+
+@dataclass(frozen=True)
+class AutoReload:
+    """The terminal watches its config files; nothing to do."""
+
+    def reload(self, pids: list[int]) -> tuple[str, str]:
+        return "auto", "auto-reloads on config change"
+
+
+@dataclass(frozen=True)
+class ManualReload:
+    """No live reload; new windows pick up the theme."""
+
+    def reload(self, pids: list[int]) -> tuple[str, str]:
+        return "manual", "restart to apply"
+
+
+@dataclass(frozen=True)
+class Terminal:
+    name: str
+    processes: tuple[str, ...]  # exact process names (macOS app names and Linux binaries)
+    strategy: ReloadStrategy
+
+
+TERMINALS: dict[str, Terminal] = {}
+
+
+def register_terminal(terminal: Terminal) -> Terminal:
+    TERMINALS[terminal.name] = terminal
+    return terminal
+
+
+register_terminal(Terminal("kitty", ("kitty",), SignalReload()))
+register_terminal(Terminal("ghostty", ("Ghostty", "ghostty"), SignalReload()))
+register_terminal(Terminal("alacritty", ("Alacritty", "alacritty"), AutoReload()))
+register_terminal(Terminal("wezterm", ("wezterm-gui",), AutoReload()))
+register_terminal(Terminal("foot", ("foot",), ManualReload()))
+
+
+@dataclass
+class ReloadResult:
+    terminal: str
+    status: str  # "reloaded", "auto", "manual", "failed" or "not running"
+    pids: list[int] = field(default_factory=list)
+    message: str = ""
+
+
+def reload_terminals(
+    table: ProcessTable | None = None,
+    terminals: list[Terminal] | None = None,
+) -> list[ReloadResult]:
+    """Reload every running terminal from a single process-table snapshot."""
+    terminals = list(TERMINALS.values()) if terminals is None else terminals
+    wanted = {name for terminal in terminals for name in terminal.processes}
+    pids_by_name: dict[str, list[int]] = {}
+    own = os.getpid()
+    for process in (table or process_table()).processes():
+        if process.name in wanted and process.pid != own:
+            pids_by_name.setdefault(process.name, []).append(process.pid)
+
+    results = []
+    for terminal in terminals:
+        pids = sorted(pid for name in terminal.processes for pid in pids_by_name.get(name, []))
+        if not pids:
+            results.append(ReloadResult(terminal.name, "not running"))
+            continue
+        status, message = terminal.strategy.reload(pids)
+        results.append(ReloadResult(terminal.name, status, pids, message))
+    return results
@@ -0,0 +1,344 @@
+"""Propagate a theme's colors from cursor.json to every per-app config.
+
+``cursor.json`` is the source of truth. ``update_theme`` rewrites the colors in
+antigravity.conf, starship.toml, nvim.lua/neovim.lua, ghostty.conf, kitty.conf,
+alacritty.toml and opencode.json in place, leaving everything else in those
+files alone. Each file has a writer in ``WRITERS``; passing a full 16-color
+``ansi`` palette (as ``macmikase.derive`` does for generated themes) makes the
+terminal writers replace the whole palette too.
+
+Run via ``scripts/sync-theme-colors.py`` or ``python -m macmikase.theme_sync``.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from macmikase.palette import ANSI_NAMES
+from macmikase.paths import data_dir
+from macmikase.themes import find_repo_root
+
+# Themes with hand-made palettes: accent/error/warning also set ANSI 2/1/3.
+CUSTOM_THEMES = frozenset({"osaka-jade", "matte-black", "pop-default"})
+
+
+@dataclass(frozen=True)
+class SyncColors:
+    background: str
+    foreground: str
+    accent: str
+    sidebar: str
+    terminal: str
+    error: str | None = None
+    warning: str | None = None
+    # Full ANSI palette to write into the terminal configs, if given.
+    ansi: tuple[str, ...] | None = None
+
+    @classmethod
+    def from_cursor_colors(cls, colors: dict) -> SyncColors | None:
+        """Build from cursor.json ``colors``; None if bg/fg/accent are missing."""
+        bg = colors.get("background")
+        fg = colors.get("foreground")
+        accent = colors.get("accent")
+        if not all([bg, fg, accent]):
+            return None
+        return cls(
+            background=bg,
+            foreground=fg,
+            accent=accent,
+            sidebar=colors.get("sidebar", bg),
+            terminal=colors.get("terminal", bg),
+            error=colors.get("error"),
+            warning=colors.get("warning"),
+        )
+
+    def cursor_colors(self) -> dict[str, str]:
+        """The cursor.json ``colors`` object for these colors."""
+        colors = {
+            "background": self.background,
+            "foreground": self.foreground,
+            "accent": self.accent,
+            "sidebar": self.sidebar,
+            "terminal": self.terminal,
+            "error": self.error,
+            "warning": self.warning,
+        }
+        return {key: value for key, value in colors.items() if value}
+
+
+def _sub(pattern: str, repl: str, content: str, **kwargs) -> str:
+    return re.sub(pattern, repl, content, flags=re.MULTILINE, **kwargs)
+
+
+def write_antigravity(content: str, c: SyncColors, custom: bool) -> str:
+    content = _sub(r"^background=.*", f"background={c.background}", content)
+    content = _sub(r"^foreground=.*", f"foreground={c.foreground}", content)
+    content = _sub(r"^accent=.*", f"accent={c.accent}", content)
+    if c.error:
+        content = _sub(r"^error=.*", f"error={c.error}", content)
+    if c.warning:
+        content = _sub(r"^warning=.*", f"warning={c.warning}", content)
+    return content
+
+
+def write_starship(content: str, c: SyncColors, custom: bool) -> str:
+    content = _sub(r'^base = ".*"', f'base = "{c.background}"', content)
+    content = _sub(r'^text = ".*"', f'text = "{c.foreground}"', content)
+    content = _sub(r'^accent = ".*"', f'accent = "{c.accent}"', content)
+    if c.error:
+        content = _sub(r'^err = ".*"', f'err = "{c.error}"', content)
+    if c.warning:
+        content = _sub(r'^warn = ".*"', f'warn = "{c.warning}"', content)
+    return content
+
+
+def write_neovim(content: str, c: SyncColors, custom: bool) -> str:
+    content = re.sub(r'bg = ".*"', f'bg = "{c.background}"', content)
+    content = re.sub(r'fg = ".*"', f'fg = "{c.foreground}"', content)
+    content = re.sub(r'accent = ".*"', f'accent = "{c.accent}"', content)
+    content = re.sub(r'subtle = ".*"', f'subtle = "{c.sidebar}"', content)
+    if c.error:
+        content = re.sub(r'error = ".*"', f'error = "{c.error}"', content)
+    if c.warning:
+        content = re.sub(r'warn = ".*"', f'warn = "{c.warning}"', content)
+    return content
+
+
+def _custom_ansi(c: SyncColors) -> dict[int, str]:
+    """ANSI overrides used by CUSTOM_THEMES: error=1, accent=2, warning=3."""
+    overrides = {1: c.error, 2: c.accent, 3: c.warning}
+    return {index: color for index, color in overrides.items() if color}
+
+
+def _ghostty_explicit(content: str, c: SyncColors) -> str:
+    """Replace a built-in ``theme = ...`` with explicit colors (full palettes only)."""
+    lines = [line for line in content.splitlines() if not re.match(r"^theme\s*=", line)]
+    lines.append(f"background = {c.terminal}")
+    lines.append(f"foreground = {c.foreground}")
+    lines.extend(f"palette = {index}={color}" for index, color in enumerate(c.ansi or ()))
+    return "\n".join(lines) + "\n"
+
+
+def write_ghostty(content: str, c: SyncColors, custom: bool) -> str:
+    if c.ansi and not re.search(r"^palette = ", content, flags=re.MULTILINE):
+        content = _ghostty_explicit(content, c)
+    for index, color in enumerate(c.ansi or ()):
+        content = _sub(rf"^palette = {index}=.*", f"palette = {index}={color}", content)
+    content = _sub(r"^background = .*", f"background = {c.terminal}", content)
+    content = _sub(r"^foreground = .*", f"foreground = {c.foreground}", content)
+    content = _sub(r"^palette = 0=.*", f"palette = 0={c.sidebar}", content)
+    if custom:
+        for index, color in _custom_ansi(c).items():
+            content = _sub(rf"^palette = {index}=.*", f"palette = {index}={color}", content)
+    return content
+
+
+def _kitty_line(key: str, value: str) -> str:
+    return f"{key:<14}{value}"
+
+
+def write_kitty(content: str, c: SyncColors, custom: bool) -> str:
+    for index, color in enumerate(c.ansi or ()):
+        content = _sub(rf"^color{index}\s+.*", _kitty_line(f"color{index}", color), content)
+    content = _sub(r"^background\s+.*", _kitty_line("background", c.terminal), content)
+    content = _sub(r"^foreground\s+.*", _kitty_line("foreground", c.foreground), content)
+    content = _sub(r"^color0\s+.*", _kitty_line("color0", c.sidebar), content)
+    if custom:
+        for index, color in _custom_ansi(c).items():
+            content = _sub(rf"^color{index}\s+.*", _kitty_line(f"color{index}", color), content)
+    return content
+
+
+_TOML_TABLE_RE = re.compile(r"^\s*\[([^\]]+)\]")
+_TOML_COLOR_RE = re.compile(r'^(\s*)(\w+)(\s*=\s*)"[^"]*"')
+
+
+def _alacritty_ansi(content: str, ansi: tuple[str, ...]) -> str:
+    tables = {
+        "colors.normal": dict(zip(ANSI_NAMES[:8], ansi[:8], strict=True)),
+        "colors.bright": dict(zip(ANSI_NAMES[:8], ansi[8:], strict=True)),
+    }
+    lines = content.splitlines(keepends=True)
+    current = None
+    for i, line in enumerate(lines):
+        table = _TOML_TABLE_RE.match(line)
+        if table:
+            current = tables.get(table.group(1).strip())
+            continue
+        match = _TOML_COLOR_RE.match(line) if current else None
+        if match and match.group(2) in current:
+            indent, key, sep = match.groups()
+            lines[i] = f'{indent}{key}{sep}"{current[key]}"' + line[match.end() :]
+    return "".join(lines)
+
+
+def write_alacritty(content: str, c: SyncColors, custom: bool) -> str:
+    if c.ansi:
+        content = _alacritty_ansi(content, c.ansi)
+    content = _sub(r'^background = ".*"', f'background = "{c.terminal}"', content)
+    content = _sub(r'^foreground = ".*"', f'foreground = "{c.foreground}"', content)
+    # The first black entry is the normal (not bright) black.
+    content = re.sub(r'(?<=black = ").*?(?=")', c.sidebar, content, count=1)
+    if custom:
+        if c.accent:
+            content = re.sub(r'(?<=green = ").*?(?=")', c.accent, content, count=1)
+        if c.error:
+            content = re.sub(r'(?<=red = ").*?(?=")', c.error, content, count=1)
+        if c.warning:
+            content = re.sub(r'(?<=yellow = ").*?(?=")', c.warning, content, count=1)
+    return content
+
+
+def write_opencode(content: str, c: SyncColors, custom: bool) -> str:
+    data = json.loads(content)
+    data["background"] = c.background
+    data["foreground"] = c.foreground
+    data["accent"] = c.accent
+    if c.error:
+        data["error"] = c.error
+    if c.warning:
+        data["warning"] = c.warning
+    return json.dumps(data, indent=2)
+
+
+Writer = Callable[[str, SyncColors, bool], str]
+
+WRITERS: tuple[tuple[str, Writer], ...] = (
+    ("antigravity.conf", write_antigravity),
+    ("starship.toml", write_starship),
+    ("nvim.lua", write_neovim),
+    ("neovim.lua", write_neovim),
+    ("ghostty.conf", write_ghostty),
+    ("kitty.conf", write_kitty),
+    ("alacritty.toml", write_alacritty),
+    ("opencode.json", write_opencode),
+)
+
+
+def read_cursor_colors(theme_path: Path, verbose: bool = True) -> SyncColors | None:
+    cursor_json_path = theme_path / "cursor.json"
+    if not cursor_json_path.exists():
+        if verbose:
+            print(f"  Skipping {theme_path.name}: no cursor.json")
+        return None
+    try:
+        cursor_data = json.loads(cursor_json_path.read_text())
+    except json.JSONDecodeError as e:
+        print(f"  Error reading {cursor_json_path}: {e}")
+        return None
+
+    colors = cursor_data.get("colors", {})
+    if not colors:
+        if verbose:
+            print(f"  Skipping {theme_path.name}: no colors defined")
+        return None
+    sync_colors = SyncColors.from_cursor_colors(colors)
+    if sync_colors is None and verbose:
+        print(f"  Skipping {theme_path.name}: missing required colors (bg/fg/accent)")
+    return sync_colors
+
+
+def update_theme(theme_path: Path, verbose: bool = True, colors: SyncColors | None = None) -> bool:
+    """Update all config files in a theme directory from cursor.json (or ``colors``).
+
+    Files are only rewritten when their content changes.
+    """
+    if colors is None:
+        colors = read_cursor_colors(theme_path, verbose)
+        if colors is None:
+            return False
+
+    custom = theme_path.name in CUSTOM_THEMES
+    updated = []
+    for name, writer in WRITERS:
+        path = theme_path / name
+        if not path.exists():
+            continue
+        content = path.read_text()
+        try:
+            new_content = writer(content, colors, custom)
+        except (json.JSONDecodeError, KeyError) as e:
+            print(f"  Warning: Could not update {name}: {e}")
+            continue
+        if new_content != content:
+            path.write_text(new_content)
+            updated.append(name)
+
+    if verbose and updated:
+        print(f"  Updated: {', '.join(updated)}")
+    return True
+
+
+def find_themes_dir() -> Path:
+    """Find the repo themes directory, else the installed one."""
+    repo_root = find_repo_root()
+    if repo_root is not None:
+        return repo_root / "themes"
+
+    cwd_themes = Path.cwd() / "themes"
+    if cwd_themes.exists():
+        return cwd_themes
+
+    installed = data_dir() / "themes"
+    if installed.exists():
+        return installed
+
+    raise FileNotFoundError("Could not find themes directory")
+
+
+def _main(argv: list[str] | None = None, themes_root: Path | None = None) -> None:
+    """CLI entry point (scripts/sync-theme-colors.py); ``themes_root`` skips discovery."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Synchronize colors from cursor.json to all theme configs."
+    )
+    parser.add_argument(
+        "theme",
+        nargs="?",
+        help="Specific theme to sync (default: all themes)",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Suppress output",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        themes_root = themes_root or find_themes_dir()
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if not args.quiet:
+        print(f"Themes directory: {themes_root}")
+
+    if args.theme:
+        theme_path = themes_root / args.theme
+        if not theme_path.is_dir():
+            print(f"Error: Theme '{args.theme}' not found in {themes_root}", file=sys.stderr)
+            sys.exit(1)
+        if not args.quiet:
+            print(f"Syncing colors for theme: {args.theme}")
+        update_theme(theme_path, verbose=not args.quiet)
+    else:
+        count = 0
+        for theme_dir in sorted(themes_root.iterdir()):
+            if theme_dir.is_dir() and not theme_dir.name.startswith("_"):
+                if not args.quiet:
+                    print(f"Syncing: {theme_dir.name}")
+                if update_theme(theme_dir, verbose=not args.quiet):
+                    count += 1
+        if not args.quiet:
+            print(f"\nSynced {count} themes")
+
+
+if __name__ == "__main__":
+    _main()
@@ -1,53 +1,166 @@
-"""Textual TUI for browsing and applying macmikase themes."""
+"""Textual TUI for browsing and applying macmikase themes.
+
+Only Textual is imported before the first frame. Theme discovery runs in a
+worker, and the list is filled a batch at a time once it finishes. The modules
+behind the preview pane (manifests and YAML, palettes, thumbnails, OSC
+retinting) are imported by another worker meanwhile. ``scripts/bench-tui.py``
+measures time-to-first-paint and per-keystroke latency headlessly.
+"""
 
 from __future__ import annotations
 
 import contextlib
 import subprocess
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+from rich.console import Group
 from rich.style import Style
 from rich.text import Text
-from textual import on
+from textual import work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.containers import Horizontal
 from textual.reactive import reactive
-from textual.widgets import Footer, Header, OptionList, Static
-from textual.widgets.option_list import Option
-from textual.worker import Worker, WorkerState, work
+from textual.widgets import Footer, Header, Static
+from textual.worker import Worker, WorkerState
+
+if TYPE_CHECKING:
+    from textual.widgets import OptionList
+
+# (theme directory, columns, rows)
+_ThumbKey = tuple[Path, int, int]
+
+NO_THEME_DIR = "No theme directory found. Set THEMES_DIR or run 'make install'."
+
+
+def _path_text(active_dir: Path | None) -> str:
+    return f"Themes directory: {active_dir}" if active_dir else NO_THEME_DIR
+
+
+def _theme_details(theme_path: Path) -> Text:
+    """Name, variant, swatches and extras of one theme (reads its files)."""
+    from macmikase.palette import ANSI_NAMES, load_palette
+    from macmikase.themes import load_manifest
 
-from macmikase.themes import discover_theme_dirs, find_theme_cli, list_themes, load_manifest
+    manifest = load_manifest(theme_path)
+    text = Text()
+    text.append(f"Theme: {manifest.name}\n", style="bold")
+    text.append(f"Variant: {manifest.variant}\n\n")
+
+    semantic = {k: v for k, v in manifest.colors.items() if k not in ANSI_NAMES}
+    if semantic:
+        text.append("Colors:\n")
+        for name, hex_color in semantic.items():
+            # Ensure hex_color is valid for Rich
+            clean_color = hex_color if hex_color.startswith("#") else f"#{hex_color}"
+            text.append("██ ", style=Style(color=clean_color))
+            text.append(f"{name}: {hex_color}\n")
+    else:
+        text.append("No colors defined in manifest.\n")
+
+    ansi = load_palette(theme_path).ansi
+    if any(ansi):
+        text.append("\nANSI:\n")
+        for row in (ansi[:8], ansi[8:]):
+            for color in row:
+                text.append("███", style=Style(color=color) if color else None)
+            text.append("\n")
+
+    if manifest.cursor_theme:
+        text.append(f"\nCursor: {manifest.cursor_theme}\n")
+    if manifest.wallpaper:
+        text.append(f"Wallpaper: {manifest.wallpaper}\n")
+    return text
 
 
 class ThemePreview(Static):
-    """Shows color swatches for selected theme."""
+    """Shows a preview.png thumbnail and color swatches for selected theme.
 
-    def update_preview(self, theme_path: Path) -> None:
+    Both are produced by workers and cached per theme, so moving the highlight
+    only swaps cached renderables or starts a worker.
+    """
+
+    # Thumbnail size used before the widget has been laid out.
+    DEFAULT_CELLS = (48, 12)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._theme_path: Path | None = None
+        self._details = Text()
+        self._thumbnail: Text | None = None
+        self._details_cache: dict[Path, Text] = {}
+        self._thumbnails: dict[_ThumbKey, Text | None] = {}
+
+    def clear_cache(self) -> None:
+        self._details_cache.clear()
+        self._thumbnails.clear()
+
+    def _thumbnail_cells(self) -> tuple[int, int]:
+        width, height = self.content_size.width, self.content_size.height
+        if width <= 0 or height <= 0:
+            return self.DEFAULT_CELLS
+        # Leave roughly half the pane for the swatch list below the image.
+        return width, max(4, min(16, height // 2))
+
+    def _show(self) -> None:
+        thumbnail = self._thumbnail
+        self.update(Group(thumbnail, self._details) if thumbnail else self._details)
+
+    @work(exclusive=True, thread=True, group="details")
+    def _load_details(self, theme_path: Path) -> tuple[Path, Text, bool]:
         try:
-            manifest = load_manifest(theme_path)
-            text = Text()
-            text.append(f"Theme: {manifest.name}\n", style="bold")
-            text.append(f"Variant: {manifest.variant}\n\n")
-
-            if manifest.colors:
-                text.append("Colors:\n")
-                for name, hex_color in manifest.colors.items():
-                    # Ensure hex_color is valid for Rich
-                    clean_color = hex_color if hex_color.startswith("#") else f"#{hex_color}"
-                    text.append("██ ", style=Style(color=clean_color))
-                    text.append(f"{name}: {hex_color}\n")
-            else:
-                text.append("No colors defined in manifest.\n")
-
-            if manifest.cursor_theme:
-                text.append(f"\nCursor: {manifest.cursor_theme}\n")
-            if manifest.wallpaper:
-                text.append(f"Wallpaper: {manifest.wallpaper}\n")
-
-            self.update(text)
+            return theme_path, _theme_details(theme_path), True
         except Exception as e:
-            self.update(f"Error loading preview: {e}")
+            return theme_path, Text(f"Error loading preview: {e}"), False
+
+    @work(exclusive=True, thread=True, group="thumbnail")
+    def _load_thumbnail(
+        self, key: _ThumbKey, files_path: Path | None
+    ) -> tuple[_ThumbKey, Text | None]:
+        from macmikase.thumbnails import load_thumbnail, render_half_blocks
+
+        _, cols, rows = key
+        thumb = load_thumbnail(files_path / "preview.png", cols, rows) if files_path else None
+        return key, render_half_blocks(thumb) if thumb else None
+
+    def on_worker_state_changed(self, event: Worker.StateChanged) -> None:
+        if event.state != WorkerState.SUCCESS:
+            return
+        if event.worker.group == "details":
+            theme_path, details, ok = event.worker.result
+            if ok:
+                self._details_cache[theme_path] = details
+            if theme_path == self._theme_path:
+                self._details = details
+                self._show()
+        elif event.worker.group == "thumbnail":
+            key, thumbnail = event.worker.result
+            self._thumbnails[key] = thumbnail
+            if key[0] == self._theme_path:
+                self._thumbnail = thumbnail
+                self._show()
+
+    def update_preview(self, theme_path: Path, files_path: Path | None) -> None:
+        """Show ``theme_path``, reading images from ``files_path`` (None: no images).
+
+        The two differ for a packed theme, whose images stay in the tree the
+        pack was built from.
+        """
+        self._theme_path = theme_path
+        details = self._details_cache.get(theme_path)
+        if details is None:
+            # Manifest and palette are read off the UI thread; the name shows meanwhile.
+            self._details = Text(f"Theme: {theme_path.name}\n", style="bold")
+            self._load_details(theme_path)
+        else:
+            self._details = details
+
+        key = (theme_path, *self._thumbnail_cells())
+        self._thumbnail = self._thumbnails.get(key)
+        if key not in self._thumbnails:
+            self._load_thumbnail(key, files_path)
+        self._show()
 
 
 class ThemeTui(App):
@@ -100,26 +213,38 @@ class ThemeTui(App):
     """
 
     BINDINGS = [
+        Binding("p", "toggle_live_preview", "Live preview"),
         Binding("r", "refresh", "Refresh list"),
         Binding("q", "quit", "Quit"),
     ]
 
     status = reactive("Select a theme and press Enter to apply.")
 
+    # Options added per message-loop turn; OptionList renders each one as it is added.
+    OPTION_BATCH = 100
+
     def __init__(self) -> None:
         super().__init__()
-        self.theme_dirs: list[Path] = discover_theme_dirs()
-        self.active_dir: Path | None = self.theme_dirs[0] if self.theme_dirs else None
+        # Filled in by the _load_themes worker after the first paint.
+        self.theme_dirs: list[Path] = []
+        self.active_dir: Path | None = None
+        # The real directory behind active_dir (they differ for a theme pack).
+        self.files_dir: Path | None = None
+        # Bumped on every reload so batches queued for an older list are dropped.
+        self._list_generation = 0
+        # Textual theme to restore when live preview is switched off.
+        self._saved_theme: str | None = None
+
+    @property
+    def live_preview(self) -> bool:
+        return self._saved_theme is not None
 
     def compose(self) -> ComposeResult:
+        from textual.widgets import OptionList
+
         yield Header(show_clock=True)
         with Static(id="container"):
-            path_text = (
-                f"Themes directory: {self.active_dir}"
-                if self.active_dir
-                else "No theme directory found. Set THEMES_DIR or run 'make install'."
-            )
-            yield Static(path_text, id="path")
+            yield Static("Looking for themes...", id="path")
 
             with Horizontal(id="main-content"):
                 self.option_list = OptionList()
@@ -131,39 +256,121 @@ class ThemeTui(App):
         yield Footer()
 
     def on_mount(self) -> None:
-        self._reload_options()
+        self._load_themes()
+        self._import_preview_modules()
         self.option_list.focus()
 
     def watch_status(self, status: str) -> None:
         with contextlib.suppress(Exception):
             self.query_one("#status", Static).update(status)
 
-    def _reload_options(self) -> None:
+    @work(exclusive=True, thread=True, group="themes")
+    def _load_themes(
+        self, status: str | None = None
+    ) -> tuple[list[Path], Path | None, list[str], str | None]:
+        """Discover theme directories and list the first one's themes."""
+        from macmikase.themepack import source_dir
+        from macmikase.themes import discover_theme_dirs, list_themes
+
+        theme_dirs = discover_theme_dirs()
+        first = theme_dirs[0] if theme_dirs else None
+        files_dir = source_dir(first) if first else None
+        return theme_dirs, files_dir, list_themes(first), status
+
+    @work(thread=True, group="imports")
+    def _import_preview_modules(self) -> None:
+        """Import what the preview pane needs while the list loads, off the UI thread."""
+        import macmikase.palette  # noqa: F401
+        import macmikase.thumbnails  # noqa: F401
+
+    def _show_themes(
+        self,
+        theme_dirs: list[Path],
+        files_dir: Path | None,
+        names: list[str],
+        status: str | None,
+    ) -> None:
+        self.theme_dirs = theme_dirs
+        self.active_dir = theme_dirs[0] if theme_dirs else None
+        self.files_dir = files_dir
+        self.query_one("#path", Static).update(_path_text(self.active_dir))
         self.option_list.clear_options()
-        names = list_themes(self.active_dir)
-        for name in names:
-            self.option_list.add_option(Option(name, id=name))
+        self._list_generation += 1
+        self._add_options(names, self._list_generation)
         if not names:
             self.status = "No themes available. Run 'make install' to populate themes."
         else:
+            if status:
+                self.status = status
             # Select first option by default
             self.option_list.action_first()
 
+    def _add_options(self, names: list[str], generation: int) -> None:
+        """Add ``names`` a batch at a time, letting keys and repaints in between."""
+        from textual.widgets.option_list import Option
+
+        if generation != self._list_generation:
+            return
+        batch, rest = names[: self.OPTION_BATCH], names[self.OPTION_BATCH :]
+        self.option_list.add_options([Option(name, id=name) for name in batch])
+        if rest:
+            self.call_after_refresh(self._add_options, rest, generation)
+
     def action_refresh(self) -> None:
-        self.theme_dirs = discover_theme_dirs()
-        self.active_dir = self.theme_dirs[0] if self.theme_dirs else None
-        path_text = (
-            f"Themes directory: {self.active_dir}"
-            if self.active_dir
-            else "No theme directory found. Set THEMES_DIR or run 'make install'."
-        )
-        self.query_one("#path", Static).update(path_text)
-        self.status = "Theme list refreshed."
-        self._reload_options()
-
-    @work(exclusive=True, thread=True)
+        self.status = "Refreshing theme list..."
+        self.preview.clear_cache()
+        self._load_themes("Theme list refreshed.")
+
+    def _highlighted_theme_path(self) -> Path | None:
+        index = self.option_list.highlighted
+        if self.active_dir is None or index is None:
+            return None
+        return self.active_dir / str(self.option_list.get_option_at_index(index).prompt)
+
+    def _retint(self, theme_path: Path) -> None:
+        """Retint the host terminal with the theme's palette (no files written)."""
+        from macmikase.osc import RESET_SEQUENCES, emit, palette_sequences
+        from macmikase.palette import load_palette
+
+        palette = load_palette(theme_path)
+        if palette.is_empty:
+            emit(RESET_SEQUENCES)
+            self.status = f"No terminal palette in '{theme_path.name}'."
+        elif not emit(palette_sequences(palette)):
+            self.status = "Live preview unavailable: no terminal to write to."
+
+    def _stop_live_preview(self) -> None:
+        if self._saved_theme is None:
+            return
+        from macmikase.osc import RESET_SEQUENCES, emit
+
+        emit(RESET_SEQUENCES)
+        self.theme = self._saved_theme
+        self._saved_theme = None
+
+    def action_toggle_live_preview(self) -> None:
+        if self.live_preview:
+            self._stop_live_preview()
+            self.status = "Live preview off."
+            return
+        theme_path = self._highlighted_theme_path()
+        if theme_path is None:
+            return
+        # ANSI mode draws with the terminal's own palette, so the retint shows
+        # through the whole UI rather than only the border and background.
+        self._saved_theme = self.theme
+        self.theme = "textual-ansi"
+        self.status = "Live preview on: the terminal follows the highlighted theme."
+        self._retint(theme_path)
+
+    def on_unmount(self) -> None:
+        self._stop_live_preview()
+
+    @work(exclusive=True, thread=True, group="apply")
     def _apply_theme_task(self, theme: str) -> str:
         """Apply theme in a background thread."""
+        from macmikase.themes import find_theme_cli
+
         cli = find_theme_cli()
         if not cli:
             return "ERROR: macmikase-theme not found."
@@ -177,19 +384,27 @@ class ThemeTui(App):
 
     def on_worker_state_changed(self, event: Worker.StateChanged) -> None:
         """Handle worker state changes to update status."""
-        if event.state == WorkerState.SUCCESS:
-            self.status = str(event.worker.result)
-        elif event.state == WorkerState.ERROR:
-            self.status = f"CRITICAL ERROR: {event.worker.error}"
-
-    @on(OptionList.OptionHighlighted)
-    def handle_option_highlighted(self, event: OptionList.OptionHighlighted) -> None:
+        if event.worker.group == "themes":
+            if event.state == WorkerState.SUCCESS:
+                self._show_themes(*event.worker.result)
+            elif event.state == WorkerState.ERROR:
+                self.status = f"Could not list themes: {event.worker.error}"
+        elif event.worker.group == "apply":
+            if event.state == WorkerState.SUCCESS:
+                self.status = str(event.worker.result)
+            elif event.state == WorkerState.ERROR:
+                self.status = f"CRITICAL ERROR: {event.worker.error}"
+
+    def on_option_list_option_highlighted(self, event: OptionList.OptionHighlighted) -> None:
         if self.active_dir and event.option:
-            theme_path = self.active_dir / event.option.prompt
-            self.preview.update_preview(theme_path)
-
-    @on(OptionList.OptionSelected)
-    def handle_option_selected(self, event: OptionList.OptionSelected) -> None:
+            name = str(event.option.prompt)
+            theme_path = self.active_dir / name
+            files_path = self.files_dir / name if self.files_dir else None
+            self.preview.update_preview(theme_path, files_path)
+            if self.live_preview:
+                self._retint(theme_path)
+
+    def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
         event.stop()
         theme = event.option.prompt
         self.status = f"Applying '{theme}'..."
@@ -0,0 +1,188 @@
+"""Single-file packed theme archive with an index for fast listing and reads.
+
+A pack (``themes.mmkpack``) holds the small text files of every theme in a
+themes tree plus each theme's resolved manifest and compiled palette:
+
+    MAGIC (8 bytes) | index length (u64 LE) | JSON index | file data
+
+The index maps theme names to ``{"manifest", "palette", "files"}`` where
+``files`` maps a relative path to ``[offset, size]`` in the data section.
+``open_pack`` memory-maps the file and parses only the index, so listing
+themes and loading manifests or palettes costs one open instead of a stat
+and read per theme file; file contents are sliced from the map on demand.
+
+Images (previews, wallpapers, backgrounds) are not packed; they are served by
+the wallpaper store. ``build_pack`` writes a pack next to its source tree
+(``themes/`` -> ``themes.mmkpack``) and the index records the source so
+commands that need real files (``theme`` apply) can fall back to it.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+MAGIC = b"MMKPACK\x01"
+PACK_SUFFIX = ".mmkpack"
+PACK_VERSION = 1
+_HEADER = struct.Struct("<8sQ")
+
+# Files larger than this, and images, stay out of the pack.
+MAX_FILE_SIZE = 256 * 1024
+SKIP_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".webp", ".gif", ".heic"})
+
+
+@dataclass(frozen=True)
+class PackedTheme:
+    pack: ThemePack
+    name: str
+    manifest: dict
+    palette: dict
+    files: dict[str, list[int]]
+
+    def read_bytes(self, rel: str) -> bytes:
+        """Contents of ``rel`` (relative to the theme); KeyError if not packed."""
+        return self.pack.read(self.name, rel)
+
+    def read_text(self, rel: str) -> str:
+        return self.read_bytes(rel).decode(errors="replace")
+
+
+class ThemePack:
+    """A read-only, memory-mapped theme pack."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, length = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a theme pack")
+            index = json.loads(self._map[_HEADER.size : _HEADER.size + length])
+        except (struct.error, json.JSONDecodeError, UnicodeDecodeError) as e:
+            self._map.close()
+            raise ValueError(f"{path} is not a valid theme pack: {e}") from e
+        if index.get("version") != PACK_VERSION:
+            self._map.close()
+            raise ValueError(f"{path}: unsupported pack version {index.get('version')}")
+        self._data = _HEADER.size + length
+        self._themes: dict[str, dict] = index["themes"]
+        self.source = Path(index["source"]) if index.get("source") else None
+
+    def names(self) -> list[str]:
+        return sorted(self._themes)
+
+    def theme(self, name: str) -> PackedTheme | None:
+        entry = self._themes.get(name)
+        if entry is None:
+            return None
+        return PackedTheme(self, name, entry["manifest"], entry["palette"], entry["files"])
+
+    def read(self, name: str, rel: str) -> bytes:
+        offset, size = self._themes[name]["files"][rel]
+        start = self._data + offset
+        return self._map[start : start + size]
+
+    def close(self) -> None:
+        self._map.close()
+
+
+# Open packs by path, reopened when the file is replaced.
+_open: dict[Path, tuple[tuple[int, int, int], ThemePack]] = {}
+
+
+def is_pack(path: Path) -> bool:
+    return path.suffix == PACK_SUFFIX and path.is_file()
+
+
+def open_pack(path: Path) -> ThemePack:
+    """Return the (cached) pack at ``path``; raises OSError or ValueError."""
+    st = path.stat()
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _open.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    pack = ThemePack(path)
+    if cached:
+        cached[1].close()
+    _open[path] = (key, pack)
+    return pack
+
+
+def packed_theme(theme_path: Path) -> PackedTheme | None:
+    """The packed theme for a ``<pack>/<name>`` path, or None for anything else."""
+    if theme_path.parent.suffix != PACK_SUFFIX:
+        return None
+    try:
+        return open_pack(theme_path.parent).theme(theme_path.name)
+    except (OSError, ValueError):
+        return None
+
+
+def source_dir(base: Path) -> Path | None:
+    """The themes directory behind a theme source (a pack's source, or ``base`` itself)."""
+    if base.is_dir():
+        return base
+    try:
+        source = open_pack(base).source
+    except (OSError, ValueError):
+        return None
+    return source if source is not None and source.is_dir() else None
+
+
+def default_pack_path(themes_dir: Path) -> Path:
+    return themes_dir.with_name(themes_dir.name + PACK_SUFFIX)
+
+
+def _packable(path: Path) -> bool:
+    return path.suffix.lower() not in SKIP_SUFFIXES and path.stat().st_size <= MAX_FILE_SIZE
+
+
+def build_pack(themes_dir: Path, dest: Path | None = None) -> Path:
+    """Pack every theme under ``themes_dir`` into ``dest`` (atomically replaced)."""
+    from macmikase.palette import load_palette
+    from macmikase.themes import list_themes, load_manifest
+
+    dest = dest or default_pack_path(themes_dir)
+    themes: dict[str, dict] = {}
+    blobs: list[bytes] = []
+    offset = 0
+    for name in list_themes(themes_dir):
+        theme_path = themes_dir / name
+        files: dict[str, list[int]] = {}
+        for path in sorted(theme_path.rglob("*")):
+            if not path.is_file() or not _packable(path):
+                continue
+            data = path.read_bytes()
+            files[path.relative_to(theme_path).as_posix()] = [offset, len(data)]
+            blobs.append(data)
+            offset += len(data)
+        themes[name] = {
+            "manifest": asdict(load_manifest(theme_path)),
+            "palette": load_palette(theme_path).to_dict(),
+            "files": files,
+        }
+
+    index = json.dumps(
+        {"version": PACK_VERSION, "source": str(themes_dir.resolve()), "themes": themes},
+        separators=(",", ":"),
+        sort_keys=True,
+    ).encode()
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(index)))
+            f.write(index)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return dest
@@ -10,7 +10,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Literal
 
-import yaml
+from macmikase.pathcache import cached
+from macmikase.themepack import PACK_SUFFIX, is_pack, open_pack, packed_theme, source_dir
 
 
 @dataclass
@@ -29,68 +30,169 @@ def _unique_dirs(candidates: Iterable[Path]) -> list[Path]:
     for path in candidates:
         resolved = path.expanduser()
         key = resolved.resolve() if resolved.exists() else resolved
-        if key in seen or not resolved.is_dir():
+        if key in seen or not (resolved.is_dir() or is_pack(resolved)):
             continue
         seen.add(key)
         unique.append(resolved)
     return unique
 
 
-def _find_repo_root() -> Path | None:
-    """Walk up from this file to find the repo root (contains themes/ and bin/)."""
+def find_repo_root() -> Path | None:
+    """Walk up from this file to find the repo root (contains themes/ and bin/).
+
+    Cached (see :mod:`macmikase.pathcache`) until the root or cwd changes.
+    """
+    cwd = os.getcwd()
+    root = cached("repo_root", [__file__, cwd], lambda: _walk_repo_root(Path(cwd)))
+    return Path(root) if root else None
+
+
+def _walk_repo_root(cwd: Path) -> tuple[str | None, list[Path]]:
     current = Path(__file__).resolve().parent
     for _ in range(5):  # Limit search depth
         if (current / "themes").is_dir() and (current / "bin").is_dir():
-            return current
+            return str(current), [current]
         if current.parent == current:
             break
         current = current.parent
     # Also check cwd
-    cwd = Path.cwd()
     if (cwd / "themes").is_dir() and (cwd / "bin").is_dir():
-        return cwd
-    return None
+        return str(cwd), [cwd]
+    return None, [cwd]
 
 
 def discover_theme_dirs() -> list[Path]:
+    """Theme sources in priority order: directories and packs (see themepack).
+
+    ``THEMES_DIR`` may name either; the installed pack is preferred over the
+    installed directory it was built from while no theme directory there is
+    newer than the pack (themes added or edited outside ``themes deploy``,
+    ``themes pack`` and ``watch`` show up from the tree until it is rebuilt).
+    """
     env_dir = os.environ.get("THEMES_DIR")
-    repo_root = _find_repo_root()
+    key = [env_dir, os.getcwd(), str(Path.home()), __file__]
+    return [Path(path) for path in cached("theme_dirs", key, lambda: _discover(env_dir))]
+
+
+def _discover(env_dir: str | None) -> tuple[list[str], list[Path]]:
+    repo_root = find_repo_root()
+    installed = Path.home() / ".local" / "share" / "macmikase"
+    pack, tree = installed / f"themes{PACK_SUFFIX}", installed / "themes"
+    tree_dirs = _theme_tree_dirs(tree)
     candidates = [
-        Path(env_dir) if env_dir else None,
+        Path(env_dir).expanduser() if env_dir else None,
         repo_root / "themes" if repo_root else None,
         Path.cwd() / "themes",
-        Path.home() / ".local" / "share" / "macmikase" / "themes",
+        pack if _pack_is_current(pack, tree_dirs) else None,
+        tree,
     ]
-    return _unique_dirs(path for path in candidates if path is not None)
+    found = _unique_dirs(path for path in candidates if path is not None)
+    # A candidate appearing or disappearing changes its parent's mtime; a theme
+    # added to or rewritten in the tree changes its own or the tree's.
+    watched = [path.parent for path in candidates if path is not None] + tree_dirs
+    return [str(path) for path in found], watched
+
+
+def _theme_tree_dirs(tree: Path) -> list[Path]:
+    """``tree`` and its theme directories (empty if it does not exist)."""
+    try:
+        return [tree, *(p for p in tree.iterdir() if p.is_dir())]
+    except OSError:
+        return []
+
+
+def _pack_is_current(pack: Path, tree_dirs: list[Path]) -> bool:
+    """Whether ``pack`` is at least as new as every directory of its source tree."""
+    try:
+        built = pack.stat().st_mtime_ns
+        return all(d.stat().st_mtime_ns <= built for d in tree_dirs)
+    except OSError:
+        return False
+
+
+def primary_theme_dir(sources: Iterable[Path]) -> Path | None:
+    """First source backed by real files; a pack maps to the tree it was built from."""
+    for base in sources:
+        directory = source_dir(base)
+        if directory is not None:
+            return directory
+    return None
 
 
 def list_themes(base: Path | None) -> list[str]:
+    if base is not None and base.suffix == PACK_SUFFIX:
+        try:
+            return open_pack(base).names()
+        except (OSError, ValueError):
+            return []
     if base is None or not base.is_dir():
         return []
     return sorted(entry.name for entry in base.iterdir() if entry.is_dir())
 
 
+def find_theme(name: str) -> Path | None:
+    """Return the first discovered directory containing theme ``name``."""
+    for base in discover_theme_dirs():
+        path = base / name
+        if path.is_dir() or packed_theme(path) is not None:
+            return path
+    return None
+
+
 def find_theme_cli() -> str | None:
-    repo_root = _find_repo_root()
+    """Locate the macmikase-theme script (cached, see :mod:`macmikase.pathcache`)."""
+    key = [
+        os.environ.get("THEME_CLI"),
+        os.environ.get("PATH"),
+        os.getcwd(),
+        str(Path.home()),
+        __file__,
+    ]
+    return cached("theme_cli", key, _find_theme_cli)
+
+
+def _find_theme_cli() -> tuple[str | None, list[Path]]:
+    repo_root = find_repo_root()
+    local_bin = Path.home() / ".local" / "bin"
     candidates = [
         os.environ.get("THEME_CLI"),
         str(repo_root / "bin" / "macmikase-theme") if repo_root else None,
         shutil.which("macmikase-theme"),
-        str(Path.home() / ".local" / "bin" / "macmikase-theme"),
+        str(local_bin / "macmikase-theme"),
     ]
+    watched = [local_bin]
+    if repo_root is not None:
+        watched.append(repo_root / "bin")
     for candidate in candidates:
         if not candidate:
             continue
-        if shutil.which(candidate):
-            return candidate
+        resolved = shutil.which(candidate)
+        if resolved:
+            return candidate, [*watched, Path(resolved)]
         path = Path(candidate).expanduser()
         if path.is_file() and os.access(path, os.X_OK):
-            return str(path)
-    return None
+            return str(path), [*watched, path]
+    # Not found: an install into any PATH directory should be noticed.
+    path_dirs = [Path(d) for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+    return None, [*watched, *path_dirs]
 
 
 def load_manifest(theme_path: Path) -> ThemeManifest:
-    """Load theme manifest from theme.yaml or fallback to legacy files."""
+    """Load theme manifest from theme.yaml or fallback to legacy files.
+
+    When theme.yaml lists no colors, ``colors`` is filled from the theme's
+    compiled palette (see :mod:`macmikase.palette`). Themes inside a pack are
+    read from its index.
+    """
+    # Imported here: theme discovery (macmikase-themes-dir) needs neither.
+    import yaml
+
+    from macmikase.palette import load_palette
+
+    packed = packed_theme(theme_path)
+    if packed is not None:
+        return ThemeManifest(**packed.manifest)
+
     yaml_path = theme_path / "theme.yaml"
     if yaml_path.exists():
         with open(yaml_path) as f:
@@ -98,7 +200,7 @@ def load_manifest(theme_path: Path) -> ThemeManifest:
             return ThemeManifest(
                 name=data.get("name", theme_path.name),
                 variant=data.get("variant", "dark"),
-                colors=data.get("colors", {}),
+                colors=data.get("colors") or load_palette(theme_path).colors(),
                 cursor_theme=data.get("cursor", {}).get("theme"),
                 cursor_extension=data.get("cursor", {}).get("extension"),
                 wallpaper=data.get("wallpaper"),
@@ -123,7 +225,7 @@ def load_manifest(theme_path: Path) -> ThemeManifest:
     return ThemeManifest(
         name=theme_path.name,
         variant="light" if is_light else "dark",
-        colors={},
+        colors=load_palette(theme_path).colors(),
         cursor_theme=cursor_theme,
         cursor_extension=cursor_extension,
     )
@@ -166,8 +268,12 @@ def _main() -> None:
         for theme in themes:
             print(theme)
     else:
-        # Default: print primary theme directory
-        print(dirs[0])
+        # Default: print primary theme directory (shell scripts need real files)
+        primary = primary_theme_dir(dirs)
+        if primary is None:
+            print("No theme directories found", file=sys.stderr)
+            sys.exit(1)
+        print(primary)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+"""Cached terminal thumbnails of theme preview images.
+
+Each theme ships a ``preview.png``. ``load_thumbnail`` decodes and downscales it
+once per source hash and target cell size, storing the raw RGB pixels in
+``~/.cache/macmikase/thumbnails``; later lookups read that small file instead of
+decoding the PNG again. ``render_half_blocks`` turns the pixels into Rich text
+using the upper half block, giving two pixel rows per terminal cell.
+
+Decoding needs Pillow (``macmikase[images]``); without it no thumbnail is
+produced, but cached thumbnails still render.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from rich.style import Style
+from rich.text import Text
+
+from macmikase.deploy import file_digest
+from macmikase.paths import cache_dir
+
+_MAGIC = b"MKT1"
+_HEADER = struct.Struct(">4sHH")
+
+
+@dataclass(frozen=True)
+class Thumbnail:
+    """Downscaled RGB pixels, ``height`` is in pixels (two per cell row)."""
+
+    width: int
+    height: int
+    pixels: bytes
+
+    def pixel(self, x: int, y: int) -> tuple[int, int, int]:
+        i = (y * self.width + x) * 3
+        return self.pixels[i], self.pixels[i + 1], self.pixels[i + 2]
+
+
+def thumbnails_dir() -> Path:
+    return cache_dir() / "thumbnails"
+
+
+@lru_cache(maxsize=256)
+def _digest(path: Path, size: int, mtime_ns: int) -> str:
+    return file_digest(path)
+
+
+def source_digest(path: Path) -> str:
+    """SHA-256 of ``path``, memoised per size and mtime for this process."""
+    st = path.stat()
+    return _digest(path, st.st_size, st.st_mtime_ns)
+
+
+def cache_path(digest: str, cols: int, rows: int) -> Path:
+    return thumbnails_dir() / f"{digest[:32]}-{cols}x{rows}.rgb"
+
+
+def _read_cached(path: Path) -> Thumbnail | None:
+    try:
+        data = path.read_bytes()
+        magic, width, height = _HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    pixels = data[_HEADER.size :]
+    if magic != _MAGIC or len(pixels) != width * height * 3:
+        return None
+    return Thumbnail(width, height, pixels)
+
+
+def _write_cached(path: Path, thumb: Thumbnail) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(_HEADER.pack(_MAGIC, thumb.width, thumb.height) + thumb.pixels)
+    os.replace(tmp, path)
+
+
+def _decode(source: Path, cols: int, rows: int) -> Thumbnail | None:
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    with Image.open(source) as img:
+        img = img.convert("RGB")
+        # Terminal cells are roughly twice as tall as wide; half blocks make
+        # each cell two square-ish pixels, so fit into cols x (2 * rows).
+        img.thumbnail((cols, rows * 2), Image.Resampling.LANCZOS)
+        width, height = img.size
+        if height % 2:
+            img = img.crop((0, 0, width, height - 1))
+            height -= 1
+        if not width or not height:
+            return None
+        return Thumbnail(width, height, img.tobytes())
+
+
+def load_thumbnail(source: Path, cols: int, rows: int) -> Thumbnail | None:
+    """Return a thumbnail of ``source`` fitting ``cols`` x ``rows`` cells.
+
+    Returns None if the source is missing or cannot be decoded.
+    """
+    if cols <= 0 or rows <= 0 or not source.is_file():
+        return None
+    try:
+        path = cache_path(source_digest(source), cols, rows)
+    except OSError:
+        return None
+    cached = _read_cached(path)
+    if cached is not None:
+        return cached
+    try:
+        thumb = _decode(source, cols, rows)
+    except OSError:
+        return None
+    if thumb is not None:
+        with contextlib.suppress(OSError):
+            _write_cached(path, thumb)
+    return thumb
+
+
+def render_half_blocks(thumb: Thumbnail) -> Text:
+    """Render a thumbnail with ``▀``: foreground is the top pixel, background the bottom."""
+    text = Text()
+    styles: dict[tuple, Style] = {}
+    for y in range(0, thumb.height, 2):
+        for x in range(thumb.width):
+            key = (thumb.pixel(x, y), thumb.pixel(x, y + 1))
+            style = styles.get(key)
+            if style is None:
+                style = styles[key] = Style(color=f"rgb{key[0]}", bgcolor=f"rgb{key[1]}")
+            text.append("▀", style=style)
+        text.append("\n")
+    return text
@@ -0,0 +1,276 @@
+"""Concurrent package-manager updates for macmikase.
+
+Each package manager is a *lane*: an ordered list of steps run one after
+another. Independent lanes run concurrently, while lanes sharing a ``lock``
+are serialised (Homebrew and npm both write into the Homebrew prefix, so they
+must not run at the same time). Output is streamed line by line with a
+per-lane prefix and per-lane durations are appended to a history file.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Literal, TextIO
+
+from macmikase.paths import state_dir
+
+
+@dataclass(frozen=True)
+class Step:
+    """A single command within a lane."""
+
+    argv: tuple[str, ...]
+    allow_failure: bool = False
+
+
+@dataclass(frozen=True)
+class Lane:
+    """An updatable package manager."""
+
+    name: str
+    binary: str
+    steps: tuple[Step, ...]
+    lock: str | None = None
+    description: str = ""
+
+
+@dataclass
+class LaneResult:
+    name: str
+    status: Literal["ok", "failed", "skipped"]
+    duration: float = 0.0
+    returncode: int = 0
+    failed_step: str | None = None
+
+
+LANES: tuple[Lane, ...] = (
+    Lane(
+        "brew",
+        "brew",
+        (Step(("brew", "update")), Step(("brew", "upgrade")), Step(("brew", "cleanup"))),
+        lock="brew",
+        description="Homebrew packages",
+    ),
+    Lane("rustup", "rustup", (Step(("rustup", "update")),), description="Rust toolchain"),
+    Lane(
+        "uv",
+        "uv",
+        (
+            Step(("uv", "self", "update"), allow_failure=True),
+            Step(("uv", "tool", "upgrade", "--all"), allow_failure=True),
+        ),
+        description="uv and uv tools",
+    ),
+    Lane("bun", "bun", (Step(("bun", "upgrade")),), description="Bun"),
+    Lane("juliaup", "juliaup", (Step(("juliaup", "update")),), description="Julia"),
+    Lane(
+        "npm",
+        "npm",
+        (Step(("npm", "update", "-g"), allow_failure=True),),
+        lock="brew",
+        description="Global npm packages",
+    ),
+)
+
+LANE_NAMES = tuple(lane.name for lane in LANES)
+
+
+def default_history_path() -> Path:
+    return state_dir() / "update-history.jsonl"
+
+
+def select_lanes(
+    lanes: Sequence[Lane],
+    only: Iterable[str] | None = None,
+    skip: Iterable[str] | None = None,
+) -> list[Lane]:
+    """Filter lanes by name, preserving their declared order.
+
+    Raises:
+        ValueError: If an unknown lane name is given.
+    """
+    known = {lane.name for lane in lanes}
+    only_set = set(only or ())
+    skip_set = set(skip or ())
+    unknown = sorted((only_set | skip_set) - known)
+    if unknown:
+        raise ValueError(f"Unknown lane(s): {', '.join(unknown)} (known: {', '.join(known)})")
+    return [
+        lane
+        for lane in lanes
+        if (not only_set or lane.name in only_set) and lane.name not in skip_set
+    ]
+
+
+def _group_by_lock(lanes: Sequence[Lane]) -> list[list[Lane]]:
+    """Group lanes into units that may run concurrently with each other."""
+    units: list[list[Lane]] = []
+    by_lock: dict[str, list[Lane]] = {}
+    for lane in lanes:
+        if lane.lock is None:
+            units.append([lane])
+        elif lane.lock in by_lock:
+            by_lock[lane.lock].append(lane)
+        else:
+            by_lock[lane.lock] = [lane]
+            units.append(by_lock[lane.lock])
+    return units
+
+
+@dataclass
+class _Printer:
+    """Serialises prefixed output lines from concurrent lanes."""
+
+    out: TextIO
+    width: int
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def line(self, lane: str, text: str) -> None:
+        with self._lock:
+            self.out.write(f"[{lane:<{self.width}}] {text}\n")
+            self.out.flush()
+
+
+def _run_lane(lane: Lane, printer: _Printer) -> LaneResult:
+    if shutil.which(lane.binary) is None:
+        printer.line(lane.name, f"{lane.binary} not found, skipping")
+        return LaneResult(lane.name, "skipped")
+
+    start = time.monotonic()
+    for step in lane.steps:
+        printer.line(lane.name, f"==> {' '.join(step.argv)}")
+        try:
+            proc = subprocess.Popen(
+                step.argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                text=True,
+                errors="replace",
+            )
+        except OSError as e:
+            printer.line(lane.name, f"failed to start: {e}")
+            return LaneResult(
+                lane.name, "failed", time.monotonic() - start, 127, " ".join(step.argv)
+            )
+        assert proc.stdout is not None
+        for raw in proc.stdout:
+            printer.line(lane.name, raw.rstrip("\n"))
+        returncode = proc.wait()
+        if returncode != 0:
+            if step.allow_failure:
+                printer.line(lane.name, f"(ignored exit code {returncode})")
+                continue
+            printer.line(lane.name, f"failed with exit code {returncode}")
+            return LaneResult(
+                lane.name,
+                "failed",
+                time.monotonic() - start,
+                returncode,
+                " ".join(step.argv),
+            )
+    return LaneResult(lane.name, "ok", time.monotonic() - start)
+
+
+def run_updates(
+    lanes: Sequence[Lane],
+    *,
+    jobs: int | None = None,
+    out: TextIO | None = None,
+) -> list[LaneResult]:
+    """Run lanes concurrently and return their results in lane order."""
+    if not lanes:
+        return []
+    printer = _Printer(out or sys.stdout, max(len(lane.name) for lane in lanes))
+    units = _group_by_lock(lanes)
+    results: dict[str, LaneResult] = {}
+
+    def run_unit(unit: list[Lane]) -> None:
+        for lane in unit:
+            results[lane.name] = _run_lane(lane, printer)
+
+    with ThreadPoolExecutor(max_workers=jobs or len(units)) as pool:
+        for future in [pool.submit(run_unit, unit) for unit in units]:
+            future.result()
+    return [results[lane.name] for lane in lanes]
+
+
+def record_history(results: Sequence[LaneResult], path: Path | None = None) -> None:
+    """Append one run's lane durations to the JSON-lines history file."""
+    path = path or default_history_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "lanes": {r.name: {"status": r.status, "duration": round(r.duration, 3)} for r in results},
+    }
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def load_history(path: Path | None = None) -> list[dict]:
+    path = path or default_history_path()
+    if not path.exists():
+        return []
+    entries = []
+    for line in path.read_text().splitlines():
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return entries
+
+
+def summarize_history(entries: Iterable[dict]) -> list[dict]:
+    """Aggregate per-lane durations, slowest average first.
+
+    Skipped lanes are ignored since they never ran.
+    """
+    durations: dict[str, list[float]] = {}
+    failures: dict[str, int] = {}
+    for entry in entries:
+        for name, lane in entry.get("lanes", {}).items():
+            if lane.get("status") == "skipped":
+                continue
+            durations.setdefault(name, []).append(float(lane.get("duration", 0.0)))
+            if lane.get("status") == "failed":
+                failures[name] = failures.get(name, 0) + 1
+    summary = [
+        {
+            "lane": name,
+            "runs": len(values),
+            "mean": sum(values) / len(values),
+            "max": max(values),
+            "last": values[-1],
+            "failures": failures.get(name, 0),
+        }
+        for name, values in durations.items()
+    ]
+    return sorted(summary, key=lambda row: row["mean"], reverse=True)
+
+
+def format_summary(summary: Sequence[dict]) -> str:
+    lines = [f"{'lane':<10} {'runs':>5} {'mean':>8} {'max':>8} {'last':>8} {'fail':>5}"]
+    for row in summary:
+        lines.append(
+            f"{row['lane']:<10} {row['runs']:>5} {row['mean']:>7.1f}s {row['max']:>7.1f}s "
+            f"{row['last']:>7.1f}s {row['failures']:>5}"
+        )
+    return "\n".join(lines)
+
+
+def format_results(results: Sequence[LaneResult]) -> str:
+    lines = []
+    for r in sorted(results, key=lambda r: r.duration, reverse=True):
+        detail = f" ({r.failed_step} exited {r.returncode})" if r.status == "failed" else ""
+        lines.append(f"  {r.name:<10} {r.status:<8} {r.duration:>7.1f}s{detail}")
+    return "\n".join(lines)
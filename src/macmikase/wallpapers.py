@@ -0,0 +1,350 @@
+"""Content-addressed wallpaper store for macmikase.
+
+Only the ``wallpaper`` named in each theme's ``theme.yaml`` is ever shown, so
+instead of deploying every ``backgrounds/`` image, ``ingest_tree`` places just
+those files in ``~/.local/share/macmikase/wallpapers/objects`` keyed by their
+SHA-256 (cloned from the repo where the filesystem supports it, and
+deduplicated across themes). Objects are never hard-linked: an in-place edit
+of the source would silently change an object under its old hash.
+``index.json`` maps theme names to objects.
+
+At theme-apply time ``materialize`` returns a ready-to-use file for the active
+theme, optionally a variant downscaled to the display resolution and/or
+losslessly recompressed. Variants need Pillow (``pip install
+'macmikase[images]'``) and are cached in ``~/.cache/macmikase/wallpapers`` by
+source hash, so they are generated once per image and size.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+
+from macmikase.deploy import file_digest, place_file
+from macmikase.paths import cache_dir, data_dir
+
+# Re-detect the display resolution at most once a day.
+DISPLAY_SIZE_TTL = 24 * 60 * 60
+
+
+def store_dir() -> Path:
+    return data_dir() / "wallpapers"
+
+
+def variants_dir() -> Path:
+    return cache_dir() / "wallpapers"
+
+
+def object_path(digest: str, suffix: str) -> Path:
+    return store_dir() / "objects" / digest[:2] / f"{digest}{suffix.lower()}"
+
+
+def load_index() -> dict[str, dict]:
+    try:
+        data = json.loads((store_dir() / "index.json").read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_index(index: dict[str, dict]) -> None:
+    path = store_dir() / "index.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".index.json.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(index, indent=1, sort_keys=True) + "\n")
+    os.replace(tmp, path)
+
+
+def theme_wallpaper(theme_path: Path) -> Path | None:
+    """The wallpaper file declared by a theme's ``theme.yaml``, if it exists."""
+    try:
+        with open(theme_path / "theme.yaml") as f:
+            data = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return None
+    rel = data.get("wallpaper") if isinstance(data, dict) else None
+    if not rel:
+        return None
+    path = theme_path / rel
+    return path if path.is_file() else None
+
+
+def is_background(rel: str) -> bool:
+    """Whether a themes-tree relative path is a background image."""
+    parts = rel.split("/")
+    return len(parts) >= 3 and parts[1] == "backgrounds"
+
+
+def background_filter(themes_source: Path) -> Callable[[str], bool]:
+    """A deploy ``exclude`` leaving out backgrounds other than each theme's wallpaper.
+
+    The declared wallpaper stays in the deployed tree so the post-apply script
+    can fall back to it when ``macmikase-wallpaper`` is not installed.
+    """
+    keep = set()
+    for theme in themes_source.iterdir() if themes_source.is_dir() else ():
+        wallpaper = theme_wallpaper(theme) if theme.is_dir() else None
+        if wallpaper is not None:
+            try:
+                keep.add(wallpaper.relative_to(themes_source).as_posix())
+            except ValueError:
+                continue  # declared outside the theme; nothing to keep
+    return lambda rel: is_background(rel) and rel not in keep
+
+
+@dataclass
+class IngestResult:
+    added: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+
+def _ingest_one(source: Path, entry: dict | None) -> dict:
+    st = source.stat()
+    if (
+        entry is not None
+        and entry.get("size") == st.st_size
+        and entry.get("mtime_ns") == st.st_mtime_ns
+        and object_path(entry["sha256"], entry["suffix"]).exists()
+    ):
+        return entry
+    digest = file_digest(source)
+    target = object_path(digest, source.suffix)
+    if not target.exists():
+        place_file(source, target, hardlink=False)
+    return {
+        "sha256": digest,
+        "suffix": source.suffix.lower(),
+        "source": str(source),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+def ingest_tree(themes_source: Path, *, prune: bool = True) -> IngestResult:
+    """Store the declared wallpaper of every theme under ``themes_source``.
+
+    Args:
+        themes_source: Directory of theme directories (the repo ``themes/``).
+        prune: Drop index entries (and unreferenced objects) for themes that
+            no longer exist or no longer declare a wallpaper.
+    """
+    index = load_index()
+    result = IngestResult()
+    seen = set()
+    for theme_path in sorted(p for p in themes_source.iterdir() if p.is_dir()):
+        source = theme_wallpaper(theme_path)
+        if source is None:
+            continue
+        theme = theme_path.name
+        seen.add(theme)
+        old = index.get(theme)
+        index[theme] = _ingest_one(source, old)
+        (result.unchanged if index[theme] == old else result.added).append(theme)
+
+    if prune:
+        for theme in sorted(set(index) - seen):
+            del index[theme]
+            result.removed.append(theme)
+    if result.changed or not (store_dir() / "index.json").exists():
+        _save_index(index)
+        if prune:
+            gc(index)
+    return result
+
+
+def gc(index: dict[str, dict] | None = None) -> list[Path]:
+    """Delete stored objects no theme refers to."""
+    index = load_index() if index is None else index
+    keep = {object_path(e["sha256"], e["suffix"]) for e in index.values()}
+    removed = []
+    objects = store_dir() / "objects"
+    if objects.is_dir():
+        for path in objects.glob("*/*"):
+            if path not in keep:
+                path.unlink(missing_ok=True)
+                removed.append(path)
+    return removed
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    """Parse ``WIDTHxHEIGHT``.
+
+    Raises:
+        ValueError: If the value is not two positive integers.
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*[xX×]\s*(\d+)\s*", value)
+    if not match or not all(int(n) for n in match.groups()):
+        raise ValueError(f"Invalid size {value!r}, expected WIDTHxHEIGHT")
+    return int(match.group(1)), int(match.group(2))
+
+
+def display_size() -> tuple[int, int] | None:
+    """Native pixel size of the main display on macOS (cached for a day)."""
+    cache = cache_dir() / "display-size"
+    try:
+        if time.time() - cache.stat().st_mtime < DISPLAY_SIZE_TTL:
+            return parse_size(cache.read_text())
+    except (OSError, ValueError):
+        pass
+    if sys.platform != "darwin":
+        return None
+    try:
+        out = subprocess.run(
+            ["system_profiler", "SPDisplaysDataType", "-json"],
+            capture_output=True,
+            text=True,
+            timeout=15,
+            check=True,
+        ).stdout
+        displays = [
+            d
+            for gpu in json.loads(out).get("SPDisplaysDataType", [])
+            for d in gpu.get("spdisplays_ndrvs", [])
+        ]
+    except (OSError, subprocess.SubprocessError, json.JSONDecodeError):
+        return None
+    main = next((d for d in displays if d.get("spdisplays_main") == "spdisplays_yes"), None)
+    for display in [main, *displays]:
+        for key in ("_spdisplays_pixels", "_spdisplays_resolution"):
+            match = re.match(r"(\d+)\s*x\s*(\d+)", (display or {}).get(key, ""))
+            if match:
+                size = int(match.group(1)), int(match.group(2))
+                cache.parent.mkdir(parents=True, exist_ok=True)
+                cache.write_text(f"{size[0]}x{size[1]}\n")
+                return size
+    return None
+
+
+def variant(
+    source: Path, digest: str, size: tuple[int, int] | None = None, optimize: bool = False
+) -> Path | None:
+    """Return a cached downscaled and/or recompressed copy of ``source``.
+
+    The image is scaled to cover ``size`` and centre-cropped (never upscaled).
+    PNGs are re-encoded with maximum lossless compression; resized JPEGs are
+    written at high quality. Returns None if Pillow is unavailable or there is
+    nothing to do (image already no larger than ``size`` and not optimising).
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        print("Pillow not installed; using the original wallpaper", file=sys.stderr)
+        return None
+
+    suffix = source.suffix.lower()
+    tag = f"{size[0]}x{size[1]}" if size else "full"
+    target = variants_dir() / f"{digest[:32]}-{tag}{'-opt' if optimize else ''}{suffix}"
+    if target.exists():
+        return target
+
+    with Image.open(source) as img:
+        resize = size is not None and (img.width > size[0] or img.height > size[1])
+        if not resize and not (optimize and suffix == ".png"):
+            return None
+        out = ImageOps.fit(img, size, Image.Resampling.LANCZOS) if resize and size else img.copy()
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        if suffix == ".png":
+            out.save(tmp, format="PNG", optimize=True)
+        else:
+            out.convert("RGB").save(tmp, format="JPEG", quality=95, subsampling=0, optimize=True)
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return target
+
+
+def materialize(
+    theme: str,
+    *,
+    themes_dir: Path | None = None,
+    size: tuple[int, int] | None = None,
+    optimize: bool = False,
+) -> Path:
+    """Return a ready-to-use wallpaper file for ``theme``.
+
+    Themes missing from the store (e.g. user themes added straight to the
+    installed themes directory) are ingested from ``themes_dir`` on demand.
+
+    Raises:
+        FileNotFoundError: If the theme has no stored or declared wallpaper.
+    """
+    index = load_index()
+    entry = index.get(theme)
+    if entry is None or not object_path(entry["sha256"], entry["suffix"]).exists():
+        source = theme_wallpaper(themes_dir / theme) if themes_dir else None
+        if source is None:
+            raise FileNotFoundError(f"No wallpaper stored for theme '{theme}'")
+        entry = index[theme] = _ingest_one(source, None)
+        _save_index(index)
+
+    path = object_path(entry["sha256"], entry["suffix"])
+    if size or optimize:
+        return variant(path, entry["sha256"], size, optimize) or path
+    return path
+
+
+def _main() -> None:
+    """CLI entry point (macmikase-wallpaper)."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage macmikase wallpapers")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    path_parser = sub.add_parser("path", help="Print a ready-to-use wallpaper for a theme")
+    path_parser.add_argument("theme", help="Theme name")
+    path_parser.add_argument("--themes-dir", type=Path, help="Fallback themes directory")
+    path_parser.add_argument(
+        "--size", help="Downscale to WIDTHxHEIGHT, or 'auto' for the main display"
+    )
+    path_parser.add_argument(
+        "--optimize", action="store_true", help="Losslessly recompress PNG wallpapers"
+    )
+
+    ingest_parser = sub.add_parser("ingest", help="Store the wallpapers of a themes tree")
+    ingest_parser.add_argument("source", type=Path, help="Themes directory")
+
+    sub.add_parser("gc", help="Delete unreferenced stored wallpapers")
+
+    args = parser.parse_args()
+
+    if args.command == "path":
+        size = None
+        try:
+            if args.size == "auto":
+                size = display_size()
+            elif args.size:
+                size = parse_size(args.size)
+            print(
+                materialize(
+                    args.theme, themes_dir=args.themes_dir, size=size, optimize=args.optimize
+                )
+            )
+        except (ValueError, OSError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    elif args.command == "ingest":
+        result = ingest_tree(args.source)
+        print(f"{len(result.added)} stored, {len(result.unchanged)} unchanged")
+    else:
+        print(f"Removed {len(gc())} unreferenced wallpaper(s)")
+
+
+if __name__ == "__main__":
+    _main()
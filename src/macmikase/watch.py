@@ -0,0 +1,357 @@
+"""Watch the themes tree and re-apply edits to the active theme.
+
+``ThemeWatcher.run`` waits for changes in a themes directory (inotify on
+Linux, a stat poll elsewhere), lets a burst of events settle for ``debounce``
+seconds and then handles each touched theme once:
+
+1. if ``cursor.json`` changed, the theme's configs are re-synced from it
+   (``theme_sync.update_theme`` only writes files whose content changes);
+2. if chezmoi's ``themes_dir`` is a deployed copy of the watched tree, the
+   deployment is refreshed (stat-only for unchanged files);
+3. if it is the active theme, only the outputs fed by the changed files are
+   re-applied: terminals are reloaded for terminal configs (see
+   :mod:`macmikase.terminals`), editor settings are updated in-process for
+   ``cursor.json`` (see :mod:`macmikase.editors`), btop/opencode/neovim
+   themes are copied into place and anything else falls back to
+   ``chezmoi apply``.
+
+Changes are found by diffing ``(mtime, size)`` snapshots of each theme's
+top-level files, so the watcher's own writes are folded into the batch that
+caused them instead of triggering another round.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import os
+import select
+import shutil
+import struct
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from macmikase.chezmoi import read_chezmoi_data
+from macmikase.deploy import MANIFEST_NAME, deploy_tree
+from macmikase.editors import apply_color_theme, read_cursor_theme
+from macmikase.terminals import reload_terminals
+from macmikase.theme_sync import update_theme
+from macmikase.themepack import build_pack, default_pack_path
+from macmikase.themes import list_themes
+from macmikase.wallpapers import background_filter
+
+DEBOUNCE = 0.15
+POLL_INTERVAL = 0.5
+
+TERMINAL_CONFIGS = frozenset({"ghostty.conf", "kitty.conf", "alacritty.toml"})
+# Files run_after_10-setup-theme.sh copies into place, relative to $HOME.
+COPIED_OUTPUTS = {
+    "btop.theme": ".config/btop/themes/{theme}.theme",
+    "opencode.json": ".config/opencode/themes/{theme}.json",
+    "neovim.lua": ".config/nvim/lua/macmikase/theme.lua",
+}
+# Files that feed no applied output.
+IGNORED = frozenset({"preview.png"})
+
+Snapshot = dict[str, tuple[int, int]]
+
+
+def snapshot(theme_path: Path) -> Snapshot:
+    """``(mtime_ns, size)`` of each top-level file; dotfiles (editor temp files) are skipped."""
+    files: Snapshot = {}
+    try:
+        entries = os.scandir(theme_path)
+    except OSError:
+        return files
+    with entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_file():
+                    st = entry.stat()
+                    files[entry.name] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+    return files
+
+
+def changed_files(old: Snapshot, new: Snapshot) -> set[str]:
+    return {name for name in old.keys() | new.keys() if old.get(name) != new.get(name)}
+
+
+@dataclass
+class Plan:
+    """Outputs of the active theme to refresh for a set of changed files."""
+
+    terminals: bool = False
+    cursor: bool = False
+    copies: list[str] = field(default_factory=list)
+    chezmoi: bool = False
+
+    @property
+    def empty(self) -> bool:
+        return not (self.terminals or self.cursor or self.copies or self.chezmoi)
+
+
+def plan_outputs(changed: set[str]) -> Plan:
+    plan = Plan()
+    for name in sorted(changed - IGNORED):
+        if name in TERMINAL_CONFIGS:
+            plan.terminals = True
+        elif name == "cursor.json":
+            plan.cursor = True
+        elif name in COPIED_OUTPUTS:
+            plan.copies.append(name)
+        else:
+            plan.chezmoi = True
+    if plan.chezmoi:
+        # chezmoi apply re-runs the setup script, which copies and reloads everything.
+        plan.terminals, plan.copies = False, []
+    return plan
+
+
+class PollingWatcher:
+    """Portable watcher: re-stats every theme's files each ``interval`` seconds."""
+
+    kind = "polling"
+
+    def __init__(self, themes_dir: Path, interval: float = POLL_INTERVAL):
+        self.themes_dir = themes_dir
+        self.interval = interval
+        self._state = self._scan()
+
+    def _scan(self) -> dict[str, Snapshot]:
+        return {name: snapshot(self.themes_dir / name) for name in list_themes(self.themes_dir)}
+
+    def wait(self, timeout: float | None) -> set[str]:
+        """Block up to ``timeout`` seconds (forever if None); return the touched themes."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            state = self._scan()
+            touched = {
+                name
+                for name in state.keys() | self._state.keys()
+                if state.get(name) != self._state.get(name)
+            }
+            self._state = state
+            if touched:
+                return touched
+            remaining = self.interval if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+# inotify(7) constants from linux/inotify.h
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Linux watcher: one inotify watch on the tree and one per theme directory."""
+
+    kind = "inotify"
+
+    def __init__(self, themes_dir: Path):
+        self.themes_dir = themes_dir
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.fd = fd
+        self._themes: dict[int, str | None] = {}
+        self._add(themes_dir, None)
+        for name in list_themes(themes_dir):
+            self._add(themes_dir / name, name)
+
+    def _add(self, path: Path, theme: str | None) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd >= 0:
+            self._themes[wd] = theme
+
+    def wait(self, timeout: float | None) -> set[str]:
+        """Block up to ``timeout`` seconds (forever if None); return the touched themes."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        touched: set[str] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            start = offset + _EVENT.size
+            name = os.fsdecode(data[start : start + length].rstrip(b"\0"))
+            offset = start + length
+            theme = self._themes.get(wd)
+            if theme is not None:
+                touched.add(theme)
+            elif mask & _IN_ISDIR and name:
+                # A theme directory was added to or removed from the tree.
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._add(self.themes_dir / name, name)
+                touched.add(name)
+        return touched
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(themes_dir: Path, *, poll: bool = False) -> InotifyWatcher | PollingWatcher:
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(themes_dir)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(themes_dir)
+
+
+@dataclass
+class Outcome:
+    theme: str
+    changed: list[str]
+    synced: list[str] = field(default_factory=list)
+    applied: list[str] = field(default_factory=list)
+
+    def describe(self) -> str:
+        parts = [f"{self.theme}: {', '.join(self.changed)}"]
+        if self.synced:
+            parts.append(f"synced {', '.join(self.synced)}")
+        if self.applied:
+            parts.append(f"applied {', '.join(self.applied)}")
+        return "; ".join(parts)
+
+
+Runner = Callable[..., object]
+
+
+class ThemeWatcher:
+    """Turns batches of touched themes into sync, deploy and re-apply steps."""
+
+    def __init__(
+        self,
+        themes_dir: Path,
+        *,
+        apply: bool = True,
+        run: Runner = subprocess.run,
+        log: Callable[[str], None] = print,
+    ):
+        self.themes_dir = themes_dir
+        self.apply = apply
+        self._run = run
+        self._log = log
+        self.snapshots = {name: snapshot(themes_dir / name) for name in list_themes(themes_dir)}
+
+    def _target(self) -> tuple[str | None, Path | None, bool]:
+        """Active theme, the directory it is applied from, and whether that is a deployed copy."""
+        data = read_chezmoi_data()
+        theme = data.get("theme")
+        if not data.get("themes_dir"):
+            return theme, self.themes_dir, False
+        applied_dir = Path(data["themes_dir"]).expanduser()
+        if applied_dir.resolve() == self.themes_dir.resolve():
+            return theme, applied_dir, False
+        if (applied_dir / MANIFEST_NAME).is_file():
+            return theme, applied_dir, True
+        # The active theme comes from a tree this watcher does not feed.
+        return theme, None, False
+
+    def handle(self, touched: set[str]) -> list[Outcome]:
+        """Sync, deploy and re-apply the themes in ``touched``; returns what changed."""
+        outcomes = []
+        for name in sorted(touched):
+            path = self.themes_dir / name
+            before = self.snapshots.get(name, {})
+            after = snapshot(path)
+            changed = changed_files(before, after)
+            if not changed:
+                continue
+            outcome = Outcome(name, sorted(changed))
+            if "cursor.json" in changed and (path / "cursor.json").is_file():
+                update_theme(path, verbose=False)
+                synced = snapshot(path)
+                outcome.synced = sorted(changed_files(after, synced))
+                changed |= set(outcome.synced)
+                after = synced
+            self.snapshots[name] = after
+            outcomes.append((outcome, changed))
+        if not outcomes:
+            return []
+
+        active, applied_dir, deployed = self._target()
+        if deployed and applied_dir is not None:
+            exclude = background_filter(self.themes_dir)
+            result = deploy_tree(self.themes_dir, applied_dir, exclude=exclude)
+            pack = default_pack_path(applied_dir)
+            if result.changed and pack.exists():
+                build_pack(applied_dir, pack)
+
+        for outcome, changed in outcomes:
+            if self.apply and applied_dir is not None and outcome.theme == active:
+                outcome.applied = self._apply(outcome.theme, applied_dir, plan_outputs(changed))
+        return [outcome for outcome, _ in outcomes]
+
+    def _apply(self, theme: str, themes_dir: Path, plan: Plan) -> list[str]:
+        applied = []
+        for name in plan.copies:
+            source = themes_dir / theme / name
+            dest = Path.home() / COPIED_OUTPUTS[name].format(theme=theme)
+            if not source.is_file():
+                continue
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, dest)
+            applied.append(name)
+        if plan.chezmoi and shutil.which("chezmoi"):
+            self._run(["chezmoi", "apply", "--force"], check=False, capture_output=True)
+            applied.append("chezmoi")
+        if plan.cursor:
+            try:
+                color_theme, _extension = read_cursor_theme(themes_dir / theme)
+            except (OSError, ValueError):
+                color_theme = None
+            if color_theme:
+                results = apply_color_theme(color_theme)
+                if any(result.status == "updated" for result in results):
+                    applied.append("editors")
+        if plan.terminals:
+            reload_terminals()
+            applied.append("terminals")
+        return applied
+
+    def run(self, *, debounce: float = DEBOUNCE, poll: bool = False) -> None:
+        """Watch until interrupted."""
+        watcher = make_watcher(self.themes_dir, poll=poll)
+        self._log(f"Watching {self.themes_dir} ({watcher.kind}); Ctrl-C to stop")
+        try:
+            while True:
+                touched = watcher.wait(None)
+                # Let the burst (editor save, sync writes) settle before acting.
+                while more := watcher.wait(debounce):
+                    touched |= more
+                start = time.perf_counter()
+                outcomes = self.handle(touched)
+                elapsed = (time.perf_counter() - start) * 1000
+                for outcome in outcomes:
+                    self._log(f"{outcome.describe()} ({elapsed:.0f} ms)")
+        finally:
+            watcher.close()
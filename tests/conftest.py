@@ -6,6 +6,14 @@ import pytest
 import yaml
 
 
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path_factory, monkeypatch):
+    """Keep every test out of the real home (path, palette and thumbnail caches)."""
+    home = tmp_path_factory.mktemp("home")
+    monkeypatch.setenv("HOME", str(home))
+    return home
+
+
 @pytest.fixture
 def tmp_themes_dir(tmp_path):
     """Create a temporary themes directory with sample themes."""
@@ -63,8 +71,9 @@ def sample_config_file(tmp_path, sample_config_dict):
 
 @pytest.fixture
 def mock_home(tmp_path, monkeypatch):
-    """Mock Path.home() to return a temporary directory."""
+    """Mock Path.home() (and HOME, for subprocesses) to return a temporary directory."""
     monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    monkeypatch.setenv("HOME", str(tmp_path))
     return tmp_path
 
 
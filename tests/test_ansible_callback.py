@@ -0,0 +1,149 @@
+"""Tests for the macmikase Ansible callback plugin (ansible/callback_plugins)."""
+
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PLUGIN_DIR = REPO_ROOT / "ansible" / "callback_plugins"
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("ansible-playbook") is None, reason="ansible-playbook not installed"
+)
+
+
+def _write(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+@pytest.fixture
+def playbook_dir(tmp_path):
+    """A tiny playbook including two phase roles, the second of which fails."""
+    _write(
+        tmp_path / "ansible.cfg",
+        f"[defaults]\ncallback_plugins = {PLUGIN_DIR}\ncallbacks_enabled = macmikase\n"
+        "roles_path = roles\n",
+    )
+    _write(
+        tmp_path / "playbook.yml",
+        """- hosts: localhost
+  connection: local
+  gather_facts: false
+  tasks:
+    - name: Marker outside any role
+      ansible.builtin.debug:
+        msg: start
+    - name: Include homebrew role
+      ansible.builtin.include_role:
+        name: homebrew
+    - name: Include web role
+      ansible.builtin.include_role:
+        name: web
+""",
+    )
+    _write(
+        tmp_path / "roles/homebrew/tasks/main.yml",
+        """- name: First homebrew task
+  ansible.builtin.debug:
+    msg: one
+- name: Second homebrew task
+  ansible.builtin.command: "true"
+  changed_when: true
+""",
+    )
+    _write(
+        tmp_path / "roles/web/tasks/main.yml",
+        """- name: Failing web task
+  ansible.builtin.fail:
+    msg: boom
+""",
+    )
+    return tmp_path
+
+
+def _run(playbook_dir: Path, events: Path | None, log: Path | None = None) -> list[dict]:
+    env = {
+        **os.environ,
+        "ANSIBLE_CONFIG": str(playbook_dir / "ansible.cfg"),
+        "MACMIKASE_EVENTS_LOG": str(log) if log else "",
+    }
+    env.pop("MACMIKASE_EVENTS", None)
+    if events is not None:
+        env["MACMIKASE_EVENTS"] = str(events)
+    subprocess.run(
+        ["ansible-playbook", "-i", "localhost,", "playbook.yml"],
+        cwd=playbook_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if events is None or not events.exists():
+        return []
+    return [json.loads(line) for line in events.read_text().splitlines()]
+
+
+def test_reports_phase_boundaries(playbook_dir, tmp_path):
+    events = _run(playbook_dir, tmp_path / "events.jsonl")
+    events = [e for e in events if not e["event"].startswith("task_")]
+
+    kinds = [(e["event"], e.get("phase")) for e in events]
+    assert kinds == [
+        ("playbook_start", None),
+        ("phase_start", "homebrew"),
+        ("phase_end", "homebrew"),
+        ("phase_start", "web"),
+        ("phase_end", "web"),
+        ("playbook_end", None),
+    ]
+
+    homebrew_end = events[2]
+    assert homebrew_end["status"] == "ok"
+    assert homebrew_end["changed"] == 1
+    assert events[1]["index"] == 1 and events[1]["total"] == 4
+
+    assert events[4]["status"] == "failed"
+    assert events[5]["status"] == "failed"
+
+
+def test_reports_task_results(playbook_dir, tmp_path):
+    events = _run(playbook_dir, tmp_path / "events.jsonl")
+
+    ends = {e["task"]: e for e in events if e["event"] == "task_end"}
+    assert ends["Second homebrew task"]["status"] == "changed"
+    assert ends["Second homebrew task"]["role"] == "homebrew"
+    assert ends["Second homebrew task"]["host"] == "localhost"
+    assert ends["Failing web task"]["status"] == "failed"
+    assert ends["Marker outside any role"]["phase"] is None
+    assert all(e["duration"] >= 0 for e in ends.values())
+    assert len({e["run"] for e in events}) == 1
+
+
+def test_appends_runs_to_history_log(playbook_dir, tmp_path):
+    log = tmp_path / "state" / "install-events.jsonl"
+    _run(playbook_dir, None, log)
+    _run(playbook_dir, None, log)
+
+    events = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len({e["run"] for e in events}) == 2
+
+
+def test_history_log_keeps_only_recent_runs(playbook_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("MACMIKASE_EVENTS_KEEP", "2")
+    log = tmp_path / "state" / "install-events.jsonl"
+    for _ in range(3):
+        _run(playbook_dir, None, log)
+
+    events = [json.loads(line) for line in log.read_text().splitlines()]
+    starts = [e["run"] for e in events if e["event"] == "playbook_start"]
+    assert len(starts) == 2
+    assert {e["run"] for e in events} == set(starts)
+
+
+def test_noop_without_event_paths(playbook_dir):
+    assert _run(playbook_dir, None) == []
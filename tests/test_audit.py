@@ -0,0 +1,99 @@
+"""Tests for macmikase.audit and macmikase.colorspace."""
+
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from macmikase.audit import ThemeInput, audit_palettes, load_inputs  # noqa: E402
+from macmikase.cli import main  # noqa: E402
+from macmikase.colorspace import (  # noqa: E402
+    contrast_ratio,
+    hex_to_rgb,
+    relative_luminance,
+    srgb_to_oklab,
+)
+from macmikase.palette import Palette  # noqa: E402
+
+NORMAL = (
+    "#000000",
+    "#ee3333",
+    "#00aa00",
+    "#aaaa00",
+    "#6699ff",
+    "#dd55dd",
+    "#00aaaa",
+    "#cccccc",
+)
+ANSI = NORMAL + ("#888888",) + NORMAL[1:]
+
+
+def dark(**overrides):
+    values = {"foreground": "#eeeeee", "background": "#111111", "ansi": ANSI}
+    values.update(overrides)
+    return Palette(**values)
+
+
+def test_wcag_contrast_black_on_white():
+    lum = relative_luminance(hex_to_rgb(["#000000", "#ffffff"]))
+    assert contrast_ratio(lum[0], lum[1]) == pytest.approx(21.0)
+
+
+def test_oklab_white_and_missing():
+    lab = srgb_to_oklab(hex_to_rgb(["#ffffff", None]))
+    assert lab[0] == pytest.approx([1.0, 0.0, 0.0], abs=1e-3)
+    assert np.isnan(lab[1]).all()
+
+
+def test_clean_palette_has_no_issues():
+    (report,) = audit_palettes([ThemeInput("ok", dark())])
+    assert report.detected == "dark"
+    assert report.issues == []
+
+
+def test_low_text_contrast_is_an_error():
+    (report,) = audit_palettes([ThemeInput("dim", dark(foreground="#222222"))])
+    assert [issue.check for issue in report.errors] == ["contrast"]
+
+
+def test_hue_collision_is_a_warning():
+    ansi = list(ANSI)
+    ansi[5] = ansi[1]  # magenta == red
+    (report,) = audit_palettes([ThemeInput("same", dark(ansi=tuple(ansi)))])
+    messages = [issue.message for issue in report.warnings if issue.check == "delta-e"]
+    assert messages == ["red and magenta are nearly identical (ΔE 0.000)"]
+
+
+def test_variant_mismatch():
+    reports = audit_palettes(
+        [
+            ThemeInput("marked", dark(), variant="dark", light_mode=True),
+            ThemeInput("declared", dark(), variant="light", light_mode=True),
+        ]
+    )
+    assert [i.message for i in reports[0].errors] == ["light.mode is present but variant is 'dark'"]
+    assert [i.message for i in reports[1].errors] == ["variant is 'light' but the palette is dark"]
+
+
+def test_missing_palette():
+    (report,) = audit_palettes([ThemeInput("empty", Palette())])
+    assert report.detected is None
+    assert report.errors[0].check == "palette"
+
+
+def test_load_inputs_skips_templates(mock_home, tmp_themes_dir):
+    (tmp_themes_dir / "_base").mkdir()
+    names = [theme.name for theme in load_inputs(tmp_themes_dir)]
+    assert names == ["catppuccin", "nord", "tokyo-night"]
+
+
+def test_cli_audit_json_and_exit_code(mock_home, tmp_themes_dir, capsys):
+    argv = ["themes", "audit", "--themes-dir", str(tmp_themes_dir), "--json"]
+    assert main(argv) == 0
+    payload = json.loads(capsys.readouterr().out)
+    assert [report["name"] for report in payload] == ["catppuccin", "nord", "tokyo-night"]
+    assert payload[0]["text_contrast"] == 21.0
+
+    (tmp_themes_dir / "nord" / "light.mode").touch()
+    assert main(argv) == 1
@@ -0,0 +1,100 @@
+"""Tests for macmikase.bundle and macmikase.__main__."""
+
+import os
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+import tomllib
+
+import macmikase.__main__ as entry
+from macmikase.bundle import build_zipapp, split_vendorable, write_shim
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+class FakeDist:
+    def __init__(self, requires=(), files=()):
+        self.requires = list(requires)
+        self.files = [Path(f) for f in files]
+
+
+def test_tools_mirror_project_scripts():
+    with open(REPO / "pyproject.toml", "rb") as f:
+        scripts = tomllib.load(f)["project"]["scripts"]
+    assert scripts == entry.TOOLS
+
+
+def test_main_dispatches_by_tool_name(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["macmikase"])
+    with pytest.raises(SystemExit) as exc:
+        entry.main(["macmikase-themes-dir"])
+    assert exc.value.code in (0, None)
+    assert sys.argv == ["macmikase-themes-dir"]
+    assert capsys.readouterr().out.strip().endswith("themes")
+
+
+def test_split_vendorable_excludes_compiled_and_dependents():
+    dists = {
+        "core": FakeDist(files=["core/_core.cpython-311-darwin.so"]),
+        "model": FakeDist(requires=["core==2.0"]),
+        "app": FakeDist(requires=["model>=1", "pure; python_version < '4'"]),
+        "pure": FakeDist(requires=["core; extra == 'speedups'"], files=["pure/__init__.py"]),
+    }
+    pure, external = split_vendorable(dists)
+    assert pure == [dists["pure"]]
+    assert external == [dists["app"], dists["core"], dists["model"]]
+
+
+def test_write_shim(tmp_path):
+    archive = tmp_path / "dist" / "macmikase.pyz"
+    source = tmp_path / "src"
+    shim = write_shim(tmp_path / "bin" / "macmikase-py", archive, "/opt/py 3/python", source)
+    text = shim.read_text()
+    assert text.startswith("#!/bin/sh\n")
+    assert f"exec '/opt/py 3/python' -s -E {archive} \"$@\"" in text
+    assert f"find {source} -name '*.py' -newer {archive}" in text
+    assert shim.stat().st_mode & 0o111
+
+
+def test_shim_falls_back_while_any_source_is_newer(tmp_path):
+    archive = tmp_path / "macmikase.pyz"
+    module = tmp_path / "src" / "macmikase" / "sub" / "mod.py"
+    module.parent.mkdir(parents=True)
+    module.write_text("")
+    archive.write_bytes(b"")
+    # /bin/echo stands in for the interpreter, showing which command would run.
+    shim = write_shim(tmp_path / "macmikase-py", archive, "/bin/echo", module.parents[1])
+
+    def runs() -> str:
+        return subprocess.run([shim, "tool"], capture_output=True, text=True).stdout.strip()
+
+    os.utime(module, (1_000, 1_000))
+    assert runs() == f"-s -E {archive} tool"
+    # An in-place edit leaves the package directory's own mtime untouched.
+    os.utime(module.parents[1], (1_000, 1_000))
+    module.write_text("x = 1\n")
+    assert runs() == "-s -m macmikase tool"
+
+
+def test_build_zipapp_runs_tools(tmp_path):
+    output = tmp_path / "macmikase.pyz"
+    result = build_zipapp(REPO, output, vendor=False)
+
+    assert result.size == output.stat().st_size
+    assert result.vendored == []
+    with zipfile.ZipFile(output) as zf:
+        names = set(zf.namelist())
+    assert {"__main__.py", "macmikase/cli.py", "macmikase/cli.pyc"} <= names
+    assert not any("__pycache__" in n for n in names)
+
+    proc = subprocess.run(
+        [sys.executable, str(output), "macmikase-cli", "--help"],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.startswith("usage: macmikase")
@@ -1,8 +1,11 @@
 """Tests for macmikase.chezmoi module."""
 
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from macmikase.chezmoi import update_chezmoi_data
+from macmikase import cli
+from macmikase.chezmoi import config_path, set_chezmoi_data, set_theme_data, update_chezmoi_data
 
 
 class TestUpdateChezmoiData:
@@ -120,6 +123,7 @@ font_family = "Custom Font"
         # No .tmp file should remain
         tmp_file = config_path.with_suffix(".tmp")
         assert not tmp_file.exists()
+        assert not list(config_dir.glob("*.tmp"))
 
     def test_sets_defaults_on_new_config(self, tmp_path, monkeypatch):
         """Test that default values are set when creating new config."""
@@ -136,3 +140,76 @@ font_family = "Custom Font"
         assert 'font_family = "JetBrainsMono Nerd Font"' in content
         assert "font_size = 9" in content
         assert "padding = 14" in content
+
+
+class TestSetChezmoiData:
+    """Tests for the locked, change-aware data store."""
+
+    def test_unchanged_values_skip_the_write(self, tmp_path, monkeypatch):
+        """Setting the values already present does not touch the file."""
+        monkeypatch.setattr(Path, "home", lambda: tmp_path)
+        assert set_theme_data("nord", "/themes") is True
+        mtime = config_path().stat().st_mtime_ns
+
+        assert set_theme_data("nord", "/themes") is False
+        assert config_path().stat().st_mtime_ns == mtime
+        assert set_theme_data("tokyo-night", "/themes") is True
+
+    def test_keeps_mode_and_other_sections(self, tmp_path, monkeypatch):
+        """Other tables and the file mode survive a rewrite."""
+        monkeypatch.setattr(Path, "home", lambda: tmp_path)
+        path = config_path()
+        path.parent.mkdir(parents=True)
+        path.write_text('[git]\nautoCommit = true\n\n[data]\ntheme = "old"\n')
+        path.chmod(0o600)
+
+        assert set_chezmoi_data({"theme": "nord"}) is True
+        assert "autoCommit = true" in path.read_text()
+        assert path.stat().st_mode & 0o777 == 0o600
+
+    def test_concurrent_updates_are_not_lost(self, tmp_path):
+        """Each writer's read-modify-write runs under the lock."""
+        path = tmp_path / "chezmoi.toml"
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: set_chezmoi_data({f"key{i}": i}, path=path), range(32)))
+
+        content = path.read_text()
+        assert all(f"key{i} = {i}" in content for i in range(32))
+        assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_theme_skips_chezmoi_apply_when_unchanged(mock_home, tmp_themes_dir, monkeypatch):
+    """A switch to the current theme does not run chezmoi apply."""
+    monkeypatch.setattr(cli, "discover_theme_dirs", lambda: [tmp_themes_dir])
+    calls = []
+    monkeypatch.setattr(
+        cli.subprocess,
+        "run",
+        lambda cmd, **_kw: calls.append(cmd) or subprocess.CompletedProcess(cmd, 0, "", ""),
+    )
+    argv = ["theme", "nord", "--no-helpers"]
+    assert cli.main(argv) == 0
+    assert cli.main(argv) == 0
+    assert calls == [["chezmoi", "apply", "--force"]]
+
+    assert cli.main([*argv, "--reapply"]) == 0
+    assert len(calls) == 2
+
+
+def test_theme_retries_chezmoi_apply_until_it_succeeds(mock_home, tmp_themes_dir, monkeypatch):
+    """A failed or skipped apply is not mistaken for an up-to-date theme."""
+    monkeypatch.setattr(cli, "discover_theme_dirs", lambda: [tmp_themes_dir])
+    codes = [1, 0, 0]
+    calls = []
+
+    def fake_run(cmd, **_kw):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, codes.pop(0), "", "boom")
+
+    monkeypatch.setattr(cli.subprocess, "run", fake_run)
+    argv = ["theme", "nord", "--no-helpers"]
+    assert cli.main([*argv, "--no-apply"]) == 0
+    assert cli.main(argv) == 1
+    assert cli.main(argv) == 0
+    assert cli.main(argv) == 0
+    assert len(calls) == 2
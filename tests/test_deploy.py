@@ -0,0 +1,131 @@
+"""Tests for macmikase.deploy module."""
+
+import json
+import os
+
+import pytest
+
+from macmikase.cli import main
+from macmikase.deploy import MANIFEST_NAME, deploy_tree, load_manifest
+
+
+@pytest.fixture
+def source(tmp_path):
+    src = tmp_path / "themes"
+    (src / "nord" / "backgrounds").mkdir(parents=True)
+    (src / "nord" / "theme.yaml").write_text("name: Nord\n")
+    (src / "nord" / "backgrounds" / "1.png").write_bytes(b"\x89PNG" + b"\0" * 64)
+    (src / "gruvbox").mkdir()
+    (src / "gruvbox" / "theme.yaml").write_text("name: Gruvbox\n")
+    return src
+
+
+def test_first_deploy_writes_everything(source, tmp_path):
+    dest = tmp_path / "dest"
+    result = deploy_tree(source, dest)
+
+    assert sorted(result.written) == [
+        "gruvbox/theme.yaml",
+        "nord/backgrounds/1.png",
+        "nord/theme.yaml",
+    ]
+    assert (dest / "nord" / "theme.yaml").read_text() == "name: Nord\n"
+    assert set(load_manifest(dest)) == set(result.written)
+
+
+def test_redeploy_unchanged_is_stat_only(source, tmp_path, monkeypatch):
+    dest = tmp_path / "dest"
+    deploy_tree(source, dest, hardlink=False)
+
+    def no_hashing(path):
+        raise AssertionError(f"hashed {path}")
+
+    monkeypatch.setattr("macmikase.deploy.file_digest", no_hashing)
+    result = deploy_tree(source, dest, hardlink=False)
+    assert not result.changed
+    assert result.unchanged == 3
+
+
+def test_only_changed_files_are_rewritten(source, tmp_path):
+    dest = tmp_path / "dest"
+    deploy_tree(source, dest, hardlink=False)
+    (source / "nord" / "theme.yaml").write_text("name: Nord 2\n")
+
+    result = deploy_tree(source, dest, hardlink=False)
+    assert result.written == ["nord/theme.yaml"]
+    assert (dest / "nord" / "theme.yaml").read_text() == "name: Nord 2\n"
+
+
+def test_same_content_new_mtime_is_retimed(source, tmp_path):
+    dest = tmp_path / "dest"
+    deploy_tree(source, dest, hardlink=False)
+    path = source / "gruvbox" / "theme.yaml"
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+
+    result = deploy_tree(source, dest, hardlink=False)
+    assert result.touched == ["gruvbox/theme.yaml"]
+    assert not result.changed
+    assert deploy_tree(source, dest, hardlink=False).unchanged == 3
+
+
+def test_stale_files_removed_but_user_files_kept(source, tmp_path):
+    dest = tmp_path / "dest"
+    deploy_tree(source, dest)
+    (dest / "custom").mkdir()
+    (dest / "custom" / "theme.yaml").write_text("mine\n")
+    (source / "gruvbox" / "theme.yaml").unlink()
+    (source / "gruvbox").rmdir()
+
+    result = deploy_tree(source, dest)
+    assert result.removed == ["gruvbox/theme.yaml"]
+    assert not (dest / "gruvbox").exists()
+    assert (dest / "custom" / "theme.yaml").exists()
+
+
+def test_deleted_destination_file_is_restored(source, tmp_path):
+    dest = tmp_path / "dest"
+    deploy_tree(source, dest)
+    (dest / "nord" / "theme.yaml").unlink()
+
+    assert deploy_tree(source, dest).written == ["nord/theme.yaml"]
+
+
+def test_hardlinks_share_inode(source, tmp_path):
+    dest = tmp_path / "dest"
+    result = deploy_tree(source, dest)
+    if not result.linked:
+        pytest.skip("hard links not supported here")
+    assert (dest / "nord" / "theme.yaml").samefile(source / "nord" / "theme.yaml")
+
+
+def test_dry_run_writes_nothing(source, tmp_path):
+    dest = tmp_path / "dest"
+    result = deploy_tree(source, dest, dry_run=True)
+    assert len(result.written) == 3
+    assert not dest.exists()
+
+
+def test_exclude_removes_previously_deployed(source, tmp_path):
+    dest = tmp_path / "dest"
+    deploy_tree(source, dest)
+    result = deploy_tree(source, dest, exclude=lambda rel: rel.endswith(".png"))
+    assert result.removed == ["nord/backgrounds/1.png"]
+    assert not (dest / "nord" / "backgrounds").exists()
+
+
+def test_cli_themes_deploy_json(mock_home, source, tmp_path, capsys):
+    (source / "nord" / "theme.yaml").write_text("name: Nord\nwallpaper: backgrounds/1.png\n")
+    (source / "nord" / "backgrounds" / "2.png").write_bytes(b"unused")
+    dest = tmp_path / "dest"
+    argv = ["themes", "deploy", "--source", str(source), "--dest", str(dest), "--json"]
+    assert main(argv) == 0
+    payload = json.loads(capsys.readouterr().out)
+    assert payload["changed"] is True
+    assert payload["wallpapers"]["added"] == ["nord"]
+    # Only the declared wallpaper is deployed, for the post-apply fallback.
+    assert (dest / "nord" / "backgrounds" / "1.png").exists()
+    assert not (dest / "nord" / "backgrounds" / "2.png").exists()
+
+    assert main(argv) == 0
+    assert json.loads(capsys.readouterr().out)["changed"] is False
+    assert (dest / MANIFEST_NAME).exists()
@@ -0,0 +1,132 @@
+"""Tests for macmikase.derive module."""
+
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from macmikase.audit import ThemeInput, audit_palettes, load_inputs  # noqa: E402
+from macmikase.cli import main  # noqa: E402
+from macmikase.derive import derive_variant, fill_missing, generate_theme, is_light  # noqa: E402
+from macmikase.palette import Palette, load_palette  # noqa: E402
+
+NORD_NORMAL = (
+    "#3b4252",
+    "#bf616a",
+    "#a3be8c",
+    "#ebcb8b",
+    "#81a1c1",
+    "#b48ead",
+    "#88c0d0",
+    "#e5e9f0",
+)
+NORD = Palette(
+    foreground="#d8dee9",
+    background="#2e3440",
+    ansi=NORD_NORMAL + (None,) * 8,
+)
+
+
+def audit_palettes_for(palette, variant):
+    theme = ThemeInput("t", palette, variant=variant, light_mode=variant == "light")
+    return audit_palettes([theme])
+
+
+def test_fill_missing_derives_brights_and_semantics():
+    filled = fill_missing(NORD)
+    assert all(filled.ansi)
+    assert filled.ansi[:8] == NORD_NORMAL
+    assert filled.accent == "#81a1c1"
+    assert filled.error == "#bf616a"
+    assert filled.cursor == NORD.foreground
+    assert filled.selection_background not in (None, NORD.background)
+
+
+def test_fill_missing_requires_base_colors():
+    with pytest.raises(ValueError):
+        fill_missing(Palette(foreground="#ffffff"))
+
+
+def test_light_variant_is_light_and_readable():
+    light = derive_variant(NORD, "light")
+    assert is_light(light)
+    (report,) = audit_palettes_for(light, "light")
+    assert report.errors == []
+    assert not [i for i in report.warnings if i.check == "contrast"]
+
+
+def test_dim_keeps_kind_and_lowers_contrast():
+    dim = derive_variant(NORD, "dim")
+    assert not is_light(dim)
+    (base,) = audit_palettes_for(fill_missing(NORD), "dark")
+    (report,) = audit_palettes_for(dim, "dark")
+    assert report.text_contrast < base.text_contrast
+    assert report.text_contrast >= 4.5
+
+
+def test_same_kind_and_unknown_variant_rejected():
+    with pytest.raises(ValueError, match="already dark"):
+        derive_variant(NORD, "dark")
+    with pytest.raises(ValueError, match="unknown variant"):
+        derive_variant(NORD, "sepia")
+
+
+def test_derive_is_memoised():
+    derive_variant.cache_clear()
+    derive_variant(NORD, "light")
+    derive_variant(NORD, "light")
+    assert derive_variant.cache_info().hits == 1
+
+
+@pytest.fixture
+def base_theme(tmp_themes_dir):
+    nord = tmp_themes_dir / "nord"
+    (nord / "theme.yaml").write_text(
+        "name: Nord\nvariant: dark\ncolors: {}\nwallpaper: backgrounds/1.png\n"
+    )
+    (nord / "backgrounds" / "1.png").write_bytes(b"png")
+    (nord / "backgrounds" / "2.png").write_bytes(b"unused")
+    (nord / "preview.png").write_bytes(b"preview")
+    (nord / "cursor.json").write_text(
+        json.dumps(
+            {"colorTheme": "Nord", "colors": {"background": "#2e3440", "foreground": "#d8dee9"}}
+        )
+    )
+    kitty = ["foreground    #d8dee9", "background    #2e3440"]
+    kitty += [f"color{i:<9}{c}" for i, c in enumerate(NORD_NORMAL)]
+    (nord / "kitty.conf").write_text("\n".join(kitty) + "\n")
+    (nord / "ghostty.conf").write_text("theme = Nord\n")
+    return nord
+
+
+def test_generate_theme(mock_home, base_theme, tmp_themes_dir):
+    dest = generate_theme(base_theme, tmp_themes_dir / "nord-light", "light")
+
+    assert (dest / "light.mode").exists()
+    assert (dest / "backgrounds" / "1.png").exists()
+    assert not (dest / "backgrounds" / "2.png").exists()
+    assert not (dest / "preview.png").exists()
+    assert "name: Nord Light" in (dest / "theme.yaml").read_text()
+
+    palette = load_palette(dest)
+    assert is_light(palette)
+    assert all(palette.ansi)
+    cursor = json.loads((dest / "cursor.json").read_text())
+    assert cursor["colorTheme"] == "Nord"
+    assert cursor["colors"]["background"] == palette.background
+
+    (report,) = audit_palettes(load_inputs(tmp_themes_dir, ["nord-light"]))
+    assert report.errors == []
+
+    with pytest.raises(FileExistsError):
+        generate_theme(base_theme, dest, "light")
+
+
+def test_cli_themes_derive(mock_home, base_theme, tmp_themes_dir, capsys):
+    argv = ["themes", "derive", "nord", "--variant", "dim", "--themes-dir", str(tmp_themes_dir)]
+    assert main(argv) == 0
+    assert (tmp_themes_dir / "nord-dim" / "theme.yaml").exists()
+    assert main(argv) == 1
+    assert "already exists" in capsys.readouterr().err
+    assert main([*argv, "--force"]) == 0
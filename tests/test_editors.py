@@ -0,0 +1,108 @@
+"""Tests for macmikase.editors module."""
+
+import json
+
+import pytest
+
+from macmikase.cli import main
+from macmikase.editors import (
+    EDITORS,
+    apply_color_theme,
+    get_jsonc_value,
+    set_jsonc_value,
+    update_settings,
+)
+
+SETTINGS = """{
+  // Fonts
+  "editor.fontSize": 14, // large
+  "workbench.colorTheme": "Old Theme", /* set by macmikase */
+  "files.exclude": {"**/.git": true, "a//b": false},
+}
+"""
+
+
+def test_replace_keeps_comments_and_layout():
+    patched = set_jsonc_value(SETTINGS, "workbench.colorTheme", "Nord")
+    assert patched == SETTINGS.replace('"Old Theme"', '"Nord"')
+    assert get_jsonc_value(patched, "workbench.colorTheme") == "Nord"
+    assert get_jsonc_value(patched, "files.exclude") == {"**/.git": True, "a//b": False}
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        (
+            '{\n\t"a": 1 // note\n}\n',
+            '{\n\t"a": 1, // note\n\t"workbench.colorTheme": "Nord"\n}\n',
+        ),
+        ('{\n  "a": 1,\n}\n', '{\n  "a": 1,\n  "workbench.colorTheme": "Nord",\n}\n'),
+        ("{}\n", '{\n    "workbench.colorTheme": "Nord"\n}\n'),
+        ("", '{\n    "workbench.colorTheme": "Nord"\n}\n'),
+    ],
+)
+def test_insert_missing_key(text, expected):
+    assert set_jsonc_value(text, "workbench.colorTheme", "Nord") == expected
+
+
+def test_invalid_settings_rejected():
+    with pytest.raises(ValueError):
+        set_jsonc_value("[1, 2]", "k", "v")
+    with pytest.raises(ValueError):
+        set_jsonc_value('{"a": 1', "k", "v")
+    assert get_jsonc_value('{"a": ', "a") is None
+
+
+def test_update_settings_skips_unchanged(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(SETTINGS)
+    assert update_settings(path, {"workbench.colorTheme": "Nord"})
+    mtime = path.stat().st_mtime_ns
+    assert not update_settings(path, {"workbench.colorTheme": "Nord"})
+    assert path.stat().st_mtime_ns == mtime
+    assert "// Fonts" in path.read_text()
+
+
+def test_update_settings_writes_through_symlink(tmp_path):
+    target = tmp_path / "dotfiles" / "settings.json"
+    target.parent.mkdir()
+    target.write_text("{}\n")
+    link = tmp_path / "settings.json"
+    link.symlink_to(target)
+    assert update_settings(link, {"workbench.colorTheme": "Nord"})
+    assert link.is_symlink()
+    assert get_jsonc_value(target.read_text(), "workbench.colorTheme") == "Nord"
+
+
+@pytest.fixture
+def editors(mock_home):
+    """Cursor and VS Code installed; Antigravity not."""
+    for editor in EDITORS[:2]:
+        editor.support_dir.mkdir(parents=True)
+    EDITORS[1].settings_path.parent.mkdir()
+    EDITORS[1].settings_path.write_text(SETTINGS)
+    return mock_home
+
+
+def test_apply_color_theme_to_detected_editors(editors):
+    results = apply_color_theme("Nord")
+    assert [(r.editor, r.status) for r in results] == [
+        ("Cursor", "updated"),
+        ("VS Code", "updated"),
+    ]
+    assert json.loads(EDITORS[0].settings_path.read_text()) == {"workbench.colorTheme": "Nord"}
+    assert [r.status for r in apply_color_theme("Nord")] == ["unchanged", "unchanged"]
+    assert [r.editor for r in apply_color_theme("Nord", only=["code"])] == ["VS Code"]
+
+
+def test_cli_editors_apply(editors, tmp_themes_dir, capsys):
+    (tmp_themes_dir / "nord" / "cursor.json").write_text('{"colorTheme": "Nord"}')
+    argv = ["editors", "apply", "nord", "--themes-dir", str(tmp_themes_dir)]
+    assert main(argv) == 0
+    assert "Updated Cursor settings" in capsys.readouterr().out
+    assert main([*argv, "--json"]) == 0
+    payload = json.loads(capsys.readouterr().out)
+    assert {e["status"] for e in payload["editors"]} == {"unchanged"}
+    assert main([*argv, "--only", "vim"]) == 1
+    # Themes without cursor.json are skipped, as in macmikase-theme-cursor.
+    assert main(["editors", "apply", "catppuccin", "--themes-dir", str(tmp_themes_dir)]) == 0
@@ -0,0 +1,125 @@
+"""Tests for macmikase.extensions module."""
+
+import json
+import subprocess
+import threading
+
+import pytest
+
+from macmikase import extensions
+from macmikase.cli import main
+from macmikase.editors import EDITORS
+from macmikase.extensions import (
+    install,
+    install_command,
+    installed_extensions,
+    list_path,
+    missing_extensions,
+    read_list,
+)
+
+CURSOR, CODE, _ = EDITORS
+
+
+def write_installed(editor, ids, obsolete=()):
+    editor.extensions_dir.mkdir(parents=True, exist_ok=True)
+    entries = [
+        {"identifier": {"id": ext}, "version": "1.0.0", "relativeLocation": f"{ext}-1.0.0"}
+        for ext in ids
+    ]
+    (editor.extensions_dir / "extensions.json").write_text(json.dumps(entries))
+    if obsolete:
+        obsolete_json = json.dumps({f"{ext}-1.0.0": True for ext in obsolete})
+        (editor.extensions_dir / ".obsolete").write_text(obsolete_json)
+
+
+class FakeCLI:
+    """Records invocations and installs everything except ``broken``."""
+
+    def __init__(self, broken=()):
+        self.calls = []
+        self.broken = set(broken)
+        self.lock = threading.Lock()
+
+    def __call__(self, cmd):
+        editor = next(e for e in EDITORS if cmd[0].endswith(e.command))
+        wanted = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "--install-extension"]
+        with self.lock:
+            self.calls.append(cmd)
+            ids = installed_extensions(editor)
+            write_installed(editor, ids + [e for e in wanted if e not in self.broken])
+        stderr = "".join(f"Extension '{e}' not found.\n" for e in wanted if e in self.broken)
+        return subprocess.CompletedProcess(cmd, 1 if stderr else 0, "", stderr)
+
+
+@pytest.fixture
+def editors(mock_home, monkeypatch):
+    """Cursor and VS Code installed, with CLIs on PATH."""
+    for editor in (CURSOR, CODE):
+        editor.support_dir.mkdir(parents=True)
+    monkeypatch.setattr(extensions.shutil, "which", lambda cmd: f"/usr/local/bin/{cmd}")
+    return mock_home
+
+
+def test_read_list_skips_comments_and_duplicates(tmp_path):
+    path = tmp_path / "extensions.txt"
+    path.write_text("# Python\nms-python.python\n\n  charliermarsh.ruff # lint\nMS-Python.Python\n")
+    assert read_list(path) == ["ms-python.python", "charliermarsh.ruff"]
+
+
+def test_installed_reads_manifest_without_obsolete(editors):
+    assert installed_extensions(CURSOR) == []
+    write_installed(CURSOR, ["b.two", "A.one", "c.gone"], obsolete=["c.gone"])
+    assert installed_extensions(CURSOR) == ["A.one", "b.two"]
+    assert missing_extensions(["a.one", "d.four"], installed_extensions(CURSOR)) == ["d.four"]
+
+
+def test_install_batches_missing_per_editor(editors):
+    write_installed(CURSOR, ["a.one"])
+    cli = FakeCLI()
+    results = install({CURSOR: ["a.one", "b.two", "c.three"], CODE: ["a.one"]}, run=cli)
+    assert [(r.editor, r.status, r.installed) for r in results] == [
+        ("Cursor", "installed", ["b.two", "c.three"]),
+        ("VS Code", "installed", ["a.one"]),
+    ]
+    assert sorted(cli.calls) == [
+        install_command("/usr/local/bin/code", ["a.one"]),
+        install_command("/usr/local/bin/cursor", ["b.two", "c.three"]),
+    ]
+
+    cli.calls.clear()
+    results = install({CURSOR: ["A.ONE", "b.two"]}, run=cli)
+    assert results[0].status == "unchanged"
+    assert cli.calls == []
+
+
+def test_install_reports_failed_extensions(editors):
+    results = install({CURSOR: ["a.one", "bad.ext"]}, run=FakeCLI(broken=["bad.ext"]))
+    assert results[0].status == "error"
+    assert results[0].installed == ["a.one"]
+    assert results[0].failed == ["bad.ext"]
+    assert "not found" in results[0].message
+
+
+def test_cli_diff_reads_files_only(editors, capsys, monkeypatch):
+    monkeypatch.setattr(extensions, "_run", pytest.fail)
+    list_path(CURSOR).write_text("a.one\nb.two\n")
+    write_installed(CURSOR, ["a.one", "z.extra"])
+    assert main(["editors", "extensions", "diff", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out) == {
+        "Cursor": {"missing": ["b.two"], "extra": ["z.extra"]}
+    }
+
+
+def test_cli_install_and_export(editors, tmp_path, capsys, monkeypatch):
+    cli = FakeCLI()
+    monkeypatch.setattr(extensions, "_run", cli)
+    argv = ["editors", "extensions", "install", "--extension", "a.one", "--only", "code"]
+    assert main(argv) == 0
+    assert "VS Code: installed a.one" in capsys.readouterr().out
+    assert len(cli.calls) == 1
+
+    exported = tmp_path / "list.txt"
+    assert main(["editors", "extensions", "export", "-f", str(exported), "--only", "code"]) == 0
+    assert read_list(exported) == ["a.one"]
+    assert main(["editors", "extensions", "install", "-f", str(tmp_path / "missing.txt")]) == 1
@@ -0,0 +1,105 @@
+"""Tests for macmikase.extract module."""
+
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from macmikase import extract  # noqa: E402
+from macmikase.audit import ThemeInput, audit_palettes  # noqa: E402
+from macmikase.cli import main  # noqa: E402
+from macmikase.derive import is_light  # noqa: E402
+from macmikase.extract import (  # noqa: E402
+    clusters,
+    downsample,
+    extract_palette,
+    kmeans,
+    write_candidate,
+)
+
+
+@pytest.fixture
+def wallpaper(tmp_path):
+    """A mostly dark-navy image with a red and a smaller teal block."""
+    img = Image.new("RGB", (640, 400), (20, 24, 40))
+    img.paste((200, 40, 50), (0, 0, 200, 200))
+    img.paste((40, 180, 170), (400, 300, 520, 400))
+    path = tmp_path / "wall.png"
+    img.save(path)
+    return path
+
+
+def test_downsample_block_averages(wallpaper):
+    samples = downsample(wallpaper, max_samples=1000)
+    assert samples.shape[1] == 3
+    assert 0 < len(samples) <= 1000
+    assert samples.min() >= 0.0 and samples.max() <= 1.0
+
+
+def test_kmeans_sorted_by_size():
+    rng = np.random.default_rng(1)
+    points = np.concatenate([rng.normal(0.0, 0.01, (300, 3)), rng.normal(1.0, 0.01, (100, 3))])
+    centroids, counts = kmeans(points, 2)
+    assert counts.tolist() == [300, 100]
+    assert np.allclose(centroids[0], 0.0, atol=0.01)
+    assert np.allclose(centroids[1], 1.0, atol=0.01)
+
+
+def test_clusters_cached_by_image_hash(mock_home, wallpaper, monkeypatch):
+    first = clusters(wallpaper, 4)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("k-means should not run on a cache hit")
+
+    monkeypatch.setattr(extract, "kmeans", fail)
+    second = clusters(wallpaper, 4)
+    assert np.allclose(first[0], second[0])
+    assert first[1].tolist() == second[1].tolist()
+
+
+def test_extract_palette_is_dark_and_readable(mock_home, wallpaper):
+    palette = extract_palette(wallpaper)
+    assert all(palette.ansi)
+    assert not is_light(palette)
+    report = audit_palettes([ThemeInput("wall", palette)])[0]
+    assert report.errors == []
+    # The red block is the most common saturated color.
+    r, g, b = (int(palette.accent[i : i + 2], 16) for i in (1, 3, 5))
+    assert r > g and r > b
+
+
+def test_write_candidate(mock_home, wallpaper, tmp_path):
+    dest = tmp_path / "wall-theme"
+    palette = extract_palette(wallpaper)
+    written = write_candidate(palette, dest, name="Wall", wallpaper="wall.png")
+    assert [path.name for path in written] == ["cursor.json", "theme.yaml"]
+
+    cursor = json.loads((dest / "cursor.json").read_text())
+    assert cursor["colorTheme"] == "Default Dark Modern"
+    assert cursor["colors"]["background"] == palette.background
+
+    with pytest.raises(FileExistsError):
+        write_candidate(palette, dest, name="Wall")
+    write_candidate(palette, dest, name="Wall", force=True)
+
+
+def test_cli_themes_extract(mock_home, wallpaper, tmp_path, capsys):
+    assert main(["themes", "extract", str(wallpaper), "--json"]) == 0
+    colors = json.loads(capsys.readouterr().out)
+    assert colors["background"].startswith("#")
+
+    dest = tmp_path / "wall"
+    assert main(["themes", "extract", str(wallpaper), "-o", str(dest)]) == 0
+    assert "Wrote" in capsys.readouterr().out
+    assert (dest / "theme.yaml").exists()
+    assert main(["themes", "extract", str(wallpaper), "-o", str(dest)]) == 1
+    assert "already exists" in capsys.readouterr().err
+
+
+def test_cli_themes_extract_bad_image(mock_home, tmp_path, capsys):
+    bad = tmp_path / "empty.png"
+    bad.write_bytes(b"")
+    assert main(["themes", "extract", str(bad)]) == 1
+    assert "Error" in capsys.readouterr().err
@@ -0,0 +1,126 @@
+"""Tests for macmikase.install module."""
+
+import json
+
+import yaml
+
+from macmikase.cli import main
+from macmikase.install import (
+    changed_sections,
+    config_sections,
+    load_events,
+    load_snapshot,
+    phase_timings,
+    recent_runs,
+    save_snapshot,
+    tags_for_sections,
+    task_timings,
+)
+
+
+def _task(run, task, duration, role="homebrew", status="ok"):
+    return {
+        "event": "task_end",
+        "run": run,
+        "task": task,
+        "role": role,
+        "status": status,
+        "changed": status == "changed",
+        "duration": duration,
+    }
+
+
+def _events():
+    return [
+        {"event": "playbook_start", "run": "a"},
+        _task("a", "Install casks", 30.0),
+        _task("a", "Install brew packages", 10.0),
+        {"event": "phase_end", "run": "a", "phase": "homebrew", "duration": 40.0},
+        {"event": "playbook_start", "run": "b"},
+        _task("b", "Install casks", 50.0, status="failed"),
+        _task("b", "Install brew packages", 2.0, status="changed"),
+        {"event": "phase_end", "run": "b", "phase": "homebrew", "duration": 52.0},
+    ]
+
+
+def test_load_events_skips_bad_lines(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text(json.dumps({"event": "playbook_start", "run": "a"}) + "\n{truncated\n")
+    assert load_events(path) == [{"event": "playbook_start", "run": "a"}]
+    assert load_events(tmp_path / "missing.jsonl") == []
+
+
+def test_recent_runs():
+    assert recent_runs(_events()) == ["a", "b"]
+    assert recent_runs(_events(), limit=1) == ["b"]
+
+
+def test_task_timings_ranks_slowest_first():
+    rows = task_timings(_events())
+
+    assert [r["task"] for r in rows] == ["Install casks", "Install brew packages"]
+    casks = rows[0]
+    assert casks["runs"] == 2
+    assert casks["mean"] == 40.0
+    assert casks["max"] == 50.0
+    assert casks["failed"] == 1
+    assert rows[1]["changed"] == 1
+
+
+def test_timings_filtered_by_run():
+    rows = task_timings(_events(), runs=["a"])
+    assert rows[0]["mean"] == 30.0
+    assert phase_timings(_events(), runs=["b"]) == {"homebrew": 52.0}
+
+
+def test_changed_sections_detects_added_cask(sample_config_file, sample_config_dict):
+    old = config_sections(sample_config_file)
+    sample_config_dict["cask"] = {"apps": [{"name": "raycast"}]}
+    sample_config_file.write_text(yaml.dump(sample_config_dict))
+    new = config_sections(sample_config_file)
+
+    changed = changed_sections(old, new)
+    assert changed == ["cask"]
+    assert tags_for_sections(changed) == ["cask"]
+
+
+def test_changed_sections_ignores_string_normalisation(sample_config_file, sample_config_dict):
+    old = config_sections(sample_config_file)
+    sample_config_dict["uv_tools"][0] = {"name": "ruff"}
+    sample_config_file.write_text(yaml.dump(sample_config_dict))
+    assert changed_sections(old, config_sections(sample_config_file)) == []
+
+
+def test_tags_for_sections():
+    assert tags_for_sections(["brew", "cargo_tools"]) == ["brew", "cargo_tools", "runtimes"]
+    assert tags_for_sections(["scripts"]) == []
+    assert tags_for_sections(["mystery"]) is None
+
+
+def test_snapshot_roundtrip(mock_home, sample_config_file):
+    assert load_snapshot() is None
+    sections = config_sections(sample_config_file)
+    path = save_snapshot(sections, sample_config_file)
+
+    assert path == mock_home / ".local/state/macmikase/install-snapshot.json"
+    assert load_snapshot() == sections
+
+
+def test_install_changed_plans_only_affected_tags(
+    mock_home, sample_config_file, sample_config_dict, capsys
+):
+    save_snapshot(config_sections(sample_config_file), sample_config_file)
+    sample_config_dict["go_tools"] = [{"name": "gopls", "package": "golang.org/x/tools/gopls"}]
+    sample_config_file.write_text(yaml.dump(sample_config_dict))
+
+    argv = ["install", "--config", str(sample_config_file), "--changed", "--dry-run"]
+    assert main(argv) == 0
+    out = capsys.readouterr().out
+    assert "Changed sections: go_tools" in out
+    assert "--tags go_tools" in out
+
+
+def test_install_changed_noop_when_unchanged(mock_home, sample_config_file, capsys):
+    assert main(["install", "--config", str(sample_config_file), "snapshot"]) == 0
+    assert main(["install", "--config", str(sample_config_file), "--changed"]) == 0
+    assert "unchanged" in capsys.readouterr().out
@@ -0,0 +1,64 @@
+"""Tests for macmikase.osc module."""
+
+import io
+
+import pytest
+
+from macmikase.cli import main
+from macmikase.osc import RESET_SEQUENCES, emit, palette_sequences, previewing
+from macmikase.palette import Palette
+
+
+@pytest.fixture
+def palette():
+    ansi = ("#000000", "#ff0000") + (None,) * 14
+    return Palette(foreground="#ffffff", background="#101010", ansi=ansi)
+
+
+def test_palette_sequences(palette):
+    seq = palette_sequences(palette)
+    assert "\x1b]4;0;rgb:00/00/00\x1b\\" in seq
+    assert "\x1b]4;1;rgb:ff/00/00\x1b\\" in seq
+    assert "\x1b]4;2;" not in seq
+    assert "\x1b]10;rgb:ff/ff/ff\x1b\\" in seq
+    assert "\x1b]11;rgb:10/10/10\x1b\\" in seq
+    assert "\x1b]12;" not in seq
+
+
+def test_emit_to_stream(palette):
+    stream = io.StringIO()
+    assert emit(palette_sequences(palette), stream)
+    assert stream.getvalue() == palette_sequences(palette)
+
+
+def test_previewing_resets_on_exit(palette):
+    stream = io.StringIO()
+    with previewing(palette, stream) as applied:
+        assert applied
+    assert stream.getvalue().endswith(RESET_SEQUENCES)
+
+
+def test_previewing_resets_on_error(palette):
+    stream = io.StringIO()
+    with pytest.raises(RuntimeError), previewing(palette, stream):
+        raise RuntimeError("boom")
+    assert stream.getvalue().endswith(RESET_SEQUENCES)
+
+
+def test_cli_theme_preview_keep(mock_home, tmp_themes_dir, monkeypatch, capsys):
+    (tmp_themes_dir / "nord" / "kitty.conf").write_text("color1 #bf616a\n")
+    monkeypatch.setenv("THEMES_DIR", str(tmp_themes_dir))
+    written = []
+    monkeypatch.setattr("macmikase.cli.emit", lambda seq: written.append(seq) or True)
+
+    assert main(["preview", "nord", "--keep"]) == 0
+    # theme.yaml colors take precedence over kitty.conf.
+    assert written == [
+        "\x1b]4;1;rgb:bf/61/6a\x1b\\\x1b]10;rgb:ff/ff/ff\x1b\\\x1b]11;rgb:00/00/00\x1b\\"
+    ]
+
+
+def test_cli_theme_preview_unknown(mock_home, tmp_themes_dir, monkeypatch, capsys):
+    monkeypatch.setenv("THEMES_DIR", str(tmp_themes_dir))
+    assert main(["preview", "missing"]) == 1
+    assert "not found" in capsys.readouterr().err
@@ -0,0 +1,170 @@
+"""Tests for macmikase.palette module."""
+
+import os
+
+from macmikase.palette import (
+    Palette,
+    load_palette,
+    normalize_hex,
+    palettes_dir,
+    parse_alacritty,
+    parse_cursor_json,
+    parse_ghostty,
+    parse_kitty,
+    parse_neovim,
+    parse_starship,
+    parse_theme_yaml,
+)
+from macmikase.themes import load_manifest
+
+KITTY = """\
+# Nord
+foreground  #D8DEE9
+background  #2E3440
+cursor      #d8dee9
+selection_background #434c5e
+color0 #3B4252
+color1 #BF616A  # red
+color15 #8fbcbb
+"""
+
+GHOSTTY = """\
+background = 1a1b26
+foreground = #c0caf5
+cursor-color = #c0caf5
+palette = 0=#15161e
+palette = 1=#f7768e
+"""
+
+
+def test_normalize_hex():
+    assert normalize_hex("#ABC") == "#aabbcc"
+    assert normalize_hex("1a1b26") == "#1a1b26"
+    assert normalize_hex('"#1A1B26"') == "#1a1b26"
+    assert normalize_hex("0x2E3440") == "#2e3440"
+    assert normalize_hex("none") is None
+    assert normalize_hex(None) is None
+
+
+def test_parse_kitty():
+    palette = parse_kitty(KITTY)
+    assert palette.foreground == "#d8dee9"
+    assert palette.background == "#2e3440"
+    assert palette.selection_background == "#434c5e"
+    assert palette.ansi[0] == "#3b4252"
+    assert palette.ansi[1] == "#bf616a"
+    assert palette.ansi[15] == "#8fbcbb"
+    assert palette.ansi[2] is None
+
+
+def test_parse_ghostty():
+    palette = parse_ghostty(GHOSTTY)
+    assert palette.background == "#1a1b26"
+    assert palette.cursor == "#c0caf5"
+    assert palette.ansi[:2] == ("#15161e", "#f7768e")
+
+
+def test_parse_alacritty():
+    palette = parse_alacritty(
+        """
+[colors.primary]
+background = "#2e3440"
+foreground = "0xeceff4"
+
+[colors.selection]
+text = "CellForeground"
+background = "#434c5e"
+
+[colors.normal]
+red = "#bf616a"
+
+[colors.bright]
+cyan = "#8fbcbb"
+"""
+    )
+    assert palette.background == "#2e3440"
+    assert palette.foreground == "#eceff4"
+    assert palette.selection_foreground is None
+    assert palette.selection_background == "#434c5e"
+    assert palette.ansi[1] == "#bf616a"
+    assert palette.ansi[14] == "#8fbcbb"
+
+
+def test_parse_semantic_sources():
+    cursor = parse_cursor_json('{"colors": {"background": "#2e3440", "accent": "#88c0d0"}}')
+    assert (cursor.background, cursor.accent) == ("#2e3440", "#88c0d0")
+
+    starship = parse_starship(
+        'palette = "p"\n[palettes.p]\nbase = "#2e3440"\nerr = "#bf616a"\nwarn = "#ebcb8b"\n'
+    )
+    assert (starship.background, starship.error, starship.warning) == (
+        "#2e3440",
+        "#bf616a",
+        "#ebcb8b",
+    )
+
+    neovim = parse_neovim('local c = {\n  bg = "#2e3440",\n}\nhl = { Comment = { fg = "#111" } }\n')
+    assert neovim.background == "#2e3440"
+    assert neovim.foreground is None
+
+
+def test_parse_theme_yaml():
+    palette = parse_theme_yaml("colors:\n  bg: '#000'\n  red: '#ff0000'\n  color9: '#ff5555'\n")
+    assert palette.background == "#000000"
+    assert palette.ansi[1] == "#ff0000"
+    assert palette.ansi[9] == "#ff5555"
+    assert parse_theme_yaml("colors: {}\n").is_empty
+
+
+def test_ghostty_wins_and_kitty_fills_gaps(tmp_path):
+    theme = tmp_path / "mixed"
+    theme.mkdir()
+    (theme / "ghostty.conf").write_text(GHOSTTY)
+    (theme / "kitty.conf").write_text(KITTY)
+
+    palette = load_palette(theme)
+    assert palette.background == "#1a1b26"
+    assert palette.ansi[1] == "#f7768e"
+    assert palette.ansi[15] == "#8fbcbb"
+    assert palette.selection_background == "#434c5e"
+
+
+def test_dict_round_trip():
+    palette = parse_kitty(KITTY)
+    assert Palette.from_dict(palette.to_dict()) == palette
+
+
+def test_cache_hit_and_invalidation(mock_home, tmp_path, monkeypatch):
+    theme = tmp_path / "nord"
+    theme.mkdir()
+    conf = theme / "kitty.conf"
+    conf.write_text(KITTY)
+
+    first = load_palette(theme)
+    assert len(list(palettes_dir().glob("nord-*.json"))) == 1
+
+    monkeypatch.setattr(
+        "macmikase.palette.compile_palette", lambda path: Palette(foreground="#000000")
+    )
+    assert load_palette(theme) == first
+
+    conf.write_text(KITTY.replace("#D8DEE9", "#ffffff"))
+    os.utime(conf, ns=(conf.stat().st_atime_ns, conf.stat().st_mtime_ns + 10**9))
+    assert load_palette(theme).foreground == "#000000"
+
+
+def test_theme_without_terminal_configs(mock_home, tmp_path):
+    assert load_palette(tmp_path).is_empty
+
+
+def test_manifest_colors_fall_back_to_palette(mock_home, tmp_path):
+    theme = tmp_path / "nord"
+    theme.mkdir()
+    (theme / "theme.yaml").write_text("name: Nord\ncolors: {}\n")
+    (theme / "kitty.conf").write_text(KITTY)
+    (theme / "cursor.json").write_text('{"colors": {"accent": "#88c0d0"}}')
+
+    colors = load_manifest(theme).colors
+    assert colors["background"] == "#2e3440"
+    assert colors["accent"] == "#88c0d0"
+    assert colors["red"] == "#bf616a"
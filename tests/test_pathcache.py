@@ -0,0 +1,103 @@
+"""Tests for macmikase.pathcache module."""
+
+import json
+
+import pytest
+
+from macmikase.pathcache import cache_file, cached
+from macmikase.themes import discover_theme_dirs, find_theme_cli
+
+
+class Compute:
+    def __init__(self, value, watched):
+        self.value = value
+        self.watched = watched
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value, self.watched
+
+
+@pytest.fixture
+def cache(mock_home, monkeypatch):
+    monkeypatch.delenv("MACMIKASE_NO_PATH_CACHE", raising=False)
+    return cache_file()
+
+
+def test_hit_until_key_changes(cache, tmp_path):
+    compute = Compute(["a"], [tmp_path / "watched"])
+    assert cached("entry", ["k1"], compute) == ["a"]
+    assert cached("entry", ["k1"], compute) == ["a"]
+    assert compute.calls == 1
+    assert cache.exists()
+
+    cached("entry", ["k2"], compute)
+    assert compute.calls == 2
+
+
+def test_nested_entries_survive(cache, tmp_path):
+    watched = tmp_path / "watched"
+    watched.mkdir()
+    inner = Compute("inner", [watched])
+
+    def outer():
+        return cached("inner", ["k"], inner) + "+outer", [watched]
+
+    assert cached("outer", ["k"], outer) == "inner+outer"
+    entries = json.loads(cache.read_text())["entries"]
+    assert set(entries) == {"inner", "outer"}
+    assert cached("inner", ["k"], inner) == "inner"
+    assert inner.calls == 1
+
+    discover_theme_dirs()
+    assert {"repo_root", "theme_dirs"} <= set(json.loads(cache.read_text())["entries"])
+
+
+def test_watched_directory_change_invalidates(cache, tmp_path):
+    watched = tmp_path / "parent"
+    watched.mkdir()
+    compute = Compute("value", [watched, tmp_path / "missing"])
+    cached("entry", [], compute)
+    cached("entry", [], compute)
+    assert compute.calls == 1
+
+    (watched / "themes").mkdir()
+    cached("entry", [], compute)
+    assert compute.calls == 2
+
+    # A watched path that appears counts as a change too.
+    (tmp_path / "missing").mkdir()
+    cached("entry", [], compute)
+    assert compute.calls == 3
+
+
+def test_corrupt_cache_and_bypass(cache, tmp_path, monkeypatch):
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    cache.write_text("{not json")
+    compute = Compute(1, [])
+    assert cached("entry", [], compute) == 1
+
+    monkeypatch.setenv("MACMIKASE_NO_PATH_CACHE", "1")
+    cached("entry", [], compute)
+    assert compute.calls == 2
+
+
+def test_discover_notices_new_installed_themes(cache, mock_home, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    before = discover_theme_dirs()
+    installed = mock_home / ".local" / "share" / "macmikase" / "themes"
+    assert installed not in before
+
+    installed.mkdir(parents=True)
+    assert discover_theme_dirs()[-1] == installed
+
+
+def test_find_theme_cli_notices_removal(cache, mock_home, tmp_path, monkeypatch):
+    script = tmp_path / "macmikase-theme"
+    script.write_text("#!/bin/sh\n")
+    script.chmod(0o755)
+    monkeypatch.setenv("THEME_CLI", str(script))
+    assert find_theme_cli() == str(script)
+    script.unlink()
+    assert find_theme_cli() != str(script)
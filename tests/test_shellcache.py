@@ -0,0 +1,149 @@
+"""Tests for macmikase.shellcache module."""
+
+import json
+import os
+
+import pytest
+
+from macmikase import shellcache
+from macmikase.cli import main
+from macmikase.shellcache import Snippet, load_manifest, refresh, snippet_path
+
+
+@pytest.fixture
+def tools(mock_home, monkeypatch):
+    """A PATH directory holding fake init tools; ``make(name, output)`` adds one."""
+    bin_dir = mock_home / "tools"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    def make(name, output="export FAKE=1", status=0):
+        exe = bin_dir / name
+        exe.write_text(f"#!/bin/sh\necho '{output}' \"$@\"\nexit {status}\n")
+        exe.chmod(0o755)
+        return exe
+
+    return make
+
+
+@pytest.fixture
+def counting_run():
+    calls = []
+
+    def run(cmd):
+        calls.append(cmd)
+        return shellcache._run(cmd)
+
+    run.calls = calls
+    return run
+
+
+SNIPPETS = (
+    Snippet("zox", ("fake-zoxide",), ("init", "bash")),
+    Snippet("env", ("/nonexistent/fake-brew", "fake-brew"), ("shellenv", "bash")),
+    Snippet("gone", ("fake-not-installed",), ("init", "bash")),
+)
+
+
+def test_generates_snippets_and_manifest(tools, counting_run):
+    zoxide = tools("fake-zoxide", "z() { :; }")
+    tools("fake-brew", "export HOMEBREW_PREFIX=/opt/homebrew")
+
+    results = refresh(SNIPPETS, run=counting_run)
+
+    assert [(r.name, r.status) for r in results] == [
+        ("zox", "generated"),
+        ("env", "generated"),
+        ("gone", "missing"),
+    ]
+    text = snippet_path("zox").read_text()
+    assert text.startswith("# Generated by `macmikase shell-cache refresh`")
+    assert "z() { :; } init bash" in text
+    assert "export HOMEBREW_PREFIX=/opt/homebrew shellenv bash" in snippet_path("env").read_text()
+    manifest = load_manifest()
+    assert set(manifest) == {"zox", "env"}
+    assert manifest["zox"]["binary"] == str(zoxide.resolve())
+    assert manifest["zox"]["args"] == ["init", "bash"]
+
+
+def test_unchanged_binaries_are_not_run_again(tools, counting_run):
+    tools("fake-zoxide")
+    tools("fake-brew")
+    refresh(SNIPPETS, run=counting_run)
+    counting_run.calls.clear()
+
+    results = refresh(SNIPPETS, run=counting_run)
+
+    assert [r.status for r in results] == ["fresh", "fresh", "missing"]
+    assert counting_run.calls == []
+
+
+def test_force_regenerates_everything(tools, counting_run):
+    tools("fake-zoxide")
+    tools("fake-brew")
+    refresh(SNIPPETS, run=counting_run)
+    counting_run.calls.clear()
+
+    results = refresh(SNIPPETS, force=True, run=counting_run)
+
+    assert [r.status for r in results] == ["generated", "generated", "missing"]
+    assert len(counting_run.calls) == 2
+
+
+def test_upgraded_binary_is_regenerated(tools):
+    zoxide = tools("fake-zoxide", "old")
+    refresh(SNIPPETS[:1])
+    tools("fake-zoxide", "new version")
+    os.utime(zoxide, ns=(0, zoxide.stat().st_mtime_ns + 10**9))
+
+    results = refresh(SNIPPETS[:1])
+
+    assert results[0].status == "generated"
+    assert "new version" in snippet_path("zox").read_text()
+
+
+def test_missing_snippet_file_is_regenerated(tools):
+    tools("fake-zoxide")
+    refresh(SNIPPETS[:1])
+    snippet_path("zox").unlink()
+
+    assert refresh(SNIPPETS[:1])[0].status == "generated"
+    assert snippet_path("zox").is_file()
+
+
+def test_failed_command_keeps_previous_snippet(tools):
+    zoxide = tools("fake-zoxide", "good")
+    refresh(SNIPPETS[:1])
+    entry = load_manifest()["zox"]
+    tools("fake-zoxide", "boom", status=3)
+    os.utime(zoxide, ns=(0, zoxide.stat().st_mtime_ns + 10**9))
+
+    result = refresh(SNIPPETS[:1])[0]
+
+    assert result.status == "failed"
+    assert "good" in snippet_path("zox").read_text()
+    assert load_manifest()["zox"] == entry
+
+
+def test_uninstalled_tool_drops_its_snippet(tools):
+    zoxide = tools("fake-zoxide")
+    refresh(SNIPPETS[:1])
+    zoxide.unlink()
+
+    assert refresh(SNIPPETS[:1])[0].status == "missing"
+    assert not snippet_path("zox").exists()
+    assert "zox" not in load_manifest()
+
+
+def test_cli_refresh_json(tools, monkeypatch, capsys):
+    tools("fake-zoxide")
+    monkeypatch.setattr(shellcache, "SNIPPETS", SNIPPETS)
+
+    assert main(["shell-cache", "refresh", "--json"]) == 0
+
+    data = json.loads(capsys.readouterr().out)
+    assert {s["name"]: s["status"] for s in data["snippets"]} == {
+        "zox": "generated",
+        "env": "missing",
+        "gone": "missing",
+    }
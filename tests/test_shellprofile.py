@@ -0,0 +1,123 @@
+"""Tests for macmikase.shellprofile module."""
+
+import json
+import shutil
+
+import pytest
+
+from macmikase.cli import main
+from macmikase.shellprofile import (
+    TraceLine,
+    aggregate,
+    format_profile,
+    is_managed,
+    parse_bash_trace,
+    parse_zsh_trace,
+    profile,
+)
+
+needs_bash = pytest.mark.skipif(not shutil.which("bash"), reason="needs bash")
+
+
+@pytest.fixture
+def dotfiles(mock_home, monkeypatch):
+    monkeypatch.setenv("HOME", str(mock_home))
+    shell_dir = mock_home / ".config" / "shell"
+    shell_dir.mkdir(parents=True)
+    (shell_dir / "slow.sh").write_text("y=2\nsleep 0.1\n")
+    (mock_home / ".bashrc").write_text(
+        "case $- in *i*) ;; *) return;; esac\n"
+        "x=1\n"
+        "[ -f ~/.config/shell/slow.sh ] && source ~/.config/shell/slow.sh\n"
+        "sleep 0.03\n"
+    )
+    return mock_home
+
+
+def test_parse_bash_trace_builds_call_chain():
+    text = (
+        "+1.000000\t3\t'/h/.bashrc' '/tmp/wrap'\t7 0\tsource /h/slow.sh\n"
+        "++1.100000\t2\t'/h/slow.sh' '/h/.bashrc' '/tmp/wrap'\t3 7 0\tsleep 0.1\n"
+        "continuation of a multi-line command\n"
+        "+1.300000\t1\t\t\texit\n"
+    )
+    lines = parse_bash_trace(text, ignore="/tmp/wrap")
+    assert lines == [
+        TraceLine(1.0, [("/h/.bashrc", 3)]),
+        TraceLine(1.1, [("/h/slow.sh", 2), ("/h/.bashrc", 3)]),
+        TraceLine(1.3, []),
+    ]
+
+
+def test_parse_zsh_trace_uses_funcfiletrace():
+    text = (
+        "+2.000000\t4\t/h/.config/shell/a.sh\t/h/.zshrc:9\tsleep 1\n"
+        "+2.500000\t10\t/h/.zshrc\t\tx=1\n"
+    )
+    assert parse_zsh_trace(text) == [
+        TraceLine(2.0, [("/h/.config/shell/a.sh", 4), ("/h/.zshrc", 9)]),
+        TraceLine(2.5, [("/h/.zshrc", 10)]),
+    ]
+
+
+def test_aggregate_charges_self_and_callers(mock_home):
+    rc = str(mock_home / ".bashrc")
+    other = "/opt/tool/init.sh"
+    trace = [
+        TraceLine(0.0, [(rc, 1)]),
+        TraceLine(0.1, [(other, 5), (rc, 2)]),
+        TraceLine(0.4, [(rc, 3)]),
+        TraceLine(0.5, []),
+    ]
+    result = aggregate("bash", [0.6, 0.8], [trace, trace])
+
+    lines = {(c.file, c.line): c for c in result.lines}
+    assert lines[(rc, 2)].self == 0
+    assert lines[(rc, 2)].total == pytest.approx(0.3)
+    assert lines[(other, 5)].self == pytest.approx(0.3)
+    assert not lines[(other, 5)].managed
+    assert lines[(rc, 1)].hits == 1
+    files = {f.file: f for f in result.files}
+    assert files[rc].total == pytest.approx(0.5)
+    assert files[rc].self == pytest.approx(0.2)
+    assert result.median == pytest.approx(0.7)
+    assert result.lines[0].total >= result.lines[-1].total
+
+
+def test_is_managed(mock_home):
+    assert is_managed(str(mock_home / ".bashrc"))
+    assert is_managed(str(mock_home / ".config" / "shell" / "aliases" / "a.sh"))
+    assert not is_managed(str(mock_home / ".nvm" / "nvm.sh"))
+    assert not is_managed("/etc/bashrc")
+
+
+@needs_bash
+def test_profile_bash_ranks_slow_sourced_file(dotfiles):
+    result = profile("bash", 2, warmup=0)
+
+    assert result.shell == "bash"
+    assert len(result.walls) == 2
+    top = result.lines[0]
+    assert (top.file, top.line) == (str(dotfiles / ".bashrc"), 3)
+    assert top.total >= 0.09
+    slow = next(c for c in result.lines if c.file.endswith("slow.sh") and c.line == 2)
+    assert slow.self >= 0.09
+    assert slow.text == "sleep 0.1"
+    assert "~/.config/shell/slow.sh" in format_profile(result)
+
+
+def test_profile_rejects_unsupported_shell():
+    with pytest.raises(ValueError, match="unsupported shell"):
+        profile("fish", 1)
+
+
+@needs_bash
+def test_cli_json_and_budget(dotfiles, capsys):
+    assert main(["shell-profile", "--shell", "bash", "-n", "1", "--warmup", "0", "--json"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["shell"] == "bash"
+    assert all(line["managed"] for line in data["lines"])
+    assert data["lines"][0]["text"].startswith("[ -f ~/.config/shell/slow.sh ]")
+
+    assert main(["shell-profile", "--shell", "bash", "-n", "1", "--budget", "10"]) == 1
+    assert "exceeds 10ms" in capsys.readouterr().err
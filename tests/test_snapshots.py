@@ -0,0 +1,121 @@
+"""Tests for macmikase.snapshots module."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from macmikase import snapshots
+from macmikase.chezmoi import set_theme_data
+from macmikase.cli import main
+from macmikase.snapshots import (
+    capture,
+    capture_theme_switch,
+    load_index,
+    object_path,
+    rendered_targets,
+    rollback,
+)
+
+
+@pytest.fixture
+def source(mock_home):
+    """A chezmoi source dir with themed and unthemed templates."""
+    src = mock_home / "dotfiles"
+    (src / "dot_config" / "kitty").mkdir(parents=True)
+    (src / "dot_config" / "kitty" / "kitty.conf.tmpl").write_text(
+        "include {{ .themes_dir }}/{{ .theme }}/kitty.conf\n"
+    )
+    (src / "private_dot_secret.tmpl").write_text("theme={{ .theme }}\n")
+    (src / "dot_bashrc.tmpl").write_text("export EDITOR={{ .editor }}\n")
+    (src / "run_after_setup.sh.tmpl").write_text("echo {{ .theme }}\n")
+    (src / ".chezmoi.toml.tmpl").write_text("[data]\ntheme = {{ .theme }}\n")
+    config = mock_home / ".config" / "chezmoi" / "chezmoi.toml"
+    config.parent.mkdir(parents=True)
+    config.write_text(f'sourceDir = "{src}"\n\n[data]\ntheme = "nord"\n')
+    return src
+
+
+def test_rendered_targets_maps_source_names(source, mock_home):
+    assert rendered_targets() == [
+        mock_home / ".config" / "kitty" / "kitty.conf",
+        mock_home / ".secret",
+    ]
+
+
+def test_objects_are_deduplicated(mock_home, tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.write_text("same")
+    b.write_text("same")
+    first = capture([a, b], theme="nord", to="tokyo-night")
+    capture([a, b], theme="tokyo-night", to="nord")
+    digests = {entry[0] for entry in first.files.values()}
+    assert len(digests) == 1
+    assert len(list(object_path(digests.pop()).parent.parent.glob("*/*"))) == 1
+
+
+def test_eviction_bounds_count_and_size(mock_home, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "MAX_SNAPSHOTS", 3)
+    path = tmp_path / "file"
+    for i in range(5):
+        path.write_text(f"version {i}")
+        capture([path], theme=str(i), to=None)
+    assert [s.theme for s in load_index()] == ["2", "3", "4"]
+    assert len(list((snapshots.store_dir() / "objects").glob("*/*"))) == 3
+
+    monkeypatch.setattr(snapshots, "MAX_BYTES", len("version 9") * 2)
+    path.write_text("version 9")
+    capture([path], theme="9", to=None)
+    assert [s.theme for s in load_index()] == ["4", "9"]
+
+
+def test_rollback_restores_and_can_be_undone(source, mock_home):
+    kitty = mock_home / ".config" / "kitty" / "kitty.conf"
+    kitty.parent.mkdir(parents=True)
+    kitty.write_text("include nord\n")
+    kitty.chmod(0o600)
+
+    capture_theme_switch("tokyo-night")
+    set_theme_data("tokyo-night", "/themes")
+    kitty.write_text("include tokyo-night\n")
+    (mock_home / ".secret").write_text("theme=tokyo-night\n")
+
+    result = rollback()
+    assert result.snapshot.theme == "nord"
+    assert kitty.read_text() == "include nord\n"
+    assert kitty.stat().st_mode & 0o777 == 0o600
+    assert not (mock_home / ".secret").exists()
+    assert 'theme = "nord"' in (mock_home / ".config" / "chezmoi" / "chezmoi.toml").read_text()
+
+    # The rollback recorded what it replaced, so rolling back again redoes the switch.
+    assert rollback().snapshot.theme == "tokyo-night"
+    assert kitty.read_text() == "include tokyo-night\n"
+
+
+def test_rollback_n_restores_oldest_state(mock_home, tmp_path):
+    path = tmp_path / "file"
+    for theme in ("a", "b", "c"):
+        path.write_text(theme)
+        capture([path], theme=theme, to=None)
+    path.write_text("d")
+    rollback(2)
+    assert path.read_text() == "b"
+    with pytest.raises(LookupError):
+        rollback(10)
+
+
+def test_cli_theme_rollback(source, mock_home, tmp_themes_dir, monkeypatch, capsys):
+    monkeypatch.setattr("macmikase.cli.discover_theme_dirs", lambda: [tmp_themes_dir])
+    argv = ["theme", "tokyo-night", "--no-apply", "--no-helpers"]
+    assert main(argv) == 0
+    # A switch that changes nothing leaves no snapshot behind.
+    assert main(argv) == 0
+    assert main(["snapshots", "list", "--json"]) == 0
+    listed = json.loads(capsys.readouterr().out.splitlines()[-1])
+    assert [(s["theme"], s["to"]) for s in listed] == [("nord", "tokyo-night")]
+
+    assert main(["theme", "--rollback", "--no-helpers"]) == 0
+    assert "Rolled back to 'nord'" in capsys.readouterr().out
+    config = Path(mock_home / ".config" / "chezmoi" / "chezmoi.toml").read_text()
+    assert 'theme = "nord"' in config
+    assert main(["theme", "--rollback", "5"]) == 1
@@ -0,0 +1,146 @@
+"""Tests for macmikase.state module."""
+
+import json
+import sqlite3
+import subprocess
+
+import pytest
+
+from macmikase import cli
+from macmikase.cli import main
+from macmikase.state import (
+    ApplyRecord,
+    ApplyTimer,
+    Step,
+    db_path,
+    history,
+    last_theme,
+    previous_theme,
+    record_apply,
+    step_stats,
+)
+
+
+def record(theme, previous, steps, outcome="ok", version="0.2.0", started=0.0):
+    steps = [Step(name, duration) for name, duration in steps.items()]
+    return record_apply(
+        ApplyRecord(
+            theme=theme,
+            started=started,
+            duration=sum(s.duration for s in steps),
+            outcome=outcome,
+            previous=previous,
+            version=version,
+            steps=steps,
+        )
+    )
+
+
+def test_timer_records_steps_and_failures(mock_home):
+    timer = ApplyTimer("nord", previous="tokyo-night")
+    with timer.step("chezmoi-data"):
+        pass
+    with pytest.raises(RuntimeError), timer.step("chezmoi-apply"):
+        raise RuntimeError
+    timer.record("failed")
+
+    (entry,) = history()
+    assert (entry.theme, entry.previous, entry.outcome) == ("nord", "tokyo-night", "failed")
+    assert [(s.name, s.status) for s in entry.steps] == [
+        ("chezmoi-data", "ok"),
+        ("chezmoi-apply", "failed"),
+    ]
+    assert entry.version
+    conn = sqlite3.connect(db_path())
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_history_and_previous_theme(mock_home):
+    assert history() == [] and previous_theme() is None
+    record("tokyo-night", "nord", {"chezmoi-apply": 1.0}, started=1)
+    record("catppuccin", "tokyo-night", {"chezmoi-apply": 1.0}, started=2)
+    record("catppuccin", "catppuccin", {}, outcome="unchanged", started=3)
+    record("nord", "catppuccin", {}, outcome="failed", started=4)
+
+    assert [r.theme for r in history(limit=2)] == ["nord", "catppuccin"]
+    assert previous_theme() == "tokyo-night"
+    assert last_theme() == "catppuccin"
+
+
+def test_step_stats_percentiles(mock_home):
+    for i in range(1, 21):
+        version = "0.2.0" if i <= 10 else "0.3.0"
+        record("nord", None, {"chezmoi-apply": i / 10, "editors": 0.01}, version=version, started=i)
+
+    stats = {row["step"]: row for row in step_stats()}
+    assert stats["chezmoi-apply"]["runs"] == 20
+    assert stats["chezmoi-apply"]["p50"] == pytest.approx(1.05)
+    assert stats["chezmoi-apply"]["p95"] == pytest.approx(1.905)
+    assert stats["total"]["max"] == pytest.approx(2.01)
+
+    by_version = {(r["version"], r["step"]): r for r in step_stats(by_version=True)}
+    assert by_version[("0.3.0", "chezmoi-apply")]["p50"] == pytest.approx(1.55)
+    recent = {row["step"]: row for row in step_stats(last=5)}
+    assert recent["chezmoi-apply"]["runs"] == 5
+
+
+def test_cli_record_history_and_stats(mock_home, capsys):
+    record("nord", None, {"chezmoi-apply": 0.5}, started=1)
+    argv = [
+        "history",
+        "record",
+        "tokyo-night",
+        "--step",
+        "chezmoi-apply=0.25",
+        "--step",
+        "x=1:failed",
+    ]
+    assert main(argv) == 0
+    assert main(["history", "list", "--json"]) == 0
+    latest = json.loads(capsys.readouterr().out)[0]
+    assert (latest["theme"], latest["previous"], latest["source"]) == (
+        "tokyo-night",
+        "nord",
+        "shell",
+    )
+    assert latest["duration"] == pytest.approx(1.25)
+
+    assert main(["history", "list", "--previous"]) == 0
+    assert capsys.readouterr().out == "nord\n"
+    assert main(["history", "stats"]) == 0
+    out = capsys.readouterr().out
+    assert "chezmoi-apply" in out and "total" in out
+    assert main(["history", "record", "nord", "--step", "bad"]) == 1
+
+
+def test_cli_switch_records_failed_and_partial_outcomes(mock_home, tmp_themes_dir, monkeypatch):
+    monkeypatch.setattr(cli, "discover_theme_dirs", lambda: [tmp_themes_dir])
+    monkeypatch.setattr(cli, "find_theme_cli", lambda: "/bin/macmikase-theme")
+    codes = {"chezmoi": 1, "/bin/macmikase-theme": 1}
+    monkeypatch.setattr(
+        cli.subprocess,
+        "run",
+        lambda cmd, **_kw: subprocess.CompletedProcess(cmd, codes[cmd[0]], "", ""),
+    )
+    assert main(["theme", "nord"]) == 1
+    failed = history(1)[0]
+    assert failed.outcome == "failed"
+    assert [(s.name, s.status) for s in failed.steps][-1] == ("chezmoi-apply", "failed")
+
+    codes["chezmoi"] = 0
+    assert main(["theme", "nord"]) == 0
+    partial = history(1)[0]
+    assert partial.outcome == "partial"
+    assert partial.steps[-1].status == "failed"
+
+
+def test_theme_names_are_not_subcommands(mock_home, tmp_themes_dir, monkeypatch, capsys):
+    (tmp_themes_dir / "history").mkdir()
+    monkeypatch.setattr(cli, "discover_theme_dirs", lambda: [tmp_themes_dir])
+    monkeypatch.setattr(
+        cli.subprocess, "run", lambda cmd, **_kw: subprocess.CompletedProcess(cmd, 0, "", "")
+    )
+    assert main(["theme", "history", "--no-helpers"]) == 0
+    assert history(1)[0].theme == "history"
+    with pytest.raises(SystemExit):
+        main(["theme", "nord", "stray"])
@@ -0,0 +1,111 @@
+"""Tests for macmikase.terminals module."""
+
+import json
+import shutil
+import signal
+import subprocess
+
+import pytest
+
+from macmikase.cli import main
+from macmikase.terminals import (
+    AutoReload,
+    Process,
+    ProcTable,
+    PsTable,
+    SignalReload,
+    Terminal,
+    reload_terminals,
+)
+
+
+class StaticTable:
+    def __init__(self, *processes):
+        self._processes = list(processes)
+
+    def processes(self):
+        return self._processes
+
+
+@pytest.fixture
+def spawn(tmp_path):
+    """Start ``sleep`` under another process name (the executable's basename)."""
+    procs = []
+
+    def start(name):
+        exe = tmp_path / name
+        shutil.copy(shutil.which("sleep"), exe)
+        proc = subprocess.Popen([str(exe), "30"])
+        procs.append(proc)
+        return proc
+
+    yield start
+    for proc in procs:
+        proc.kill()
+        proc.wait()
+
+
+@pytest.mark.skipif(not shutil.which("sleep"), reason="needs sleep")
+def test_signals_matching_processes_from_one_snapshot(spawn):
+    kitty = spawn("kitty")
+    ghostty = spawn("ghostty")
+    other = spawn("kittyish")
+    terminals = [
+        Terminal("kitty", ("kitty",), SignalReload()),
+        Terminal("ghostty", ("Ghostty", "ghostty"), SignalReload()),
+        Terminal("dummy", ("dummy-term",), SignalReload()),
+    ]
+    results = reload_terminals(ProcTable(), terminals)
+    assert [(r.terminal, r.status) for r in results] == [
+        ("kitty", "reloaded"),
+        ("ghostty", "reloaded"),
+        ("dummy", "not running"),
+    ]
+    assert kitty.pid in results[0].pids
+    # sleep does not handle SIGUSR1, so it dies of it.
+    assert kitty.wait(5) == -signal.SIGUSR1
+    assert ghostty.wait(5) == -signal.SIGUSR1
+    assert other.poll() is None
+
+
+def test_strategies_and_failures():
+    def kill(pid, sig):
+        if pid == 2:
+            raise ProcessLookupError
+        if pid == 3:
+            raise PermissionError(1, "Operation not permitted")
+
+    table = StaticTable(Process(1, "wezterm-gui"), Process(2, "kitty"), Process(3, "foo"))
+    terminals = [
+        Terminal("wezterm", ("wezterm-gui",), AutoReload()),
+        Terminal("kitty", ("kitty",), SignalReload(kill=kill)),
+        Terminal("foo", ("foo",), SignalReload(kill=kill)),
+    ]
+    results = reload_terminals(table, terminals)
+    assert [r.status for r in results] == ["auto", "reloaded", "failed"]
+    assert "not permitted" in results[2].message
+
+
+def test_ps_table_parses_command_paths():
+    out = (
+        "  41 /Applications/kitty.app/Contents/MacOS/kitty\n"
+        " 42 /Applications/Visual Studio Code.app/Contents/MacOS/Electron\n"
+        "bad\n"
+    )
+
+    def run(cmd, **_kwargs):
+        return subprocess.CompletedProcess(cmd, 0, out, "")
+
+    assert PsTable(run).processes() == [Process(41, "kitty"), Process(42, "Electron")]
+
+
+def test_cli_terminals_reload(capsys, monkeypatch):
+    monkeypatch.setattr(
+        "macmikase.terminals.process_table", lambda: StaticTable(Process(7, "alacritty"))
+    )
+    assert main(["terminals", "reload", "--json"]) == 0
+    statuses = {
+        r["terminal"]: r["status"] for r in json.loads(capsys.readouterr().out)["terminals"]
+    }
+    assert statuses["alacritty"] == "auto"
+    assert statuses["kitty"] == "not running"
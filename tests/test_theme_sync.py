@@ -0,0 +1,76 @@
+"""Tests for macmikase.theme_sync module."""
+
+import json
+from dataclasses import replace
+
+import pytest
+
+from macmikase.theme_sync import SyncColors, update_theme
+
+CURSOR = {
+    "colorTheme": "Demo",
+    "colors": {
+        "background": "#101010",
+        "foreground": "#eeeeee",
+        "accent": "#88c0d0",
+        "sidebar": "#0a0a0a",
+        "error": "#bf616a",
+    },
+}
+
+ANSI = tuple(f"#0000{i:02x}" for i in range(16))
+
+
+@pytest.fixture
+def theme(tmp_path):
+    path = tmp_path / "demo"
+    path.mkdir()
+    (path / "cursor.json").write_text(json.dumps(CURSOR))
+    (path / "ghostty.conf").write_text("background = #000000\nforeground = #ffffff\n")
+    (path / "kitty.conf").write_text("background    #000000\ncolor0        #000000\n")
+    (path / "starship.toml").write_text('palette = "p"\n[palettes.p]\nbase = "#000000"\n')
+    (path / "opencode.json").write_text('{"background": "#000000", "defs": {}}')
+    (path / "alacritty.toml").write_text(
+        '[colors.normal]\nblack = "#000000"\nred = "#000000"\n'
+        '[colors.bright]\nblack = "#000000"\nred = "#000000"\n'
+    )
+    return path
+
+
+def test_update_from_cursor_json(theme):
+    assert update_theme(theme, verbose=False)
+
+    assert (theme / "ghostty.conf").read_text() == "background = #101010\nforeground = #eeeeee\n"
+    assert (theme / "kitty.conf").read_text() == "background    #101010\ncolor0        #0a0a0a\n"
+    assert 'base = "#101010"' in (theme / "starship.toml").read_text()
+    assert json.loads((theme / "opencode.json").read_text())["error"] == "#bf616a"
+    # Only the first (normal) black follows the sidebar color.
+    alacritty = (theme / "alacritty.toml").read_text()
+    assert alacritty.count('"#0a0a0a"') == 1
+
+
+def test_unchanged_files_are_not_rewritten(theme):
+    update_theme(theme, verbose=False)
+    mtime = (theme / "kitty.conf").stat().st_mtime_ns
+    update_theme(theme, verbose=False)
+    assert (theme / "kitty.conf").stat().st_mtime_ns == mtime
+
+
+def test_missing_required_colors(theme, capsys):
+    (theme / "cursor.json").write_text('{"colors": {"background": "#101010"}}')
+    assert not update_theme(theme)
+    assert "missing required colors" in capsys.readouterr().out
+
+
+def test_full_ansi_palette(theme):
+    colors = replace(SyncColors.from_cursor_colors(CURSOR["colors"]), ansi=ANSI)
+    (theme / "ghostty.conf").write_text("theme = Nord\n")
+    update_theme(theme, verbose=False, colors=colors)
+
+    ghostty = (theme / "ghostty.conf").read_text()
+    assert "theme = Nord" not in ghostty
+    assert "palette = 5=#000005" in ghostty
+    assert "palette = 0=#0a0a0a" in ghostty  # sidebar wins for ANSI black
+    alacritty = (theme / "alacritty.toml").read_text()
+    assert 'red = "#000001"' in alacritty
+    assert 'red = "#000009"' in alacritty
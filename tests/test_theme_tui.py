@@ -1,5 +1,11 @@
+import asyncio
 from pathlib import Path
 
+import pytest
+from rich.console import Group
+
+from macmikase.osc import RESET_SEQUENCES
+from macmikase.theme_tui import ThemeTui
 from macmikase.themes import _unique_dirs, list_themes
 
 
@@ -29,3 +35,106 @@ def test_list_themes(tmp_path):
 def test_list_themes_none():
     assert list_themes(None) == []
     assert list_themes(Path("/non/existent/path")) == []
+
+
+async def settle(app, pilot):
+    """Wait for the theme list and the preview workers it starts."""
+    await pilot.pause()
+    while app.workers:
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+
+
+def test_preview_shows_thumbnail(tmp_themes_dir, mock_home, monkeypatch):
+    image = pytest.importorskip("PIL.Image")
+    for theme in tmp_themes_dir.iterdir():
+        image.new("RGB", (64, 32), "#223344").save(theme / "preview.png")
+    monkeypatch.setenv("THEMES_DIR", str(tmp_themes_dir))
+
+    async def scenario():
+        app = ThemeTui()
+        async with app.run_test() as pilot:
+            await settle(app, pilot)
+            return app.preview.renderable, dict(app.preview._thumbnails)
+
+    renderable, thumbnails = asyncio.run(scenario())
+    assert isinstance(renderable, Group)
+    assert any(thumbnails.values())
+
+
+def test_preview_reads_pack_images_from_its_source(tmp_themes_dir, mock_home, monkeypatch):
+    image = pytest.importorskip("PIL.Image")
+    from macmikase.themepack import build_pack
+
+    for theme in tmp_themes_dir.iterdir():
+        image.new("RGB", (64, 32), "#223344").save(theme / "preview.png")
+    pack = build_pack(tmp_themes_dir)
+    monkeypatch.setenv("THEMES_DIR", str(pack))
+
+    async def scenario():
+        app = ThemeTui()
+        async with app.run_test() as pilot:
+            await settle(app, pilot)
+            return app.active_dir, app.files_dir, dict(app.preview._thumbnails)
+
+    active_dir, files_dir, thumbnails = asyncio.run(scenario())
+    assert active_dir == pack
+    assert files_dir == tmp_themes_dir.resolve()
+    assert any(thumbnails.values())
+
+
+def test_live_preview_retints_and_resets(tmp_themes_dir, mock_home, monkeypatch):
+    for theme in tmp_themes_dir.iterdir():
+        (theme / "kitty.conf").write_text("cursor #2e3440\n")
+    monkeypatch.setenv("THEMES_DIR", str(tmp_themes_dir))
+    written = []
+    monkeypatch.setattr("macmikase.osc.emit", lambda seq: written.append(seq) or True)
+
+    async def scenario():
+        app = ThemeTui()
+        async with app.run_test() as pilot:
+            await settle(app, pilot)
+            original = app.theme
+            await pilot.press("p")
+            assert app.live_preview
+            assert app.theme == "textual-ansi"
+            await pilot.press("down")
+            await pilot.press("p")
+            assert not app.live_preview
+            assert app.theme == original
+
+    asyncio.run(scenario())
+    assert written[0] == written[1]
+    assert "\x1b]12;rgb:2e/34/40\x1b\\" in written[0]
+    assert written[-1] == RESET_SEQUENCES
+
+
+def test_list_loads_after_first_paint(tmp_themes_dir, mock_home, monkeypatch):
+    monkeypatch.setenv("THEMES_DIR", str(tmp_themes_dir))
+    discovered = []
+    monkeypatch.setattr(
+        "macmikase.themes.discover_theme_dirs",
+        lambda: discovered.append(True) or [tmp_themes_dir],
+    )
+
+    async def scenario():
+        app = ThemeTui()
+        assert app.active_dir is None
+        async with app.run_test() as pilot:
+            await settle(app, pilot)
+            options = app.option_list
+            names = [
+                str(options.get_option_at_index(i).prompt) for i in range(options.option_count)
+            ]
+            highlighted = app._highlighted_theme_path()
+            details = str(app.preview._details)
+            await pilot.press("r")
+            await settle(app, pilot)
+            return names, highlighted, details, app.status
+
+    names, highlighted, details, status = asyncio.run(scenario())
+    assert names == sorted(p.name for p in tmp_themes_dir.iterdir())
+    assert highlighted == tmp_themes_dir / names[0]
+    assert "Variant:" in details
+    assert status == "Theme list refreshed."
+    assert len(discovered) == 2
@@ -0,0 +1,131 @@
+"""Tests for macmikase.themepack module."""
+
+import json
+import os
+
+import pytest
+
+from macmikase.cli import main
+from macmikase.palette import load_palette
+from macmikase.themepack import (
+    MAGIC,
+    build_pack,
+    default_pack_path,
+    is_pack,
+    open_pack,
+    packed_theme,
+    source_dir,
+)
+from macmikase.themes import discover_theme_dirs, find_theme, list_themes, load_manifest
+
+
+@pytest.fixture
+def pack(mock_home, tmp_themes_dir):
+    (tmp_themes_dir / "nord" / "kitty.conf").write_text("color1 #bf616a\n")
+    (tmp_themes_dir / "nord" / "preview.png").write_bytes(b"\x89PNG" + b"\0" * 64)
+    return build_pack(tmp_themes_dir)
+
+
+def test_build_pack_layout(pack, tmp_themes_dir):
+    assert pack == default_pack_path(tmp_themes_dir)
+    assert pack.name == "themes.mmkpack"
+    assert pack.read_bytes().startswith(MAGIC)
+    assert is_pack(pack)
+    assert not is_pack(tmp_themes_dir)
+
+
+def test_pack_reads_index_and_files(pack, tmp_themes_dir):
+    opened = open_pack(pack)
+    assert opened.names() == ["catppuccin", "nord", "tokyo-night"]
+    assert opened.source == tmp_themes_dir.resolve()
+    nord = opened.theme("nord")
+    assert nord.read_text("kitty.conf") == "color1 #bf616a\n"
+    # Images stay out of the pack.
+    assert "preview.png" not in nord.files
+    assert opened.theme("missing") is None
+    # Unchanged packs are served from the open map.
+    assert open_pack(pack) is opened
+
+
+def test_list_and_load_from_pack(pack, tmp_themes_dir):
+    assert list_themes(pack) == list_themes(tmp_themes_dir)
+    for name in list_themes(pack):
+        assert load_manifest(pack / name) == load_manifest(tmp_themes_dir / name)
+    assert load_palette(pack / "nord") == load_palette(tmp_themes_dir / "nord")
+    assert packed_theme(tmp_themes_dir / "nord") is None
+
+
+def test_rebuilt_pack_is_reopened(pack, tmp_themes_dir):
+    first = open_pack(pack)
+    (tmp_themes_dir / "gruvbox").mkdir()
+    build_pack(tmp_themes_dir)
+    assert open_pack(pack) is not first
+    assert "gruvbox" in list_themes(pack)
+
+
+def test_invalid_pack(tmp_path):
+    bad = tmp_path / "bad.mmkpack"
+    bad.write_bytes(b"not a pack at all")
+    with pytest.raises(ValueError):
+        open_pack(bad)
+    assert list_themes(bad) == []
+    assert packed_theme(bad / "nord") is None
+
+
+def test_discovery_treats_pack_as_source(pack, tmp_themes_dir, monkeypatch, capsys):
+    monkeypatch.setenv("THEMES_DIR", str(pack))
+    assert discover_theme_dirs()[0] == pack
+    assert find_theme("nord") == pack / "nord"
+    assert source_dir(pack) == tmp_themes_dir.resolve()
+
+    # Shell scripts get the directory the pack was built from.
+    assert main(["themes-dir"]) == 0
+    assert capsys.readouterr().out.strip() == str(tmp_themes_dir.resolve())
+
+
+def test_cli_themes_pack(mock_home, tmp_themes_dir, tmp_path, capsys):
+    dest = tmp_path / "out.mmkpack"
+    assert main(["themes", "pack", "--themes-dir", str(tmp_themes_dir), "-o", str(dest)]) == 0
+    assert "Packed 3 themes" in capsys.readouterr().out
+    assert list_themes(dest) == ["catppuccin", "nord", "tokyo-night"]
+
+
+def test_deploy_refreshes_existing_pack(mock_home, tmp_themes_dir, tmp_path, capsys):
+    dest = tmp_path / "dest"
+    argv = ["themes", "deploy", "--source", str(tmp_themes_dir), "--dest", str(dest), "--json"]
+    assert main([*argv, "--pack"]) == 0
+    pack = default_pack_path(dest)
+    assert json.loads(capsys.readouterr().out)["pack"] == str(pack)
+
+    (tmp_themes_dir / "gruvbox").mkdir()
+    (tmp_themes_dir / "gruvbox" / "theme.yaml").write_text("name: Gruvbox\n")
+    assert main(argv) == 0
+    assert json.loads(capsys.readouterr().out)["pack"] == str(pack)
+    assert "gruvbox" in list_themes(pack)
+
+    assert main(argv) == 0
+    assert json.loads(capsys.readouterr().out)["pack"] is None
+
+
+def test_installed_pack_yields_to_newer_tree(mock_home, tmp_path, monkeypatch):
+    installed = mock_home / ".local" / "share" / "macmikase" / "themes"
+    (installed / "nord").mkdir(parents=True)
+    (installed / "nord" / "theme.yaml").write_text("name: Nord\n")
+    pack = build_pack(installed)
+    monkeypatch.delenv("THEMES_DIR", raising=False)
+    monkeypatch.setattr("macmikase.themes.find_repo_root", lambda: None)
+    (tmp_path / "cwd").mkdir()
+    monkeypatch.chdir(tmp_path / "cwd")
+    assert discover_theme_dirs()[0] == pack
+
+    # A theme added straight to the tree after the pack was built.
+    earlier = pack.stat().st_mtime_ns - 10**9
+    os.utime(pack, ns=(earlier, earlier))
+    (installed / "gruvbox").mkdir()
+    (installed / "gruvbox" / "theme.yaml").write_text("name: Gruvbox\n")
+    sources = discover_theme_dirs()
+    assert sources[0] == installed
+    assert "gruvbox" in list_themes(sources[0])
+
+    build_pack(installed)
+    assert discover_theme_dirs()[0] == pack
@@ -0,0 +1,58 @@
+"""Tests for macmikase.thumbnails module."""
+
+import pytest
+
+from macmikase.thumbnails import (
+    Thumbnail,
+    cache_path,
+    load_thumbnail,
+    render_half_blocks,
+    source_digest,
+)
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def preview(tmp_path):
+    path = tmp_path / "preview.png"
+    img = Image.new("RGB", (200, 100), "#ff0000")
+    img.paste((0, 0, 255), (0, 50, 200, 100))
+    img.save(path)
+    return path
+
+
+def test_thumbnail_fits_cells_and_keeps_aspect(mock_home, preview):
+    thumb = load_thumbnail(preview, 20, 10)
+
+    assert thumb.width == 20
+    assert thumb.height == 10  # 2:1 image, two pixel rows per cell
+    assert thumb.pixel(0, 0) == (255, 0, 0)
+    assert thumb.pixel(0, 9) == (0, 0, 255)
+
+
+def test_second_load_reads_cache_without_decoding(mock_home, preview, monkeypatch):
+    first = load_thumbnail(preview, 20, 10)
+    assert cache_path(source_digest(preview), 20, 10).exists()
+
+    monkeypatch.setattr("macmikase.thumbnails._decode", lambda *a: pytest.fail("decoded"))
+    assert load_thumbnail(preview, 20, 10) == first
+
+
+def test_cache_is_keyed_by_cell_size(mock_home, preview):
+    assert load_thumbnail(preview, 20, 10).width == 20
+    assert load_thumbnail(preview, 10, 10).width == 10
+
+
+def test_missing_source(mock_home, tmp_path):
+    assert load_thumbnail(tmp_path / "nope.png", 20, 10) is None
+
+
+def test_render_half_blocks():
+    thumb = Thumbnail(2, 2, bytes([255, 0, 0, 255, 0, 0, 0, 0, 255, 0, 0, 255]))
+    text = render_half_blocks(thumb)
+
+    assert text.plain == "▀▀\n"
+    style = text.spans[0].style
+    assert style.color.triplet == (255, 0, 0)
+    assert style.bgcolor.triplet == (0, 0, 255)
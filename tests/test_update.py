@@ -0,0 +1,119 @@
+"""Tests for macmikase.update module."""
+
+import io
+import time
+
+import pytest
+
+from macmikase.update import (
+    Lane,
+    Step,
+    load_history,
+    record_history,
+    run_updates,
+    select_lanes,
+    summarize_history,
+)
+
+
+@pytest.fixture
+def fake_bin(tmp_path, monkeypatch):
+    """Directory of fake package-manager executables placed first on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+
+    def make(name, body):
+        script = bin_dir / name
+        script.write_text(f"#!/bin/sh\n{body}\n")
+        script.chmod(0o755)
+        return script
+
+    return make
+
+
+def _lane(name, *steps, lock=None):
+    return Lane(name, name, tuple(Step((name, *s)) for s in steps), lock=lock)
+
+
+def test_select_lanes_only_and_skip():
+    lanes = [_lane("a", ()), _lane("b", ()), _lane("c", ())]
+    assert [lane.name for lane in select_lanes(lanes, only=["c", "a"])] == ["a", "c"]
+    assert [lane.name for lane in select_lanes(lanes, skip=["b"])] == ["a", "c"]
+    with pytest.raises(ValueError, match="nope"):
+        select_lanes(lanes, only=["nope"])
+
+
+def test_output_is_prefixed_per_lane(fake_bin):
+    fake_bin("alpha", 'echo "alpha says $1"')
+    fake_bin("beta", 'echo "beta says $1"')
+    out = io.StringIO()
+
+    results = run_updates([_lane("alpha", ("hi",)), _lane("beta", ("yo",))], out=out)
+
+    assert [r.status for r in results] == ["ok", "ok"]
+    lines = out.getvalue().splitlines()
+    assert "[alpha] alpha says hi" in lines
+    assert "[beta ] beta says yo" in lines
+
+
+def test_independent_lanes_run_concurrently(fake_bin):
+    fake_bin("slow1", "sleep 0.5")
+    fake_bin("slow2", "sleep 0.5")
+
+    start = time.monotonic()
+    run_updates([_lane("slow1", ()), _lane("slow2", ())], out=io.StringIO())
+
+    assert time.monotonic() - start < 0.9
+
+
+def test_locked_lanes_are_serialised(fake_bin, tmp_path):
+    log = tmp_path / "log"
+    for name in ("one", "two"):
+        fake_bin(name, f'echo "{name} start" >> {log}; sleep 0.2; echo "{name} end" >> {log}')
+
+    run_updates([_lane("one", (), lock="x"), _lane("two", (), lock="x")], out=io.StringIO())
+
+    assert log.read_text().splitlines() == ["one start", "one end", "two start", "two end"]
+
+
+def test_failing_step_stops_lane(fake_bin, tmp_path):
+    marker = tmp_path / "ran"
+    fake_bin("mgr", f'[ "$1" = "bad" ] && exit 3; touch {marker}')
+
+    (result,) = run_updates([_lane("mgr", ("bad",), ("good",))], out=io.StringIO())
+
+    assert result.status == "failed"
+    assert result.returncode == 3
+    assert result.failed_step == "mgr bad"
+    assert not marker.exists()
+
+
+def test_allowed_failure_continues(fake_bin):
+    fake_bin("mgr", "exit 1")
+    lane = Lane("mgr", "mgr", (Step(("mgr",), allow_failure=True),))
+
+    (result,) = run_updates([lane], out=io.StringIO())
+
+    assert result.status == "ok"
+
+
+def test_missing_binary_is_skipped(fake_bin):
+    (result,) = run_updates([_lane("not-installed", ())], out=io.StringIO())
+    assert result.status == "skipped"
+
+
+def test_history_roundtrip_and_summary(fake_bin, tmp_path):
+    fake_bin("fast", "true")
+    fake_bin("slow", "sleep 0.2")
+    history = tmp_path / "history.jsonl"
+
+    for _ in range(2):
+        results = run_updates([_lane("fast", ()), _lane("slow", ())], out=io.StringIO())
+        record_history(results, history)
+
+    entries = load_history(history)
+    assert len(entries) == 2
+    summary = summarize_history(entries)
+    assert [row["lane"] for row in summary] == ["slow", "fast"]
+    assert summary[0]["runs"] == 2
@@ -0,0 +1,123 @@
+"""Tests for macmikase.wallpapers module."""
+
+import pytest
+
+from macmikase.wallpapers import (
+    background_filter,
+    gc,
+    ingest_tree,
+    is_background,
+    load_index,
+    materialize,
+    object_path,
+    parse_size,
+    store_dir,
+    variant,
+)
+
+
+def _theme(root, name, wallpaper=b"image-bytes", rel="backgrounds/1.png"):
+    theme = root / name
+    (theme / "backgrounds").mkdir(parents=True)
+    (theme / "theme.yaml").write_text(f"name: {name}\nwallpaper: {rel}\n")
+    (theme / rel).write_bytes(wallpaper)
+    (theme / "backgrounds" / "unused.png").write_bytes(b"never shown")
+    return theme
+
+
+@pytest.fixture
+def themes(tmp_path):
+    root = tmp_path / "themes"
+    _theme(root, "nord", b"nord")
+    _theme(root, "gruvbox", b"gruvbox")
+    _theme(root, "nord-copy", b"nord")
+    return root
+
+
+def test_is_background():
+    assert is_background("nord/backgrounds/1.png")
+    assert not is_background("nord/theme.yaml")
+    assert not is_background("backgrounds/1.png")
+
+
+def test_background_filter_keeps_declared_wallpaper(themes):
+    exclude = background_filter(themes)
+    assert not exclude("nord/backgrounds/1.png")
+    assert exclude("nord/backgrounds/unused.png")
+    assert not exclude("nord/theme.yaml")
+
+
+def test_parse_size():
+    assert parse_size("2560x1440") == (2560, 1440)
+    with pytest.raises(ValueError):
+        parse_size("big")
+
+
+def test_ingest_stores_declared_wallpapers_once(mock_home, themes):
+    result = ingest_tree(themes)
+
+    assert result.added == ["gruvbox", "nord", "nord-copy"]
+    index = load_index()
+    assert index["nord"]["sha256"] == index["nord-copy"]["sha256"]
+    objects = list((store_dir() / "objects").glob("*/*"))
+    assert len(objects) == 2  # deduplicated, unused backgrounds skipped
+    assert object_path(index["nord"]["sha256"], ".png").read_bytes() == b"nord"
+
+
+def test_reingest_unchanged_is_noop(mock_home, themes, monkeypatch):
+    ingest_tree(themes)
+    monkeypatch.setattr("macmikase.wallpapers.file_digest", lambda p: pytest.fail(f"hashed {p}"))
+    result = ingest_tree(themes)
+    assert not result.changed
+    assert len(result.unchanged) == 3
+
+
+def test_removed_theme_is_pruned(mock_home, themes):
+    ingest_tree(themes)
+    gruvbox = themes / "gruvbox"
+    for path in sorted(gruvbox.rglob("*"), reverse=True):
+        path.rmdir() if path.is_dir() else path.unlink()
+    gruvbox.rmdir()
+
+    result = ingest_tree(themes)
+    assert result.removed == ["gruvbox"]
+    assert len(list((store_dir() / "objects").glob("*/*"))) == 1
+    assert gc() == []
+
+
+def test_materialize_ingests_unknown_theme_on_demand(mock_home, tmp_path):
+    user_themes = tmp_path / "installed"
+    _theme(user_themes, "custom", b"custom", rel="backgrounds/me.jpg")
+
+    path = materialize("custom", themes_dir=user_themes)
+    assert path.read_bytes() == b"custom"
+    assert path.suffix == ".jpg"
+    assert "custom" in load_index()
+
+
+def test_materialize_missing_raises(mock_home):
+    with pytest.raises(FileNotFoundError):
+        materialize("nope")
+
+
+def test_variant_downscales_and_caches(mock_home, tmp_path):
+    image = pytest.importorskip("PIL.Image")
+    root = tmp_path / "themes"
+    theme = _theme(root, "big")
+    image.new("RGB", (400, 200), "#336699").save(theme / "backgrounds" / "1.png")
+    ingest_tree(root)
+
+    path = materialize("big", size=(100, 100))
+    with image.open(path) as img:
+        assert img.size == (100, 100)
+    assert materialize("big", size=(100, 100)) == path
+
+    # Never upscale: a larger target returns the stored original.
+    assert materialize("big", size=(800, 800)) == object_path(load_index()["big"]["sha256"], ".png")
+
+
+def test_variant_skips_jpeg_optimise_without_resize(mock_home, tmp_path):
+    image = pytest.importorskip("PIL.Image")
+    source = tmp_path / "w.jpg"
+    image.new("RGB", (50, 50)).save(source)
+    assert variant(source, "0" * 64, None, optimize=True) is None
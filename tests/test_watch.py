@@ -0,0 +1,128 @@
+"""Tests for macmikase.watch module."""
+
+import json
+import sys
+
+import pytest
+
+from macmikase import watch
+from macmikase.chezmoi import update_chezmoi_data
+from macmikase.deploy import deploy_tree
+from macmikase.watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    ThemeWatcher,
+    changed_files,
+    plan_outputs,
+    snapshot,
+)
+
+CURSOR = {
+    "colorTheme": "Nord",
+    "colors": {"background": "#101010", "foreground": "#eeeeee", "accent": "#88c0d0"},
+}
+
+
+@pytest.fixture
+def themes(tmp_themes_dir):
+    nord = tmp_themes_dir / "nord"
+    (nord / "cursor.json").write_text(json.dumps(CURSOR))
+    (nord / "ghostty.conf").write_text("background = #101010\nforeground = #eeeeee\n")
+    (nord / "btop.theme").write_text('theme[main_bg]="#101010"\n')
+    return tmp_themes_dir
+
+
+class Recorder:
+    def __init__(self):
+        self.commands = []
+
+    def __call__(self, cmd, **kwargs):
+        self.commands.append(cmd)
+
+
+def edit_cursor(themes, background):
+    data = {**CURSOR, "colors": {**CURSOR["colors"], "background": background}}
+    (themes / "nord" / "cursor.json").write_text(json.dumps(data))
+
+
+def test_snapshot_and_changed_files(themes):
+    before = snapshot(themes / "nord")
+    assert "cursor.json" in before
+    (themes / "nord" / ".cursor.json.swp").write_text("x")
+    (themes / "nord" / "kitty.conf").write_text("color0 #000000\n")
+    assert changed_files(before, snapshot(themes / "nord")) == {"kitty.conf"}
+
+
+def test_plan_outputs():
+    plan = plan_outputs({"kitty.conf", "btop.theme", "preview.png"})
+    assert plan.terminals and plan.copies == ["btop.theme"] and not plan.chezmoi
+    assert plan_outputs({"preview.png"}).empty
+    # chezmoi apply re-runs the setup script, which covers copies and reloads.
+    plan = plan_outputs({"theme.yaml", "kitty.conf", "cursor.json"})
+    assert plan.chezmoi and plan.cursor and not plan.terminals
+
+
+def test_cursor_edit_syncs_and_reapplies_active_theme(mock_home, themes, monkeypatch):
+    reloads = []
+    monkeypatch.setattr(watch, "reload_terminals", lambda: reloads.append(True))
+    update_chezmoi_data("nord", str(themes))
+    run = Recorder()
+    watcher = ThemeWatcher(themes, run=run, log=lambda _line: None)
+
+    edit_cursor(themes, "#202020")
+    (outcome,) = watcher.handle({"nord"})
+    assert outcome.changed == ["cursor.json"]
+    assert outcome.synced == ["ghostty.conf"]
+    assert "background = #202020" in (themes / "nord" / "ghostty.conf").read_text()
+    assert outcome.applied[-1] == "terminals"
+    assert reloads == [True]
+
+    # The watcher's own writes do not trigger another round.
+    assert watcher.handle({"nord"}) == []
+
+
+def test_inactive_theme_is_only_synced(mock_home, themes):
+    update_chezmoi_data("tokyo-night", str(themes))
+    run = Recorder()
+    watcher = ThemeWatcher(themes, run=run, log=lambda _line: None)
+    edit_cursor(themes, "#202020")
+    (outcome,) = watcher.handle({"nord"})
+    assert outcome.synced == ["ghostty.conf"]
+    assert outcome.applied == []
+    assert run.commands == []
+
+
+def test_copied_outputs_and_deployed_tree(mock_home, themes, tmp_path):
+    dest = tmp_path / "installed"
+    deploy_tree(themes, dest)
+    update_chezmoi_data("nord", str(dest))
+    watcher = ThemeWatcher(themes, run=Recorder(), log=lambda _line: None)
+
+    (themes / "nord" / "btop.theme").write_text('theme[main_bg]="#303030"\n')
+    (outcome,) = watcher.handle({"nord"})
+    assert outcome.applied == ["btop.theme"]
+    assert "#303030" in (dest / "nord" / "btop.theme").read_text()
+    copied = mock_home / ".config" / "btop" / "themes" / "nord.theme"
+    assert copied.read_text() == 'theme[main_bg]="#303030"\n'
+
+
+def test_polling_watcher_reports_touched_themes(themes):
+    watcher = PollingWatcher(themes, interval=0.01)
+    assert watcher.wait(0.02) == set()
+    (themes / "catppuccin" / "kitty.conf").write_text("color0 #000000\n")
+    assert watcher.wait(0.5) == {"catppuccin"}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_watcher_reports_touched_themes(themes):
+    watcher = InotifyWatcher(themes)
+    try:
+        (themes / "nord" / "kitty.conf").write_text("color0 #000000\n")
+        assert watcher.wait(1.0) == {"nord"}
+        (themes / "gruvbox").mkdir()
+        assert "gruvbox" in watcher.wait(1.0)
+        (themes / "gruvbox" / "theme.yaml").write_text("name: Gruvbox\n")
+        assert watcher.wait(1.0) == {"gruvbox"}
+        assert watcher.wait(0.05) == set()
+    finally:
+        watcher.close()